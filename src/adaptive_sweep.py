@@ -0,0 +1,150 @@
+import logging
+
+from sweep import expand_axis, make_sweep_run, sweep_size
+
+# Adaptive section keys that steer the search rather than describe runs
+ADAPTIVE_KEYS = ("mode", "budget", "objective_test_ids", "boundary_axis", "fixed")
+
+class AdaptiveSweep:
+    """
+    Searches an EQ/SW/FG grid with as few scope runs as possible instead of
+    running every point. The batch "adaptive" section takes the same axes,
+    init_commands and name templates as a sweep section, plus:
+        mode (str): "optimize" (default) - coarse-to-fine pattern search for
+                    the point with the best worst-case margin;
+                    "boundary" - bisection along boundary_axis (other axes
+                    held at "fixed" values) for the pass/fail transition.
+        budget (int): Maximum number of scope runs (default 16).
+        objective_test_ids (list): Tests whose margins count (default all).
+    runs() yields run definitions one at a time; the caller must record()
+    each run's summary rows before asking for the next one, since the next
+    point depends on the previous results.
+    """
+    def __init__(self, spec, logger=None):
+        self.logger = logger if logger else logging.getLogger("AdaptiveSweep")
+        self.sweep = {k: v for k, v in spec.items() if k not in ADAPTIVE_KEYS}
+        self.names = list(spec.get("axes", {}))
+        self.values = [list(expand_axis(spec["axes"][name])) for name in self.names]
+        self.mode = spec.get("mode", "optimize")
+        self.budget = spec.get("budget", 16)
+        self.objective_test_ids = set(spec.get("objective_test_ids", []))
+        self.boundary_axis = spec.get("boundary_axis", self.names[0] if self.names else None)
+        self.fixed = spec.get("fixed", {})
+        self.scores = {}  # grid index tuple -> worst margin (None: no valid result)
+        self.passed = {}  # grid index tuple -> all objective tests passed
+        self.runs_used = 0
+        self.exhausted = False
+        self.result = None  # (description, point) once the search has finished
+
+    def grid_size(self):
+        return sweep_size(self.sweep)
+
+    def point(self, index):
+        return {name: values[i] for name, values, i in zip(self.names, self.values, index)}
+
+    def runs(self):
+        search = self._pattern_search() if self.mode == "optimize" else self._bisect()
+        for index in search:
+            if self.runs_used >= self.budget:
+                self.logger.info(f"Adaptive sweep: run budget of {self.budget} exhausted")
+                self.exhausted = True
+                break
+            run = make_sweep_run(self.sweep, self.point(index), self.runs_used)
+            run["adaptive_index"] = list(index)
+            self.runs_used += 1
+            yield run
+        if self.mode == "optimize" and self.scores:
+            best = max(self.scores, key=self._rank)
+            self.result = (f"best worst-case margin {self.scores[best]}", self.point(best))
+
+    def record(self, run, rows):
+        """Feeds back the summary rows of a run produced by runs()."""
+        if "adaptive_index" not in run:
+            return
+        index = tuple(run["adaptive_index"])
+        valid = [r for r in rows if not r.get('Error')
+                 and (not self.objective_test_ids or r['TestID'] in self.objective_test_ids)]
+        margins = []
+        for r in valid:
+            try:
+                margins.append(float(r['Margin']))
+            except (TypeError, ValueError):
+                pass
+        self.scores[index] = min(margins) if margins else None
+        self.passed[index] = bool(valid) and all(r['Pass'] for r in valid)
+        self.logger.info(f"Adaptive sweep: {self.point(index)} -> margin {self.scores[index]}, "
+                         f"{'pass' if self.passed[index] else 'fail'}")
+
+    def _rank(self, index):
+        score = self.scores.get(index)
+        return float('-inf') if score is None else score
+
+    def _probe(self, index):
+        # Every grid point is measured at most once
+        if index not in self.scores:
+            yield index
+
+    def _pattern_search(self):
+        """
+        Compass search on the grid indices: start in the middle with a step
+        of a quarter of each axis, move to any neighbour that improves the
+        worst-case margin, halve the steps when none does.
+        """
+        current = tuple(len(v) // 2 for v in self.values)
+        steps = [max(1, len(v) // 4) for v in self.values]
+        yield from self._probe(current)
+        while any(steps):
+            improved = False
+            for axis, step in enumerate(steps):
+                if step == 0:
+                    continue
+                for direction in (1, -1):
+                    i = current[axis] + direction * step
+                    if not 0 <= i < len(self.values[axis]):
+                        continue
+                    candidate = current[:axis] + (i,) + current[axis + 1:]
+                    yield from self._probe(candidate)
+                    if self._rank(candidate) > self._rank(current):
+                        current = candidate
+                        improved = True
+                        break
+            if not improved:
+                steps = [step // 2 for step in steps]
+
+    def _bisect(self):
+        """Bisection along boundary_axis for the last point with the lower end's pass state."""
+        axis = self.names.index(self.boundary_axis)
+        base = []
+        for name, values in zip(self.names, self.values):
+            base.append(values.index(self.fixed[name]) if name in self.fixed else len(values) // 2)
+
+        def at(i):
+            return tuple(base[:axis] + [i] + base[axis + 1:])
+
+        lo, hi = 0, len(self.values[axis]) - 1
+        yield from self._probe(at(lo))
+        yield from self._probe(at(hi))
+        if self.passed.get(at(lo)) == self.passed.get(at(hi)):
+            self.result = ("no pass/fail transition on the axis", None)
+            return
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            yield from self._probe(at(mid))
+            if self.passed.get(at(mid)) == self.passed.get(at(lo)):
+                lo = mid
+            else:
+                hi = mid
+        state = "pass" if self.passed.get(at(lo)) else "fail"
+        self.result = (f"{self.boundary_axis} boundary: {state} up to {self.values[axis][lo]}, "
+                       f"changes at {self.values[axis][hi]}", self.point(at(hi)))
+
+    def report(self):
+        """Lines describing the outcome, for the batch summary."""
+        lines = [f"Adaptive sweep ({self.mode}): {self.runs_used} scope runs of a {self.grid_size()}-point grid"
+                 + (" (budget exhausted)" if self.exhausted else "")]
+        if self.result:
+            description, point = self.result
+            lines.append(f"  {description}" + (f" at {point}" if point else ""))
+        else:
+            lines.append("  search did not finish within the run budget")
+        return lines
@@ -0,0 +1,108 @@
+import os
+import json
+import time
+import logging
+import threading
+
+class BatchJournal:
+    """
+    Append-only JSONL record of a batch, fsync'd after every line so it
+    survives a crash or power loss. Events:
+        {"event": "batch_start", "config": path, "batch": batch_id}
+        {"event": "run_start", "run": name, "report_name": name}
+        {"event": "stage", "run": name, "stage": "dut", "ok": true,
+         "duration": s, "data": {...stage outputs}}
+        {"event": "run_complete", "run": name, "rows": [summary rows], "ok": bool}
+    Runs are identified by name. A run completed with a failed stage
+    ("ok": false) is not finished: resume retries it from its first
+    failed stage. A torn last line (crash mid-write) is ignored
+    when the journal is read back.
+    """
+    def __init__(self, path, resume=False, logger=None):
+        self.path = path
+        self.logger = logger if logger else logging.getLogger("BatchJournal")
+        self._lock = threading.Lock()
+        self.runs = {}  # name -> {"report_name", "stages": {stage: event}, "rows"}
+        self.batch_id = None
+        if resume and os.path.exists(path):
+            self._load()
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+        if resume and self._file.tell() > 0:
+            # Terminate a torn last line so the next event starts on its own line
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._file.write("\n")
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    self.logger.warning(f"Ignoring corrupt journal line {line_no} in {self.path}")
+                    continue
+                self._apply(event)
+        done = sum(1 for r in self.runs.values() if r["rows"] is not None)
+        self.logger.info(f"Journal {self.path}: {done} runs completed, {len(self.runs) - done} incomplete")
+
+    def _apply(self, event):
+        if event.get("event") == "batch_start":
+            self.batch_id = event.get("batch")
+        name = event.get("run")
+        if name is None:
+            return
+        entry = self.runs.setdefault(name, {"report_name": None, "stages": {}, "rows": None})
+        kind = event.get("event")
+        if kind == "run_start":
+            entry["report_name"] = event.get("report_name")
+        elif kind == "stage":
+            entry["stages"][event["stage"]] = event
+        elif kind == "run_complete":
+            entry["rows"] = event.get("rows", []) if event.get("ok", True) else None
+
+    def append(self, event):
+        event = dict(event, time=time.time())
+        line = json.dumps(event, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._apply(event)
+
+    def start_batch(self, config_path, batch_id):
+        self.append({"event": "batch_start", "config": os.path.abspath(config_path), "batch": batch_id})
+
+    def start_run(self, name, report_name):
+        self.append({"event": "run_start", "run": name, "report_name": report_name})
+
+    def record_stage(self, name, stage, ok, duration, data=None):
+        self.append({"event": "stage", "run": name, "stage": stage, "ok": ok,
+                     "duration": duration, "data": data or {}})
+
+    def complete_run(self, name, rows, ok=True):
+        """Records a run's summary rows; ok=False if one of its stages failed."""
+        self.append({"event": "run_complete", "run": name, "rows": rows, "ok": ok})
+
+    def completed_rows(self, name):
+        """Summary rows of a successfully completed run, or None if it has to (re)run."""
+        entry = self.runs.get(name)
+        return entry["rows"] if entry else None
+
+    def completed_stages(self, name):
+        """{stage: stage event} of the stages of an incomplete run that succeeded."""
+        entry = self.runs.get(name)
+        if not entry:
+            return {}
+        return {stage: event for stage, event in entry["stages"].items() if event.get("ok")}
+
+    def report_name(self, name):
+        entry = self.runs.get(name)
+        return entry["report_name"] if entry else None
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
@@ -1,6 +1,9 @@
 import json
 import os
 import sys
+import argparse
+import itertools
+import multiprocessing
 import logging
 import time
 import datetime
@@ -9,17 +12,32 @@ import datetime
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(os.path.dirname(__file__))
 
-from verify_instrument import run_instrument_tests
-from dut_control_client import DutControlClient
+from run_executor import RunExecutor
+from pipeline import PipelineExecutor
+from batch_journal import BatchJournal
+from results_store import ResultsStore
+from batch_summary import BatchSummary
+from sweep import iter_batch_runs, count_batch_runs
+from adaptive_sweep import AdaptiveSweep
+from multi_bench import MultiBenchScheduler, failed_run_rows
+from work_queue import WorkQueue, serve_work_queue
+from run_order import RunOrderPlanner
+from duration_estimator import DurationEstimator
+from failure_rerun import FailureRerun
+from instrument_backends import get_backend
+from tracing import tracer, span, print_percentile_table
 
 # Configure logging
 
 log_file = os.path.join(os.path.dirname(__file__), '..', 'batch_runner.log')
+# Bench worker processes (multi_bench) re-import this module on spawn-based
+# platforms and must append to the log instead of truncating it
+log_mode = 'w' if multiprocessing.current_process().name == 'MainProcess' else 'a'
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler(log_file, mode='w'),
+        logging.FileHandler(log_file, mode=log_mode),
         logging.StreamHandler(sys.stdout)
     ]
 )
@@ -29,201 +47,354 @@ def load_config(config_path):
     with open(config_path, 'r') as f:
         return json.load(f)
 
-def run_batch(config_path):
+def run_batch(config_path, resume=False, journal_path=None, use_cache=True, backend=None, estimate_only=False,
+              time_budget=None, rerun_failed=False, marginal=None, result_cache=None, trace=None):
+    """
+    Runs every run of a batch config and prints the summary.
+    Args:
+        config_path (str): Batch config JSON.
+        resume (bool): Continue the batch recorded in the journal: completed
+                       runs are skipped (their journaled results are reused)
+                       and incomplete runs restart from their first
+                       incomplete stage.
+        journal_path (str): Journal file. Defaults to common_settings
+                            "journal_path", else batch_journal.jsonl in the
+                            project root.
+        use_cache (bool): Reuse cached results of identical earlier runs
+                          (with the result cache on).
+        result_cache (bool): Turns the result cache on or off, overriding
+                             common_settings "result_cache" (default off).
+        backend (str): Scope backend overriding common_settings "scope_backend".
+        estimate_only (bool): Print the estimated batch duration and return
+                              without executing anything.
+        time_budget (float): Hours the batch may take; overrides
+                             common_settings "time_budget_hours".
+        rerun_failed (bool): Run only the failed test IDs of the previous
+                             batch's summary and merge the new results into it.
+        marginal (float): With rerun_failed, also re-run passing tests whose
+                          margin is below this (common_settings "rerun_margin").
+        trace (bool): Records timing spans, overriding common_settings
+                      "trace" (default off).
+    """
     config = load_config(config_path)
     common = config.get("common_settings", {})
-    runs = config.get("runs", [])
-    
-    dut_ip = common.get("dut_server_ip")
-    dut_port = common.get("dut_server_port", 13000)
-    instrument_ip = common.get("instrument_ip")
-    default_test_ids = common.get("default_test_ids", [])
-    base_dir = common.get("base_directory")
-    
-    # Initialize DUT Configuration
-    logger.info(f"Connecting to DUT Server at {dut_ip}:{dut_port}...")
-    dut_client = DutControlClient(server_ip=dut_ip, server_port=dut_port, logger=logger)
+    if backend:
+        common["scope_backend"] = backend
+    if result_cache is not None:
+        common["result_cache"] = result_cache
+
+    # "trace" (default off, --trace) records timing spans of every stage,
+    # scope call and DUT transaction; exported as Chrome/Perfetto trace JSON.
+    # The tracer is process-wide: a later batch must not inherit the setting.
+    was_tracing = tracer.enabled
+    if trace if trace is not None else common.get("trace", False):
+        tracer.reset()
+        tracer.enable()
+    try:
+        return _run_batch(config_path, config, common, resume, journal_path, use_cache, estimate_only,
+                          time_budget, rerun_failed, marginal)
+    finally:
+        tracer.enabled = was_tracing
+
+def _run_batch(config_path, config, common, resume, journal_path, use_cache, estimate_only,
+               time_budget, rerun_failed, marginal):
+    trace_start = time.perf_counter()
+    # Explicit runs[] followed by the "sweep" grid, generated lazily, then the
+    # "adaptive" search, whose next point depends on the previous results
+    runs = iter_batch_runs(config)
+    total_runs = count_batch_runs(config)
+    root_dir = os.path.join(os.path.dirname(__file__), '..')
+    summary_jsonl = common.get("summary_jsonl", os.path.join(root_dir, 'batch_summary.jsonl'))
+    adaptive_spec = config.get("adaptive")
+    rerun = None
+    if rerun_failed:
+        if not os.path.exists(summary_jsonl):
+            logger.error(f"No previous batch summary to re-run: {summary_jsonl}")
+            return None
+        if marginal is None:
+            marginal = common.get("rerun_margin")
+        rerun = FailureRerun(summary_jsonl, marginal=marginal, resume=resume, logger=logger)
+        runs = rerun.plan(runs)
+        total_runs = len(runs)
+        # A re-check measures again; the cache would only repeat the failure
+        use_cache = False
+        adaptive_spec = None
+    results_db = common.get("results_db", os.path.join(os.path.dirname(__file__), '..', 'results.db'))
+    # "time_budget_hours" keeps the runs (and test IDs) whose durations, as
+    # learned from earlier batches, fit the window; runs may set "priority"
+    # and common "test_priority" orders the test IDs worth keeping
+    if time_budget is None:
+        time_budget = common.get("time_budget_hours")
+    estimator = None
+    parallelism = len(common.get("benches") or []) or 1
+    if estimate_only or time_budget:
+        estimator = make_estimator(common, results_db)
+        runs = list(runs)
+        if time_budget:
+            budget = time_budget * 3600
+            if adaptive_spec:
+                # The adaptive points are not known yet; reserve time for them
+                budget -= adaptive_spec.get("budget", 0) * estimator.estimate_run({})["total"] / parallelism
+            runs, skipped, trimmed = estimator.fit_budget(runs, max(0.0, budget),
+                                                          test_priority=common.get("test_priority"),
+                                                          parallelism=parallelism)
+            total_runs = len(runs)
+            logger.info(f"Time budget {time_budget:g} h: {len(runs)} runs selected ({len(trimmed)} trimmed), "
+                        f"{len(skipped)} skipped")
+            for run in skipped:
+                logger.info(f"[{run['name']}] Skipped, does not fit the time budget")
+    # "optimize_run_order": true executes the runs in the order that needs the
+    # fewest register writes and SetConfig calls; the summary keeps config order
+    planner = None
+    config_order = []
+    if common.get("optimize_run_order", False):
+        planner = RunOrderPlanner(common, config_weight=common.get("run_order_config_weight", 1.0), logger=logger)
+        config_order = list(runs)
+        runs = iter(planner.plan(config_order))
+    batch_estimate = None
+    if estimator:
+        planned = list(runs)
+        adaptive_runs = [{}] * adaptive_spec.get("budget", 0) if adaptive_spec else []
+        batch_estimate = estimator.estimate(planned + adaptive_runs, parallelism=parallelism,
+                                            pipeline=common.get("pipeline", False) and parallelism == 1)
+        if estimate_only:
+            for line in estimator.report(batch_estimate):
+                print(line)
+            return batch_estimate
+        logger.info(f"Estimated batch duration: {batch_estimate['total'] / 3600:.2f} h")
+        runs = iter(planned)
+    adaptive = None
+    if adaptive_spec:
+        adaptive = AdaptiveSweep(adaptive_spec, logger=logger)
+        runs = itertools.chain(runs, adaptive.runs())
+        total_runs += adaptive.budget
     
-    results_summary = []
+    if journal_path is None:
+        journal_path = common.get("journal_path", os.path.join(os.path.dirname(__file__), '..', 'batch_journal.jsonl'))
+    journal = BatchJournal(journal_path, resume=resume, logger=logger)
+    batch_id = journal.batch_id if resume and journal.batch_id else datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+    if not resume:
+        journal.start_batch(config_path, batch_id)
+
+    # "results_store" (default on) keeps every parsed result in a SQLite
+    # database for cross-batch queries (see results_store.py)
+    store = None
+    if common.get("results_store", True):
+        store = ResultsStore(results_db, logger=logger)
+
+    # "benches": [{name, instrument_ip, dut_server_ip, dut_server_port}, ...]
+    # spreads the runs over several benches, one worker process each
+    benches = common.get("benches")
+    # "work_queue": {"host", "port", "lease_seconds"} serves the runs to bench
+    # PCs running work_queue_worker.py instead of executing them here
+    work_queue = common.get("work_queue")
+    if (benches or work_queue) and adaptive:
+        logger.warning("Adaptive sweep needs each result before choosing the next point; using a single bench")
+        benches = work_queue = None
+    executor = None
+    if not benches and not work_queue:
+        executor = RunExecutor(common, logger=logger, journal=journal, store=store, batch_id=batch_id,
+                               use_cache=use_cache)
+
+    # Results stream to CSV/JSONL and the summary table as each run finishes
+    previous_runs = rerun.previous_runs() if rerun else []
+    summary = BatchSummary(total_runs + sum(1 for _, rows in previous_runs if rows is not None),
+                           csv_path=common.get("summary_csv", os.path.join(root_dir, 'batch_summary.csv')),
+                           jsonl_path=summary_jsonl, logger=logger)
+    for name, rows in previous_runs:
+        if rows is None:
+            summary.expect(name)
+        else:
+            summary.add_run(name, rows, live=False)
+    for run in config_order:
+        summary.expect(run["name"])
+
+    def record(run, rows, live=True):
+        if rerun:
+            rows = rerun.merge(run["name"], rows)
+        summary.add_run(run["name"], rows, live=live)
+        if adaptive:
+            adaptive.record(run, rows)
+
+    # The journal, summary and resume identify runs by name, so a repeated
+    # name is caught as the runs stream past (a sweep is never materialized)
+    seen_names = set()
+    repeated_names = []
+
+    def pending_runs():
+        for run in runs:
+            if run["name"] in seen_names:
+                logger.error(f"[{run['name']}] Run name already used in this batch, skipping the repeat")
+                repeated_names.append(run["name"])
+                continue
+            seen_names.add(run["name"])
+            summary.expect(run["name"])
+            rows = journal.completed_rows(run["name"])
+            if rows is not None:
+                logger.info(f"[{run['name']}] Already completed in journal, skipping")
+                record(run, rows, live=False)
+                continue
+            yield run
     
     start_time_total = time.time()
     
-    for run in runs:
-        run_name = run["name"]
-        logger.info(f"==================================================")
-        logger.info(f"STARTING RUN: {run_name}")
-        logger.info(f"==================================================")
-        
-        run_start_time = time.time()
-        
-        # 1. Configure DUT
-        logger.info(f"[{run_name}] Configuring DUT...")
-        for cmd in run.get("dut_commands", []):
-            if cmd.strip().startswith("//") or cmd.strip().startswith("#"):
-                continue
+    # "pipeline": true configures the next run's DUT while the scope is still
+    # saving and exporting the previous run
+    pipeline = None
+    scheduler = None
+    queue = None
 
-            logger.info(f"  Sending: {cmd}")
-            # Check if it is a write_register convenience string or raw command
-            if "write_register" in cmd:
-                # Naive parsing for write_register(0x7c, 0x02, 0x01)
-                # This expects specific format. 
-                # Let's try to extract args.
-                try:
-                    args_str = cmd.split('(')[1].split(')')[0]
-                    args = [int(x.strip(), 16) for x in args_str.split(',')]
-                    if len(args) == 3:
-                        resp = dut_client.write_register(args[0], args[1], args[2])
-                    else:
-                        resp = f"Error: Invalid args count in {cmd}"
-                except Exception as e:
-                    resp = f"Error parsing {cmd}: {e}"
-            else:
-                 resp = dut_client.send_command(cmd)
-            
-            logger.info(f"  Response: {resp}")
-            if "Error" in str(resp):
-                logger.warning(f"  Command failed, continuing run anyway...")
-        
-        # Extract EQ, SW, FG for summary
-        eq_val, sw_val, fg_val = "-", "-", "-"
-        for cmd in run.get("dut_commands", []):
+    def collect_remote_result(run, payload):
+        rows = payload.get("rows") or failed_run_rows(run)
+        if store and payload.get("rows"):
             try:
-                parts = cmd.strip().split()
-                if len(parts) >= 2:
-                    key = parts[0].lower()
-                    val = parts[1]
-                    if key == "eq": eq_val = val
-                    elif key == "sw": sw_val = val
-                    elif key == "fg": fg_val = val
-            except: pass
-
-        # 2. Run Instrument Tests
-        logger.info(f"[{run_name}] Running Instrument Tests...")
-        project_name = run.get("project_name")
-        report_name = run.get("report_name")
-        
-        # Add timestamp to report name
-        if report_name:
-            timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M")
-            name, ext = os.path.splitext(report_name)
-            report_name = f"{name}_{timestamp}{ext}"
-        test_ids = run.get("test_ids", default_test_ids)
-        
-        # We need to assume a config path for the instrument run. 
-        # For now using default one in src/full_config.json as per verify_instrument logic
-        
-        try:
-             run_results = run_instrument_tests(
-                ip_address=instrument_ip,
-                project_name=project_name,
-                report_path=report_name,
-                test_ids=test_ids,
-                output_base_dir=base_dir
-            )
-        except Exception as e:
-            logger.error(f"[{run_name}] Instrument Test Failed: {e}")
-            run_results = []
-        
-        run_end_time = time.time()
-        run_duration = run_end_time - run_start_time
-        logger.info(f"[{run_name}] Run Complete. Duration: {run_duration:.2f}s\n")
-
-        # 3. Collect Results
-        if not run_results:
-             results_summary.append({
-                "Run": run_name,
-                "ReportName": report_name,
-                "EQ": eq_val, "SW": sw_val, "FG": fg_val,
-                "TestID": "Error",
-                "Pass": False,
-                "Margin": "N/A",
-                "Duration": run_duration,
-                "Error": True
-            })
-        else:
-            for res in run_results:
-                results_summary.append({
-                    "Run": run_name,
-                    "ReportName": report_name,
-                    "EQ": eq_val, "SW": sw_val, "FG": fg_val,
-                    "TestID": res['test_id'],
-                    "Pass": res['passed'],
-                    "Margin": res['margin'],
-                    "Duration": run_duration
-                })
+                store.record_run(batch_id, run["name"], payload["report_name"], payload["macros"],
+                                 payload["registers"], payload["results"], payload["duration"],
+                                 test_ids=payload.get("test_ids"), backend=payload.get("backend"),
+                                 stage_times=payload.get("stage_times"))
+            except Exception as e:
+                logger.error(f"[{run['name']}] Could not store results: {e}")
+        journal.start_run(run["name"], payload.get("report_name"))
+        journal.complete_run(run["name"], rows, ok=bool(payload.get("ok")) and payload.get("complete", True))
+        record(run, rows)
+
+    if work_queue:
+        queue = WorkQueue(pending_runs(), common, collect_remote_result,
+                          lease_seconds=work_queue.get("lease_seconds", 120),
+                          max_attempts=work_queue.get("max_attempts", 3), logger=logger)
+        serve_work_queue(queue, host=work_queue.get("host", "0.0.0.0"), port=work_queue.get("port", 13100))
+    elif benches:
+        scheduler = MultiBenchScheduler(common, collect_remote_result, use_cache=use_cache, logger=logger)
+        scheduler.run(pending_runs())
+    elif common.get("pipeline", False) and adaptive:
+        logger.warning("Adaptive sweep needs each result before choosing the next point; running serially")
+    elif common.get("pipeline", False):
+        pipeline = PipelineExecutor(executor.pipeline_stages(), logger=logger)
+
+        def collect(state, slot):
+            state["duration"] = ((slot.finished - slot.started) if slot.started else 0.0) + state["resumed_time"]
+            for stage_name, duration in slot.durations.items():
+                if stage_name not in state["skip_stages"]:
+                    state["stage_times"][stage_name] = duration
+            logger.info(f"[{state['name']}] Run Complete. Duration: {state['duration']:.2f}s\n")
+            record(state["run"], executor.finish_run(state))
+
+        pipeline.run((executor.new_state(run) for run in pending_runs()), on_complete=collect)
+    else:
+        for run in pending_runs():
+            state = executor.execute(run)
+            record(run, executor.finish_run(state))
             
     total_duration = time.time() - start_time_total
+    if executor:
+        executor.close()
+    if tracer.enabled:
+        tracer.record("batch", trace_start, time.perf_counter() - trace_start, {"config": config_path})
+        trace_path = common.get("trace_path", os.path.join(os.path.dirname(__file__), '..', 'batch_trace.json'))
+        tracer.export_chrome(trace_path)
+        logger.info(f"Timing trace written to {trace_path} (open in ui.perfetto.dev or chrome://tracing)")
+    journal.close()
+    if store:
+        store.close()
+    summary.close()
         
     # 4. Print Summary
-    print(f"\nTotal Duration: {total_duration:.2f} s\n")
-    print(f"{'Report File':<80} | {'EQ':<4} | {'SW':<4} | {'FG':<4} | {'Pass / Total':<12} | {'Status':<15} | {'Avg Duration (s)':<16} | {'Key Observation'}")
-    print("-" * 180)
-
-    # Group results by Run
-    from collections import defaultdict
-    run_map = defaultdict(list)
-    for res in results_summary:
-        run_map[res['Run']].append(res)
-    
-    # Iterate in order of config runs to maintain sequence
-    processed_runs = []
-    for run in runs:
-        r_name = run["name"]
-        if r_name in processed_runs: continue
-        processed_runs.append(r_name)
-        
-        items = run_map.get(r_name, [])
-        if not items:
-             print(f"{r_name:<80} | {'-':<4} | {'-':<4} | {'-':<4} | {'0 / 0':<12} | {'❌ Skipped':<15} | {'0.00':<16} | {'Run skipped or output missing'}")
-             continue
-
-        # Check for execution error
-        if len(items) == 1 and items[0].get('Error'):
-             status = "❌ Exec Error"
-             duration = items[0]['Duration']
-             rep_name = items[0].get('ReportName', r_name)
-             eq, sw, fg = items[0].get('EQ', '-'), items[0].get('SW', '-'), items[0].get('FG', '-')
-             obs = "Instrument test failed to execute (Check logs)"
-             print(f"{rep_name:<80} | {eq:<4} | {sw:<4} | {fg:<4} | {'0 / 0':<12} | {status:<15} | {duration:<16.2f} | {obs}")
-             continue
-
-        total = len(items)
-        passed = sum(1 for x in items if x['Pass'])
-        failed_ids = [str(x['TestID']) for x in items if not x['Pass']]
-        duration = items[0]['Duration']  # Run duration is same for all items in run
-        rep_name = items[0].get('ReportName', r_name)
-        eq, sw, fg = items[0].get('EQ', '-'), items[0].get('SW', '-'), items[0].get('FG', '-')
-        
-        # Determine Status and Observation
-        if passed == total and total > 0:
-            status = "✅ All Pass"
-            obs = "All tests passed."
-        elif passed == 0 and total > 0:
-            status = "❌ All Fail"
-            obs = "Systemic failure across all tests"
-        else:
-            status = "⚠ Partial Fail"
-            if len(failed_ids) == 1:
-                obs = f"Single failure (TestID {failed_ids[0]})"
-            else:
-                # Truncate if too long
-                ids_str = ", ".join(failed_ids)
-                if len(ids_str) > 30:
-                     ids_str = ids_str[:27] + "..."
-                obs = f"Failures on {ids_str}"
-
-        print(f"{rep_name:<80} | {eq:<4} | {sw:<4} | {fg:<4} | {f'{passed} / {total}':<12} | {status:<15} | {duration:<16.2f} | {obs}")
-    print("==================================================")
+    print(f"\nTotal Duration: {total_duration:.2f} s")
+    if batch_estimate:
+        print(f"Estimated duration: {batch_estimate['total']:.2f} s")
+    if pipeline:
+        print(f"Pipeline overlap saved: ~{pipeline.saved_time():.2f} s")
+    if rerun:
+        for line in rerun.report():
+            print(line)
+    if planner and planner.report_line():
+        print(planner.report_line())
+    if scheduler or queue:
+        print(f"Register writes skipped: {summary.writes_skipped}")
+    if scheduler:
+        for line in scheduler.report():
+            print(line)
+    if queue:
+        print(f"Work queue: {queue.completed} runs, {queue.reclaimed} leases reclaimed")
+        for worker, info in queue.workers.items():
+            print(f"  {worker:<16} completed {info['completed']}, failed {info['failed']}")
+    if executor:
+        print_executor_stats(executor, summary)
+    print()
+    summary.print_table()
+    if repeated_names:
+        print(f"Not run, name used more than once (run names must be unique): {', '.join(repeated_names)}")
+    if tracer.enabled:
+        print_percentile_table()
+    if adaptive:
+        for line in adaptive.report():
+            print(line)
 
-if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        config_file = sys.argv[1]
-    else:
-        # Default to batch_config.json in project root
-        config_file = os.path.join(os.path.dirname(__file__), '..', 'batch_config.json')
-        
-    if not os.path.exists(config_file):
-        print(f"Error: Config file not found: {config_file}")
+def make_estimator(common, results_db):
+    """DurationEstimator trained on the results store, if there is one."""
+    backend = get_backend(common.get("scope_backend"), **common.get("scope_backend_options", {})).name
+    if not os.path.exists(results_db):
+        return DurationEstimator(common.get("default_test_ids"), backend=backend, logger=logger)
+    store = ResultsStore(results_db, logger=logger)
+    try:
+        return DurationEstimator.from_store(store, common.get("default_test_ids"), backend=backend, logger=logger)
+    finally:
+        store.close()
+
+def print_executor_stats(executor, summary):
+    if executor.dut_client.shadow:
+        print(f"Register writes skipped: {summary.writes_skipped}")
+    if executor.result_cache:
+        print(f"Result cache: {executor.result_cache.hits} runs reused, {executor.result_cache.misses} measured")
+    if executor.templates:
+        templates = executor.templates
+        print(f"Project templates: {templates.hits} opened, {templates.builds} built")
+    if executor.session:
+        session = executor.session
+        print(f"Scope connects: {session.connect_count}, reused: {session.reuse_count}, "
+              f"setup time saved: ~{session.saved_setup_time():.2f} s")
+        timing_rows = session.controller.config_timing_report()
+        if timing_rows:
+            print(f"\nSlowest SetConfig keys:")
+            print(f"{'Key':<45} | {'Calls':>5} | {'Total (s)':>9} | {'Avg (s)':>8}")
+            for key, calls, total, avg in timing_rows:
+                print(f"{key:<45} | {calls:>5} | {total:>9.3f} | {avg:>8.3f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a batch of DUT configurations and scope compliance tests.")
+    # Default to batch_config.json in project root
+    parser.add_argument("config", nargs="?",
+                        default=os.path.join(os.path.dirname(__file__), '..', 'batch_config.json'),
+                        help="Batch config JSON")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip runs the journal records as completed and finish incomplete ones")
+    parser.add_argument("--journal", default=None, help="Journal file (default: batch_journal.jsonl)")
+    parser.add_argument("--cache", action="store_true", default=None,
+                        help="Reuse the results of identical earlier runs (result cache, off by default)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Measure every run even if an identical run is in the result cache")
+    parser.add_argument("--backend", default=None,
+                        help="Scope backend: auto (default), dotnet, sim, replay or mock")
+    parser.add_argument("--estimate", action="store_true",
+                        help="Print the estimated batch duration from earlier batches and exit")
+    parser.add_argument("--time-budget", type=float, default=None, metavar="HOURS",
+                        help="Only run what is estimated to fit in this many hours")
+    parser.add_argument("--rerun-failed", action="store_true",
+                        help="Re-run only the failed test IDs of the previous batch and merge them into its summary")
+    parser.add_argument("--marginal", type=float, default=None, metavar="MARGIN",
+                        help="With --rerun-failed, also re-run tests whose margin is below MARGIN")
+    parser.add_argument("--trace", action="store_true", default=None,
+                        help="Record timing spans and write batch_trace.json with a p50/p95 table")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.config):
+        print(f"Error: Config file not found: {args.config}")
         sys.exit(1)
         
-    run_batch(config_file)
+    run_batch(args.config, resume=args.resume, journal_path=args.journal, use_cache=not args.no_cache,
+              backend=args.backend, estimate_only=args.estimate, time_budget=args.time_budget,
+              rerun_failed=args.rerun_failed, marginal=args.marginal, result_cache=args.cache,
+              trace=args.trace)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import csv
+import json
+import time
+import logging
+
+CSV_FIELDS = ["Run", "ReportName", "EQ", "SW", "FG", "TestID", "Pass", "Margin", "Duration", "WritesSkipped", "Cached", "Error"]
+TABLE_HEADER = (f"{'Report File':<80} | {'EQ':<4} | {'SW':<4} | {'FG':<4} | {'Pass / Total':<12} | "
+                f"{'Status':<15} | {'Avg Duration (s)':<16} | {'Key Observation'}")
+
+def format_run_line(run_name, items):
+    """One summary table line for a run's results_summary rows."""
+    if not items:
+        return f"{run_name:<80} | {'-':<4} | {'-':<4} | {'-':<4} | {'0 / 0':<12} | {'❌ Skipped':<15} | {'0.00':<16} | {'Run skipped or output missing'}"
+
+    # Check for execution error
+    if len(items) == 1 and items[0].get('Error'):
+        status = "❌ Exec Error"
+        duration = items[0]['Duration']
+        rep_name = items[0].get('ReportName', run_name)
+        eq, sw, fg = items[0].get('EQ', '-'), items[0].get('SW', '-'), items[0].get('FG', '-')
+        obs = "Instrument test failed to execute (Check logs)"
+        return f"{rep_name:<80} | {eq:<4} | {sw:<4} | {fg:<4} | {'0 / 0':<12} | {status:<15} | {duration:<16.2f} | {obs}"
+
+    total = len(items)
+    passed = sum(1 for x in items if x['Pass'])
+    failed_ids = [str(x['TestID']) for x in items if not x['Pass']]
+    duration = items[0]['Duration']  # Run duration is same for all items in run
+    rep_name = items[0].get('ReportName', run_name)
+    eq, sw, fg = items[0].get('EQ', '-'), items[0].get('SW', '-'), items[0].get('FG', '-')
+
+    # Determine Status and Observation
+    if passed == total and total > 0:
+        status = "✅ All Pass"
+        obs = "All tests passed."
+    elif passed == 0 and total > 0:
+        status = "❌ All Fail"
+        obs = "Systemic failure across all tests"
+    else:
+        status = "⚠ Partial Fail"
+        if len(failed_ids) == 1:
+            obs = f"Single failure (TestID {failed_ids[0]})"
+        else:
+            # Truncate if too long
+            ids_str = ", ".join(failed_ids)
+            if len(ids_str) > 30:
+                ids_str = ids_str[:27] + "..."
+            obs = f"Failures on {ids_str}"
+    if items[0].get('Cached'):
+        obs += " (REUSED cached result, not measured)"
+
+    return f"{rep_name:<80} | {eq:<4} | {sw:<4} | {fg:<4} | {f'{passed} / {total}':<12} | {status:<15} | {duration:<16.2f} | {obs}"
+
+
+class BatchSummary:
+    """
+    Summary maintained as runs finish instead of rebuilt after the batch.
+    Each run's rows are streamed to CSV/JSONL (flushed per run), its table
+    line is formatted once, and running totals (pass counts, average run
+    duration, ETA) are logged after every run.
+    Args:
+        total_runs (int): Expected number of runs (for the ETA).
+        csv_path (str): Optional CSV stream, one line per test result.
+        jsonl_path (str): Optional JSONL stream, one line per run.
+    """
+    def __init__(self, total_runs=0, csv_path=None, jsonl_path=None, logger=None):
+        self.logger = logger if logger else logging.getLogger("BatchSummary")
+        self.total_runs = total_runs
+        self.order = []  # run names in config order (table order)
+        self.items = {}  # run name -> rows
+        self.lines = {}  # run name -> formatted table line
+        self.runs_done = 0
+        self.tests_total = 0
+        self.tests_passed = 0
+        self.exec_errors = 0
+        self.writes_skipped = 0
+        self.duration_total = 0.0
+        self.started = time.time()
+        self._csv_file = open(csv_path, 'w', newline='', encoding='utf-8') if csv_path else None
+        self._csv = csv.DictWriter(self._csv_file, fieldnames=CSV_FIELDS, extrasaction='ignore') if csv_path else None
+        if self._csv:
+            self._csv.writeheader()
+        self._jsonl_file = open(jsonl_path, 'w', encoding='utf-8') if jsonl_path else None
+
+    def expect(self, run_name):
+        """Reserves the run's table position; call in config order as runs are started."""
+        if run_name not in self.lines:
+            self.lines[run_name] = None
+            self.order.append(run_name)
+
+    def add_run(self, run_name, rows, live=True):
+        """Adds a finished run's results_summary rows."""
+        self.expect(run_name)
+        items = self.items.setdefault(run_name, [])
+        items.extend(rows)
+        self.lines[run_name] = format_run_line(run_name, items)
+
+        self.runs_done += 1
+        if rows:
+            self.duration_total += rows[0].get('Duration', 0.0)
+            self.writes_skipped += rows[0].get('WritesSkipped', 0)
+        if len(rows) == 1 and rows[0].get('Error'):
+            self.exec_errors += 1
+        else:
+            self.tests_total += len(rows)
+            self.tests_passed += sum(1 for r in rows if r['Pass'])
+
+        if self._csv:
+            self._csv.writerows(rows)
+            self._csv_file.flush()
+        if self._jsonl_file:
+            self._jsonl_file.write(json.dumps({"run": run_name, "rows": rows}, default=str) + "\n")
+            self._jsonl_file.flush()
+        if live:
+            self.logger.info(self.progress_line())
+            self.logger.info(self.lines[run_name])
+
+    def progress_line(self):
+        avg = self.duration_total / self.runs_done if self.runs_done else 0.0
+        remaining = max(0, self.total_runs - self.runs_done)
+        return (f"[Summary] {self.runs_done}/{self.total_runs} runs | tests passed {self.tests_passed}/{self.tests_total}"
+                f" | exec errors {self.exec_errors} | avg run {avg:.2f} s | ETA ~{remaining * avg:.0f} s")
+
+    def print_table(self):
+        print(TABLE_HEADER)
+        print("-" * 180)
+        for run_name in self.order:
+            print(self.lines.get(run_name) or format_run_line(run_name, []))
+        reused = [run_name for run_name in self.order if any(r.get('Cached') for r in self.items.get(run_name, []))]
+        if reused:
+            print(f"Reused from the result cache, not measured in this batch ({len(reused)} runs): {', '.join(reused)}")
+        print("==================================================")
+
+    def close(self):
+        for f in (self._csv_file, self._jsonl_file):
+            if f:
+                f.close()
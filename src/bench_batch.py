@@ -0,0 +1,131 @@
+import io
+import os
+import json
+import argparse
+import logging
+import tempfile
+import threading
+import time
+import contextlib
+
+import dut_control_server
+from dut_control_server import start_server
+import batch_runner
+import instrument_backends
+from sim_bench import SimBench
+from tracing import tracer
+
+# Benchmark: representative batches against the simulated bench, one per
+# optimization scenario, reporting runs per hour (at real bench latency) and
+# where the time goes per stage.
+logger = logging.getLogger("BenchBatch")
+
+# common_settings per scenario, applied on top of the benchmark defaults
+SCENARIOS = [
+    ("baseline", {"scope_session": False, "project_templates": False, "dut_shadow": False,
+                  "force_full_config": True}),
+    ("session+templates", {"dut_shadow": False}),
+    ("+shadow", {}),
+    ("+framed", {"dut_framed": True}),
+    ("+pipeline", {"dut_framed": True, "pipeline": True}),
+]
+
+# Spans shown in the stage breakdown
+BREAKDOWN = ["stage.dut", "stage.measure", "stage.save", "stage.export", "scope.connect",
+             "scope.NewProject", "scope.OpenProject", "scope.configure", "scope.Run", "dut.write_registers"]
+
+def init_commands():
+    """Fixed register writes of the first run in batch_config.json (macros dropped)."""
+    path = os.path.join(os.path.dirname(__file__), '..', 'batch_config.json')
+    with open(path, 'r') as f:
+        run = json.load(f)["runs"][0]
+    return [cmd for cmd in run["dut_commands"] if cmd.startswith("write_register")]
+
+def make_config(work_dir, port, runs, tests, overrides):
+    common = {
+        "instrument_ip": "sim-scope",
+        "dut_server_ip": "127.0.0.1",
+        "dut_server_port": port,
+        "base_directory": "C:\\SimBench",
+        "default_test_ids": list(range(119041, 119041 + tests)),
+        "result_cache": False,
+        "journal_path": os.path.join(work_dir, "journal.jsonl"),
+        "results_db": os.path.join(work_dir, "results.db"),
+        "summary_csv": os.path.join(work_dir, "summary.csv"),
+        "summary_jsonl": os.path.join(work_dir, "summary.jsonl"),
+        "template_index": os.path.join(work_dir, "templates.json"),
+        "trace": True,
+        "trace_path": os.path.join(work_dir, "trace.json"),
+    }
+    common.update(overrides)
+    return {
+        "common_settings": common,
+        "sweep": {
+            "name": "Bench_EQ{eq}",
+            "project_name": "Bench_EQ{eq}",
+            "report_name": "Bench_EQ{eq}.pdf",
+            "init_commands": init_commands(),
+            "axes": {"eq": {"start": 0, "stop": runs - 1}, "sw": [2], "fg": [1]},
+        },
+    }
+
+def run_scenario(name, overrides, bench, port, runs, tests):
+    with tempfile.TemporaryDirectory() as work_dir:
+        config_path = os.path.join(work_dir, "batch.json")
+        with open(config_path, 'w') as f:
+            json.dump(make_config(work_dir, port, runs, tests, overrides), f)
+        bench.registers.clear()
+        bench.counts.clear()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            batch_runner.run_batch(config_path)
+        wall = time.perf_counter() - start
+    totals = {span_name: total for span_name, _, total, _, _, _ in tracer.percentile_table()}
+    return wall, totals
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch throughput benchmark against the simulated bench")
+    parser.add_argument("--port", type=int, default=13003)
+    parser.add_argument("--runs", type=int, default=6, help="Sweep points per batch")
+    parser.add_argument("--tests", type=int, default=5, help="Test IDs per run")
+    parser.add_argument("--scale", type=float, default=0.01,
+                        help="Latency scale (0.01 runs 100x faster than the real bench)")
+    parser.add_argument("--scenario", action="append", default=None, help="Only run these scenarios")
+    args = parser.parse_args()
+
+    # Batch runner logs every command; keep only warnings
+    logging.getLogger().setLevel(logging.WARNING)
+    dut_control_server.logger.setLevel(logging.WARNING)
+
+    bench = SimBench(scale=args.scale)
+    backend = bench.backend()
+    backend.drive_server(dut_control_server)
+    instrument_backends.select_backend(backend)
+    threading.Thread(target=start_server, kwargs={"host": '127.0.0.1', "port": args.port}, daemon=True).start()
+    time.sleep(0.5)
+
+    scenarios = [s for s in SCENARIOS if not args.scenario or s[0] in args.scenario]
+    results = []
+    for name, overrides in scenarios:
+        wall, totals = run_scenario(name, overrides, bench, args.port, args.runs, args.tests)
+        results.append((name, wall, totals))
+        print(f"{name}: {wall:.2f} s", flush=True)
+
+    # Times scaled back to real bench latency
+    print(f"\n{args.runs} runs x {args.tests} tests per batch, latency scale {args.scale}")
+    print(f"{'Scenario':<20} | {'Batch (s)':>9} | {'Per run (s)':>11} | {'Runs/hour':>9} | {'Speedup':>7}")
+    print("-" * 70)
+    baseline = results[0][1] if results else 0
+    for name, wall, _ in results:
+        real = wall / args.scale
+        print(f"{name:<20} | {real:>9.0f} | {real / args.runs:>11.1f} | {args.runs / real * 3600:>9.1f} | "
+              f"{baseline / wall:>6.2f}x")
+
+    print(f"\nStage breakdown (s at real latency, summed over the batch):")
+    print(f"{'Span':<22} | " + " | ".join(f"{name[:12]:>12}" for name, _, _ in results))
+    for span_name in BREAKDOWN:
+        print(f"{span_name:<22} | " + " | ".join(f"{totals.get(span_name, 0.0) / args.scale:>12.1f}"
+                                                 for _, _, totals in results))
+
+if __name__ == "__main__":
+    main()
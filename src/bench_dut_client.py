@@ -0,0 +1,80 @@
+import argparse
+import logging
+import statistics
+import threading
+import time
+
+import dut_control_server
+from dut_control_server import start_server
+from dut_control_client import DutControlClient
+
+# Benchmark: per-command latency of one-shot, persistent (pooled), framed and
+# pipelined DUT client modes
+# against the local dut_control_server with the mock I2C driver.
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger("BenchDutClient")
+
+def run_server(port):
+    start_server(host='127.0.0.1', port=port)
+
+def measure(client, count):
+    latencies = []
+    for i in range(count):
+        t0 = time.perf_counter()
+        resp = client.write_register(0x7c, 0x16, i & 0xFF)
+        latencies.append(time.perf_counter() - t0)
+        if resp != "OK":
+            logger.error(f"Unexpected response: {resp}")
+    return latencies
+
+def measure_pipelined(client, count):
+    # Latency per command is amortized: all frames are streamed before any reply is awaited
+    commands = [f"write 7c 16 {i & 0xFF:02x}" for i in range(count)]
+    t0 = time.perf_counter()
+    responses = client.send_commands(commands)
+    elapsed = time.perf_counter() - t0
+    if any(r != "OK" for r in responses):
+        logger.error("Unexpected response in pipelined batch")
+    return [elapsed / count] * count
+
+def report(label, latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{label:<12} | {len(latencies):>6} | {statistics.mean(latencies) * 1000:>9.3f} | "
+          f"{statistics.median(latencies) * 1000:>9.3f} | {p95 * 1000:>9.3f} | {sum(latencies):>8.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="DUT client per-command latency benchmark")
+    parser.add_argument("--port", type=int, default=13002)
+    parser.add_argument("--count", type=int, default=1000, help="Commands per mode")
+    args = parser.parse_args()
+
+    # Silence per-command INFO logging of the server and the client
+    dut_control_server.logger.setLevel(logging.WARNING)
+    threading.Thread(target=run_server, args=(args.port,), daemon=True).start()
+    time.sleep(0.5)
+
+    quiet = logging.getLogger("BenchDutClient.client")
+    quiet.setLevel(logging.WARNING)
+
+    one_shot = DutControlClient('127.0.0.1', args.port, logger=quiet)
+    pooled = DutControlClient('127.0.0.1', args.port, logger=quiet, persistent=True)
+    framed = DutControlClient('127.0.0.1', args.port, logger=quiet, framed=True)
+
+    # Warm up both paths
+    measure(one_shot, 10)
+    measure(pooled, 10)
+    measure(framed, 10)
+
+    print(f"{'Mode':<12} | {'Count':>6} | {'Mean (ms)':>9} | {'p50 (ms)':>9} | {'p95 (ms)':>9} | {'Total (s)':>8}")
+    print("-" * 70)
+    report("one-shot", measure(one_shot, args.count))
+    report("persistent", measure(pooled, args.count))
+    report("framed", measure(framed, args.count))
+    report("pipelined", measure_pipelined(framed, args.count))
+    print(f"\nPersistent connections opened: {pooled.pool.connects}")
+    pooled.close()
+    framed.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import time
+import logging
+import statistics
+
+# Used until the results store has timings of this kind of bench
+DEFAULT_STAGE_SECONDS = {"dut": 5.0, "save": 10.0, "export": 15.0}
+DEFAULT_MEASURE_BASE = 30.0
+DEFAULT_TEST_SECONDS = 60.0
+STAGES = ("dut", "measure", "save", "export")
+
+def backend_group(name):
+    """Timings of the real scope ("auto"/"dotnet", older rows: None) never mix with simulated ones."""
+    return "scope" if name in (None, "auto", "dotnet") else name
+
+
+class DurationEstimator:
+    """
+    Predicts run and batch durations from the stage timings the results
+    store keeps of earlier batches. dut/save/export take the median of their
+    history. The measure stage is modelled as a fixed part (project load,
+    SetConfig, run start) plus one cost per test ID: the fixed part is the
+    intercept of measure time over the number of tests, the cost of a test
+    ID its runs' remaining time averaged over the tests they selected. A
+    test set measured before is predicted by its own median.
+    Args:
+        default_test_ids (list): Tests of runs without "test_ids".
+        backend (str): Scope backend of the batch; only history of the same
+                       kind of bench is used.
+    """
+    def __init__(self, default_test_ids=None, backend=None, logger=None):
+        self.logger = logger if logger else logging.getLogger("DurationEstimator")
+        self.default_test_ids = list(default_test_ids or [])
+        self.group = backend_group(backend)
+        self.stage_seconds = dict(DEFAULT_STAGE_SECONDS)
+        self.measure_base = DEFAULT_MEASURE_BASE
+        self.default_test_seconds = DEFAULT_TEST_SECONDS
+        self.test_seconds = {}
+        self.test_set_seconds = {}
+        self.samples = 0
+
+    @classmethod
+    def from_store(cls, store, default_test_ids=None, backend=None, limit=5000, logger=None):
+        estimator = cls(default_test_ids, backend=backend, logger=logger)
+        estimator.learn(store.timing_history(limit=limit))
+        return estimator
+
+    def learn(self, history):
+        """
+        Fits the model to [{"test_ids", "backend", "stages": {stage: s}}]
+        (see ResultsStore.timing_history).
+        """
+        history = [h for h in history if backend_group(h.get("backend")) == self.group]
+        self.samples = len(history)
+        for stage in DEFAULT_STAGE_SECONDS:
+            times = [h["stages"][stage] for h in history if stage in h["stages"]]
+            if times:
+                self.stage_seconds[stage] = statistics.median(times)
+
+        measured = [(tuple(h["test_ids"]), h["stages"]["measure"]) for h in history
+                    if "measure" in h["stages"] and h.get("test_ids")]
+        if not measured:
+            self.logger.info(f"No measure timings of this bench in the results store, using defaults")
+            return
+        by_set = {}
+        for test_ids, seconds in measured:
+            by_set.setdefault(frozenset(test_ids), []).append(seconds)
+        self.test_set_seconds = {key: statistics.median(times) for key, times in by_set.items()}
+
+        counts = [len(set(test_ids)) for test_ids, _ in measured]
+        times = [seconds for _, seconds in measured]
+        if len(set(counts)) > 1:
+            slope, intercept = _linear_fit(counts, times)
+            self.measure_base = max(0.0, intercept) if slope > 0 else 0.0
+        else:
+            # One test count only: the fixed part cannot be separated
+            self.measure_base = 0.0
+        shares = {}
+        for test_ids, seconds in measured:
+            per_test = max(0.0, seconds - self.measure_base) / len(set(test_ids))
+            for test_id in set(test_ids):
+                shares.setdefault(test_id, []).append(per_test)
+        self.test_seconds = {test_id: statistics.mean(values) for test_id, values in shares.items()}
+        self.default_test_seconds = statistics.median(self.test_seconds.values())
+        self.logger.info(f"Duration model from {self.samples} runs: measure {self.measure_base:.1f} s + "
+                         f"{len(self.test_seconds)} learned test costs")
+
+    def test_cost(self, test_id):
+        return self.test_seconds.get(test_id, self.default_test_seconds)
+
+    def measure_seconds(self, test_ids):
+        known = self.test_set_seconds.get(frozenset(test_ids))
+        if known is not None:
+            return known
+        return self.measure_base + sum(self.test_cost(t) for t in set(test_ids))
+
+    def estimate_run(self, run):
+        """{"dut", "measure", "save", "export", "total"} seconds of one run, measured (no cache hit)."""
+        estimate = dict(self.stage_seconds)
+        estimate["measure"] = self.measure_seconds(run.get("test_ids", self.default_test_ids))
+        estimate["total"] = sum(estimate[stage] for stage in STAGES)
+        return estimate
+
+    def estimate(self, runs, pipeline=False, parallelism=1):
+        """
+        Batch estimate: {"runs", "stages": {stage: s}, "serial", "total"}.
+        The pipeline hides each run's DUT configuration behind the previous
+        run's save and export; several benches divide the serial time.
+        """
+        stages = dict.fromkeys(STAGES, 0.0)
+        serial = 0.0
+        previous = None
+        count = 0
+        for run in runs:
+            run_estimate = self.estimate_run(run)
+            count += 1
+            for stage in STAGES:
+                stages[stage] += run_estimate[stage]
+            serial += run_estimate["total"]
+            if pipeline and previous:
+                serial -= min(run_estimate["dut"], previous["save"] + previous["export"])
+            previous = run_estimate
+        return {"runs": count, "stages": stages, "serial": serial, "total": serial / max(1, parallelism)}
+
+    def fit_budget(self, runs, budget_seconds, test_priority=None, parallelism=1):
+        """
+        Picks the runs that fit in budget_seconds. Runs are taken by their
+        "priority" (higher first, then config order); a run that does not fit
+        whole keeps only its most important test IDs (test_priority order,
+        then its own order) if at least one fits. Later, cheaper runs may
+        still fill the remaining time.
+        Returns (selected runs in config order, skipped runs, trimmed run names).
+        """
+        runs = list(runs)
+        rank = {test_id: i for i, test_id in enumerate(test_priority or [])}
+        remaining = budget_seconds * max(1, parallelism)
+        chosen, trimmed = {}, []
+        order = sorted(range(len(runs)), key=lambda i: -runs[i].get("priority", 0))
+        for index in order:
+            run = runs[index]
+            cost = self.estimate_run(run)
+            if cost["total"] <= remaining:
+                chosen[index] = run
+                remaining -= cost["total"]
+                continue
+            test_ids = sorted(run.get("test_ids", self.default_test_ids),
+                              key=lambda t: rank.get(t, len(rank)))
+            overhead = cost["total"] - cost["measure"] + self.measure_base
+            kept = []
+            for test_id in test_ids:
+                if overhead + sum(self.test_cost(t) for t in kept + [test_id]) > remaining:
+                    break
+                kept.append(test_id)
+            if kept:
+                chosen[index] = dict(run, test_ids=kept)
+                remaining -= self.estimate_run(chosen[index])["total"]
+                trimmed.append(run["name"])
+                self.logger.info(f"[{run['name']}] Trimmed to tests {kept} to fit the time budget")
+        selected = [chosen[i] for i in sorted(chosen)]
+        skipped = [run for i, run in enumerate(runs) if i not in chosen]
+        return selected, skipped, trimmed
+
+    def report(self, estimate, started=None):
+        """Dry-run lines for an estimate() result."""
+        started = started if started is not None else time.time()
+        lines = [f"Estimated batch duration: {_hours(estimate['total'])} for {estimate['runs']} runs "
+                 f"(finishing ~{time.strftime('%Y-%m-%d %H:%M', time.localtime(started + estimate['total']))})",
+                 f"{'Stage':<10} | {'Total':>10} | {'Per run (s)':>11}"]
+        for stage in STAGES:
+            per_run = estimate["stages"][stage] / estimate["runs"] if estimate["runs"] else 0.0
+            lines.append(f"{stage:<10} | {_hours(estimate['stages'][stage]):>10} | {per_run:>11.1f}")
+        if self.samples:
+            lines.append(f"Based on {self.samples} recorded runs; cache hits would shorten the batch")
+        else:
+            lines.append("No timing history for this bench yet: default stage times, treat as a rough guess")
+        if self.test_seconds:
+            lines.append(f"{'TestID':>8} | {'Seconds':>8}")
+            for test_id, seconds in sorted(self.test_seconds.items()):
+                lines.append(f"{test_id:>8} | {seconds:>8.1f}")
+        return lines
+
+
+def _linear_fit(xs, ys):
+    """Least squares y = slope * x + intercept."""
+    mean_x, mean_y = statistics.mean(xs), statistics.mean(ys)
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+    return slope, mean_y - slope * mean_x
+
+def _hours(seconds):
+    hours, rest = divmod(int(round(seconds)), 3600)
+    return f"{hours}h{rest // 60:02d}m{rest % 60:02d}s"
@@ -1,17 +1,345 @@
 import socket
+import select
 import logging
+import queue
+import threading
+import itertools
+from concurrent.futures import Future
+
+from register_shadow import RegisterShadow
+from tracing import traced
+
+# Must match FRAME_PREFIX in dut_control_server
+FRAME_PREFIX = "@"
+# Items per "wmulti" request; keeps one request under the server's 1024 byte
+# read size in the one-shot text protocol.
+WMULTI_MAX_ITEMS = 96
+
+def parse_wmulti_response(response, count):
+    """
+    Parses a wmulti reply ("OK 3/3 OK OK OK") into a list of per-item
+    statuses. Returns [None] * count if the reply is missing or malformed.
+    """
+    if not response:
+        return [None] * count
+    parts = response.split()
+    statuses = parts[2:]
+    if len(parts) < 2 or parts[0] not in ("OK", "Fail") or len(statuses) != count:
+        return [None] * count
+    return statuses
+
+def _register_key(slave_addr, reg_offset, value):
+    """Normalizes int or hex string arguments to an (int, int, int) triple."""
+    return tuple(x if isinstance(x, int) else int(x, 16) for x in (slave_addr, reg_offset, value))
+
+class DutConnectionPool:
+    """
+    Small pool of long-lived TCP connections to the DUT control server.
+    The server keeps serving a connection until the client closes it, so one
+    socket can carry any number of commands instead of one handshake each.
+    """
+    def __init__(self, server_ip, server_port, size=2, timeout=5, logger=None):
+        self.server_ip = server_ip
+        self.server_port = server_port
+        self.size = size
+        self.timeout = timeout
+        self.logger = logger if logger else logging.getLogger("DutConnectionPool")
+        self._idle = queue.LifoQueue()
+        self.connects = 0
+        self.reconnects = 0
+
+    @traced("dut.connect")
+    def _connect(self):
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.settimeout(self.timeout)
+        try:
+            s.connect((self.server_ip, self.server_port))
+        except Exception:
+            s.close()
+            raise
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.connects += 1
+        return s
+
+    @staticmethod
+    def is_healthy(sock):
+        """
+        Health check for an idle socket. An idle connection must have nothing
+        to read: readable means either the server closed it (EOF) or a stale
+        reply is still buffered, and both make the socket unusable.
+        """
+        try:
+            readable, _, errored = select.select([sock], [], [sock], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable and not errored
+
+    def acquire(self):
+        """
+        Returns (socket, reused). Idle sockets are health checked first and
+        discarded if stale; a new connection is opened when none is usable.
+        """
+        while True:
+            try:
+                sock = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if self.is_healthy(sock):
+                return sock, True
+            self.logger.debug("Discarding stale DUT connection.")
+            self.discard(sock)
+
+        return self._connect(), False
+
+    def release(self, sock):
+        """Returns a socket to the pool, closing it if the pool is full."""
+        if self._idle.qsize() >= self.size:
+            self.discard(sock)
+        else:
+            self._idle.put(sock)
+
+    def discard(self, sock):
+        """Closes a socket that must not go back into the pool."""
+        try:
+            sock.close()
+        except OSError:
+            pass
+
+    def close(self):
+        """Closes every idle connection."""
+        while True:
+            try:
+                sock = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self.discard(sock)
+
+
+class FramedConnection:
+    """
+    One TCP connection speaking the framed protocol ("@<id> <command>\\n").
+    Requests are written without waiting for replies; a reader thread matches
+    each reply to its request ID and completes the corresponding Future, so
+    many commands can be in flight at once.
+    """
+    def __init__(self, server_ip, server_port, timeout=5, logger=None):
+        self.logger = logger if logger else logging.getLogger("FramedConnection")
+        self._sock = socket.create_connection((server_ip, server_port), timeout=timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # The reader blocks until replies arrive; per-request timeouts are
+        # enforced by the callers waiting on their futures.
+        self._sock.settimeout(None)
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._send_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self.closed = False
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    def submit(self, command):
+        """Sends one command and returns a Future resolving to the reply string."""
+        return self.submit_many([command])[0]
+
+    def submit_many(self, commands):
+        """
+        Sends several commands in a single write and returns one Future per
+        command, in order.
+        """
+        futures = [Future() for _ in commands]
+        if self.closed:
+            for future in futures:
+                future.set_exception(ConnectionError("Framed connection is closed"))
+            return futures
+        frames = []
+        with self._pending_lock:
+            for command, future in zip(commands, futures):
+                req_id = str(next(self._ids))
+                self._pending[req_id] = future
+                frames.append(f"{FRAME_PREFIX}{req_id} {command}\n")
+        try:
+            with self._send_lock:
+                self._sock.sendall("".join(frames).encode('utf-8'))
+        except OSError as e:
+            self._fail_pending(e)
+        return futures
+
+    def _read_loop(self):
+        buffer = b""
+        try:
+            while True:
+                data = self._sock.recv(4096)
+                if not data:
+                    raise ConnectionResetError("Connection closed by server")
+                buffer += data
+                while b"\n" in buffer:
+                    raw, buffer = buffer.split(b"\n", 1)
+                    line = raw.decode('utf-8').strip()
+                    if not line.startswith(FRAME_PREFIX):
+                        self.logger.warning(f"Ignoring unframed reply: {line}")
+                        continue
+                    req_id, _, response = line[len(FRAME_PREFIX):].partition(" ")
+                    with self._pending_lock:
+                        future = self._pending.pop(req_id, None)
+                    if future:
+                        future.set_result(response)
+                    else:
+                        self.logger.warning(f"Reply for unknown request ID {req_id}: {response}")
+        except OSError as e:
+            self._fail_pending(e)
+
+    def _fail_pending(self, exc):
+        self.closed = True
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(exc)
+
+    def close(self):
+        self.closed = True
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+
 
 class DutControlClient:
-    def __init__(self, server_ip, server_port, logger=None):
+    def __init__(self, server_ip, server_port, logger=None, persistent=False, pool_size=2, timeout=5, framed=False,
+                 shadow=False):
+        """
+        Args:
+            persistent (bool): Keep connections open in a DutConnectionPool and
+                               reuse them for every command instead of opening
+                               a new socket per command.
+            pool_size (int): Maximum number of idle pooled connections.
+            timeout (float): Socket timeout in seconds.
+            framed (bool): Use the framed protocol over one long-lived
+                           connection. Enables pipelining via submit_command()
+                           and send_commands(). Requires a framing-aware server.
+            shadow (bool): Keep a RegisterShadow of known register values and
+                           skip writes whose value is already in place.
+        """
         self.server_ip = server_ip
         self.server_port = server_port
         self.logger = logger if logger else logging.getLogger("DutControlClient")
+        self.timeout = timeout
+        self.framed = framed
+        self._framed_conn = None
+        self._framed_lock = threading.Lock()
+        self.pool = None
+        if persistent and not framed:
+            self.pool = DutConnectionPool(server_ip, server_port, size=pool_size, timeout=timeout, logger=self.logger)
+        self.shadow = RegisterShadow(logger=self.logger) if shadow else None
+
+    def close(self):
+        """Closes pooled/framed connections (no-op in one-shot mode)."""
+        if self.pool:
+            self.pool.close()
+        if self._framed_conn:
+            self._framed_conn.close()
+            self._framed_conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _send_pooled(self, payload):
+        """
+        Sends over a pooled connection. If a reused connection turns out to be
+        dead (server restarted, idle timeout), reconnect once transparently.
+        """
+        sock, reused = self.pool.acquire()
+        try:
+            sock.sendall(payload)
+            data = sock.recv(1024)
+            if not data:
+                raise ConnectionResetError("Connection closed by server")
+        except (ConnectionError, socket.timeout, OSError) as e:
+            self.pool.discard(sock)
+            if not reused:
+                raise
+            self.logger.warning(f"Pooled DUT connection failed ({e}), reconnecting...")
+            self.pool.reconnects += 1
+            sock, _ = self.pool.acquire()
+            try:
+                sock.sendall(payload)
+                data = sock.recv(1024)
+                if not data:
+                    raise ConnectionResetError("Connection closed by server")
+            except Exception:
+                self.pool.discard(sock)
+                raise
+        self.pool.release(sock)
+        return data.decode('utf-8')
+
+    def _get_framed_conn(self):
+        with self._framed_lock:
+            if self._framed_conn is None or self._framed_conn.closed:
+                self._framed_conn = FramedConnection(self.server_ip, self.server_port, timeout=self.timeout, logger=self.logger)
+            return self._framed_conn
+
+    def submit_command(self, command):
+        """
+        Pipelined send (framed mode only). Returns a concurrent.futures.Future
+        resolving to the response string; does not wait for the reply.
+        """
+        if not self.framed:
+            raise RuntimeError("submit_command requires framed=True")
+        if self.shadow:
+            self.shadow.invalidate_for_command(command)
+        try:
+            return self._get_framed_conn().submit(command)
+        except OSError as e:
+            future = Future()
+            future.set_exception(e)
+            return future
+
+    @traced("dut.commands")
+    def send_commands(self, commands):
+        """
+        Sends a list of commands and returns their responses in order
+        (None for a failed command). In framed mode all commands are streamed
+        before the first reply is awaited; otherwise they are sent one by one.
+        """
+        if not self.framed:
+            return [self.send_command(cmd) for cmd in commands]
+
+        if self.shadow:
+            for cmd in commands:
+                self.shadow.invalidate_for_command(cmd)
+        try:
+            futures = self._get_framed_conn().submit_many(commands)
+        except OSError as e:
+            self.logger.error(f"Error sending commands: {e}")
+            return [None] * len(commands)
+        responses = []
+        for cmd, future in zip(commands, futures):
+            try:
+                responses.append(future.result(timeout=self.timeout))
+            except Exception as e:
+                self.logger.error(f"Error sending command '{cmd}': {e}")
+                responses.append(None)
+        return responses
 
+    @traced("dut.command")
     def send_command(self, command):
         """Sends a raw string command to the server."""
+        if self.shadow:
+            # The command may change registers the shadow believes it knows
+            self.shadow.invalidate_for_command(command)
         try:
+            if self.framed:
+                return self.submit_command(command).result(timeout=self.timeout)
+
+            if self.pool:
+                return self._send_pooled(command.encode('utf-8'))
+
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.settimeout(5) # 5 seconds timeout
+                s.settimeout(self.timeout)
                 #self.logger.debug(f"Connecting to {self.server_ip}:{self.server_port}...")
                 s.connect((self.server_ip, self.server_port))
                 
@@ -37,6 +365,13 @@ class DutControlClient:
         Format: "write <slave_addr> <reg_offset> <value>"
         All inputs should be integers or hex strings.
         """
+        if self.shadow:
+            key = _register_key(slave_addr, reg_offset, value)
+            if self.shadow.is_current(*key):
+                self.shadow.skipped += 1
+                self.logger.info(f"Skipping Register write: {key[0]:02x} {key[1]:02x} {key[2]:02x} (value already in place)")
+                return "OK"
+
         # Ensure format is 2-digit hex
         if isinstance(slave_addr, int): slave_addr = f"{slave_addr:02x}"
         if isinstance(reg_offset, int): reg_offset = f"{reg_offset:02x}"
@@ -44,8 +379,68 @@ class DutControlClient:
         
         command = f"write {slave_addr} {reg_offset} {value}"
         self.logger.info(f"Writing Register: {command}")
-        return self.send_command(command)
+        response = self.send_command(command)
+        if self.shadow:
+            self.shadow.sent += 1
+            if response == "OK":
+                self.shadow.update(*key)
+        return response
+
+    @traced("dut.write_registers")
+    def write_registers(self, writes):
+        """
+        Writes a list of (slave_addr, reg_offset, value) triples with the
+        batched "wmulti" command, one round trip per WMULTI_MAX_ITEMS items.
+        Falls back to single writes if the server does not know "wmulti".
+        Returns a list of per-item statuses ("OK", "Fail", "Err" or None).
+        """
+        writes = list(writes)
+        statuses = [None] * len(writes)
+        pending = list(range(len(writes)))
+        if self.shadow:
+            pending = []
+            for i, write in enumerate(writes):
+                if self.shadow.is_current(*_register_key(*write)):
+                    statuses[i] = "OK"
+                    self.shadow.skipped += 1
+                else:
+                    pending.append(i)
+            if len(pending) < len(writes):
+                self.logger.info(f"Skipping {len(writes) - len(pending)} register writes (values already in place)")
+            if not pending:
+                return statuses
+
+        items = []
+        for slave_addr, reg_offset, value in (writes[i] for i in pending):
+            if isinstance(slave_addr, int): slave_addr = f"{slave_addr:02x}"
+            if isinstance(reg_offset, int): reg_offset = f"{reg_offset:02x}"
+            if isinstance(value, int): value = f"{value:02x}"
+            items.append(f"{slave_addr}:{reg_offset}:{value}")
+
+        chunks = [items[i:i + WMULTI_MAX_ITEMS] for i in range(0, len(items), WMULTI_MAX_ITEMS)]
+        commands = ["wmulti " + " ".join(chunk) for chunk in chunks]
+        self.logger.info(f"Writing {len(items)} registers in {len(commands)} request(s)")
+        responses = self.send_commands(commands)
+
+        sent_statuses = []
+        for chunk, response in zip(chunks, responses):
+            if response and response.startswith("Error: Unknown command"):
+                self.logger.warning("Server does not support 'wmulti', falling back to single writes.")
+                for item in chunk:
+                    resp = self.send_command("write " + item.replace(':', ' '))
+                    sent_statuses.append("OK" if resp == "OK" else ("Fail" if resp else None))
+                continue
+            sent_statuses.extend(parse_wmulti_response(response, len(chunk)))
 
+        for i, status in zip(pending, sent_statuses):
+            statuses[i] = status
+            if self.shadow:
+                self.shadow.sent += 1
+                if status == "OK":
+                    self.shadow.update(*_register_key(*writes[i]))
+        return statuses
+
+    @traced("dut.read")
     def read_register(self, slave_addr, reg_offset):
         """
         Sends a read command.
@@ -56,7 +451,58 @@ class DutControlClient:
         
         command = f"read {slave_addr} {reg_offset}"
         self.logger.info(f"Reading Register: {command}")
-        return self.send_command(command)
+        response = self.send_command(command)
+        if self.shadow and response and response.startswith("0x"):
+            try:
+                self.shadow.update(*_register_key(slave_addr, reg_offset, response))
+            except ValueError:
+                pass
+        return response
+
+    def get_register_value(self, slave_addr, reg_offset):
+        """
+        Current register value as an int: from the shadow when known,
+        otherwise read from the DUT. Returns None if it cannot be read.
+        """
+        if self.shadow:
+            key = _register_key(slave_addr, reg_offset, 0)[:2]
+            cached = self.shadow.get(*key)
+            if cached is not None:
+                return cached
+        response = self.read_register(slave_addr, reg_offset)
+        if response and response.startswith("0x"):
+            try:
+                return int(response, 16)
+            except ValueError:
+                pass
+        return None
+
+    def invalidate_shadow(self, slave_addr=None, reg_offset=None):
+        """Forgets shadowed values (all, one slave, or one register)."""
+        if self.shadow:
+            if slave_addr is not None and isinstance(slave_addr, str): slave_addr = int(slave_addr, 16)
+            if reg_offset is not None and isinstance(reg_offset, str): reg_offset = int(reg_offset, 16)
+            self.shadow.invalidate(slave_addr, reg_offset)
+
+    def resync_shadow(self, registers=None):
+        """
+        Re-reads registers from the DUT into the shadow. registers is a list
+        of (slave_addr, reg_offset); defaults to every shadowed register.
+        Returns the number of registers whose cached value was stale.
+        """
+        if not self.shadow:
+            return 0
+        if registers is None:
+            registers = list(self.shadow.snapshot().keys())
+        stale = 0
+        for slave_addr, reg_offset in registers:
+            key = _register_key(slave_addr, reg_offset, 0)[:2]
+            cached = self.shadow.get(*key)
+            self.shadow.invalidate(*key)
+            self.read_register(*key)
+            if cached is not None and self.shadow.get(*key) != cached:
+                stale += 1
+        return stale
 
     def set_dp_mode(self):
         """
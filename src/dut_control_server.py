@@ -25,21 +25,84 @@ class MockI2CDriver:
         return 0x00 # Mock return value
 
 driver = MockI2CDriver()
+# One I2C bus: driver calls from concurrent client threads must not interleave
+bus_lock = threading.Lock()
 
 # --- SERVER LOGIC ---
 
+# Framed protocol: "@<id> <command>\n" -> "@<id> <response>\n".
+# A connection whose first byte is FRAME_PREFIX is framed for its lifetime;
+# any other connection keeps the legacy one-recv-one-command text protocol.
+FRAME_PREFIX = "@"
+MAX_FRAME_SIZE = 65536
+
+def parse_frame(line):
+    """
+    Splits a frame line into (request_id, command).
+    Returns (None, None) if the line is not a valid frame.
+    """
+    if not line.startswith(FRAME_PREFIX):
+        return None, None
+    header, _, command = line[len(FRAME_PREFIX):].partition(" ")
+    if not header:
+        return None, None
+    return header, command.strip()
+
+def format_frame(req_id, response):
+    """Builds a reply frame. Responses must stay on one line."""
+    response = " ".join(str(response).splitlines())
+    return f"{FRAME_PREFIX}{req_id} {response}\n"
+
+def process_frames(buffer):
+    """
+    Processes every complete frame in buffer.
+    Returns (reply_bytes, remaining_buffer).
+    """
+    replies = []
+    while b"\n" in buffer:
+        raw, buffer = buffer.split(b"\n", 1)
+        line = raw.decode('utf-8').strip()
+        if not line:
+            continue
+        req_id, command = parse_frame(line)
+        if req_id is None:
+            replies.append(format_frame("0", f"Error: Malformed frame '{line}'"))
+            continue
+        logger.info(f"Received [{req_id}]: {command}")
+        with bus_lock:
+            response = process_command(command)
+        replies.append(format_frame(req_id, response))
+    return "".join(replies).encode('utf-8'), buffer
+
 def handle_client(conn, addr):
     logger.info(f"Connected by {addr}")
+    framed = None
+    buffer = b""
     with conn:
         while True:
-            data = conn.recv(1024)
+            data = conn.recv(4096 if framed else 1024)
             if not data:
                 break
+
+            if framed is None:
+                framed = data.startswith(FRAME_PREFIX.encode('utf-8'))
+
+            if framed:
+                # Frames may be split across or merged within TCP segments
+                buffer += data
+                reply, buffer = process_frames(buffer)
+                if reply:
+                    conn.sendall(reply)
+                if len(buffer) > MAX_FRAME_SIZE:
+                    logger.error(f"Frame too large from {addr}, closing connection")
+                    break
+                continue
             
             command = data.decode('utf-8').strip()
             logger.info(f"Received: {command}")
             
-            response = process_command(command)
+            with bus_lock:
+                response = process_command(command)
             conn.sendall(response.encode('utf-8'))
     logger.info(f"Connection closed by {addr}")
 
@@ -49,6 +112,9 @@ def process_command(cmd_str):
     Supported:
     - write <addr_hex> <off_hex> <val_hex>
     - read <addr_hex> <off_hex>
+    - wmulti <addr_hex>:<off_hex>:<val_hex> [...]
+      Batched write. Reply: "<OK|Fail> <ok>/<total> <status> ..." with one
+      status (OK, Fail or Err for a malformed item) per item, in order.
     """
     try:
         parts = cmd_str.split()
@@ -65,6 +131,21 @@ def process_command(cmd_str):
             success = driver.write(addr, reg, val)
             return "OK" if success else "Fail"
             
+        elif op == "wmulti":
+            # wmulti 7c:4b:3a 7c:37:3a ...
+            if len(parts) < 2: return "Error: Usage 'wmulti <addr>:<reg>:<val> ...'"
+            statuses = []
+            for item in parts[1:]:
+                try:
+                    addr, reg, val = (int(x, 16) for x in item.split(':'))
+                except ValueError:
+                    statuses.append("Err")
+                    continue
+                statuses.append("OK" if driver.write(addr, reg, val) else "Fail")
+            ok_count = statuses.count("OK")
+            overall = "OK" if ok_count == len(statuses) else "Fail"
+            return f"{overall} {ok_count}/{len(statuses)} " + " ".join(statuses)
+
         elif op == "read":
             # read 7c 02
             if len(parts) != 3: return "Error: Usage 'read <addr> <reg>'"
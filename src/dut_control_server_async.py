@@ -0,0 +1,239 @@
+import asyncio
+import argparse
+import collections
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import dut_control_server
+from dut_control_server import logger, parse_frame, format_frame, FRAME_PREFIX, MAX_FRAME_SIZE
+
+# asyncio variant of dut_control_server. Speaks the same one-shot text and
+# framed protocols, but all I2C bus access goes through a single worker:
+#   client connections -> per-client bounded queues -> round-robin scheduler
+#   -> one executor thread calling dut_control_server.process_command
+
+class I2CScheduler:
+    """
+    Serializes bus access onto a single I2C worker thread.
+    Each client has its own bounded queue; the scheduler takes one request
+    per client in turn (round robin) so a client streaming hundreds of writes
+    cannot starve the others. A full queue makes submit() wait, which stops
+    that connection from being read (backpressure down to TCP).
+    """
+    def __init__(self, queue_depth=32, handler=None):
+        self.queue_depth = queue_depth
+        self.handler = handler if handler else dut_control_server.process_command
+        self._queues = {}
+        self._ready = collections.deque()
+        self._ready_set = set()
+        self._wakeup = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="i2c-worker")
+        self._task = None
+        self.processed = 0
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+    def register(self, client_id):
+        self._queues[client_id] = asyncio.Queue(maxsize=self.queue_depth)
+
+    def unregister(self, client_id):
+        queue = self._queues.pop(client_id, None)
+        # Requests of a vanished client are still executed (they may be
+        # writes already acknowledged to the TCP stack), nobody awaits them.
+        if queue and not queue.empty():
+            self._queues[(client_id, "orphan")] = queue
+            self._mark_ready((client_id, "orphan"))
+
+    async def submit(self, client_id, command):
+        """Queues a command. Returns a future resolving to the response."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queues[client_id].put((command, future))
+        self._mark_ready(client_id)
+        return future
+
+    def _mark_ready(self, client_id):
+        if client_id not in self._ready_set:
+            self._ready_set.add(client_id)
+            self._ready.append(client_id)
+        self._wakeup.set()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._ready:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            client_id = self._ready.popleft()
+            self._ready_set.discard(client_id)
+            queue = self._queues.get(client_id)
+            if queue is None or queue.empty():
+                continue
+            command, future = queue.get_nowait()
+            # Back of the line if it has more work: fair per-client interleaving
+            if not queue.empty():
+                self._mark_ready(client_id)
+            elif isinstance(client_id, tuple):
+                self._queues.pop(client_id, None)
+
+            try:
+                response = await loop.run_in_executor(self._executor, self.handler, command)
+            except Exception as e:
+                logger.error(f"Processing error: {e}")
+                response = f"Error: {e}"
+            self.processed += 1
+            if not future.done():
+                future.set_result(response)
+
+
+class AsyncDutControlServer:
+    def __init__(self, host='0.0.0.0', port=13000, max_clients=64, queue_depth=32, handler=None):
+        """
+        Args:
+            max_clients (int): Connections served concurrently. Further
+                               connections are accepted but wait for a slot.
+            queue_depth (int): Pending requests per client before the server
+                               stops reading from that client (backpressure).
+            handler (callable): Command processor, defaults to
+                                dut_control_server.process_command.
+        """
+        self.host = host
+        self.port = port
+        self.max_clients = max_clients
+        self.scheduler = I2CScheduler(queue_depth=queue_depth, handler=handler)
+        self._slots = None
+        self._server = None
+        self._ids = itertools.count(1)
+        self.active_clients = 0
+        self.waiting_clients = 0
+
+    async def start(self):
+        self._slots = asyncio.Semaphore(self.max_clients)
+        self.scheduler.start()
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port, backlog=4096)
+        # Port 0 binds an ephemeral port; report the real one
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Async server listening on {self.host}:{self.port} (max clients: {self.max_clients})")
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.scheduler.stop()
+
+    async def _handle_client(self, reader, writer):
+        addr = writer.get_extra_info('peername')
+        self.waiting_clients += 1
+        async with self._slots:
+            self.waiting_clients -= 1
+            self.active_clients += 1
+            client_id = next(self._ids)
+            self.scheduler.register(client_id)
+            logger.info(f"Connected by {addr}")
+            try:
+                first = await reader.read(4096)
+                if first.startswith(FRAME_PREFIX.encode('utf-8')):
+                    await self._serve_framed(client_id, first, reader, writer)
+                else:
+                    await self._serve_legacy(client_id, first, reader, writer)
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                logger.info(f"Connection error from {addr}: {e}")
+            finally:
+                self.scheduler.unregister(client_id)
+                self.active_clients -= 1
+                writer.close()
+                try:
+                    await writer.wait_closed()
+                except ConnectionError:
+                    pass
+                logger.info(f"Connection closed by {addr}")
+
+    async def _serve_legacy(self, client_id, data, reader, writer):
+        # One read is one command, same as dut_control_server.handle_client
+        while data:
+            command = data.decode('utf-8').strip()
+            logger.info(f"Received: {command}")
+            future = await self.scheduler.submit(client_id, command)
+            writer.write((await future).encode('utf-8'))
+            await writer.drain()
+            data = await reader.read(1024)
+
+    async def _serve_framed(self, client_id, data, reader, writer):
+        # Reader side queues requests as they arrive; the writer task sends
+        # replies in request order as the I2C worker completes them.
+        outgoing = asyncio.Queue(maxsize=self.scheduler.queue_depth)
+
+        async def write_replies():
+            broken = False
+            while True:
+                item = await outgoing.get()
+                if item is None:
+                    return
+                req_id, future = item
+                response = await future
+                # Keep consuming after a write error so the reader never blocks
+                if broken:
+                    continue
+                try:
+                    writer.write(format_frame(req_id, response).encode('utf-8'))
+                    if outgoing.empty():
+                        await writer.drain()
+                except ConnectionError:
+                    broken = True
+
+        writer_task = asyncio.ensure_future(write_replies())
+        buffer = b""
+        try:
+            while data:
+                buffer += data
+                while b"\n" in buffer:
+                    raw, buffer = buffer.split(b"\n", 1)
+                    line = raw.decode('utf-8').strip()
+                    if not line:
+                        continue
+                    req_id, command = parse_frame(line)
+                    if req_id is None:
+                        future = asyncio.get_running_loop().create_future()
+                        future.set_result(f"Error: Malformed frame '{line}'")
+                        await outgoing.put(("0", future))
+                        continue
+                    logger.info(f"Received [{req_id}]: {command}")
+                    await outgoing.put((req_id, await self.scheduler.submit(client_id, command)))
+                if len(buffer) > MAX_FRAME_SIZE:
+                    logger.error(f"Frame too large from client {client_id}, closing connection")
+                    break
+                data = await reader.read(4096)
+            await outgoing.put(None)
+            await writer_task
+        finally:
+            writer_task.cancel()
+
+
+def start_async_server(host='0.0.0.0', port=13000, max_clients=64, queue_depth=32):
+    server = AsyncDutControlServer(host, port, max_clients=max_clients, queue_depth=queue_depth)
+    asyncio.run(server.serve_forever())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="asyncio DUT control server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=13000)
+    parser.add_argument("--max-clients", type=int, default=64, help="Connections served concurrently")
+    parser.add_argument("--queue-depth", type=int, default=32, help="Pending requests per client")
+    args = parser.parse_args()
+    start_async_server(args.host, args.port, max_clients=args.max_clients, queue_depth=args.queue_depth)
@@ -0,0 +1,109 @@
+import os
+import json
+import shutil
+import logging
+
+def _margin(row):
+    try:
+        return float(row['Margin'])
+    except (TypeError, ValueError):
+        return None
+
+def load_summary(jsonl_path):
+    """Returns {run name: rows} of a batch_summary.jsonl, in file order."""
+    runs = {}
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                runs.setdefault(entry["run"], []).extend(entry["rows"])
+    return runs
+
+
+class FailureRerun:
+    """
+    Re-run of a finished batch restricted to what did not pass: each run of
+    the previous summary with failed (or marginal) test IDs is run again with
+    only those test IDs selected; a run that failed to execute is run again
+    whole. The new rows replace the old ones of the same test IDs, so the
+    batch summary is the original one with the re-checked results merged in.
+    The previous summary is kept as <summary>.prev.jsonl, which a resumed
+    re-run reads again.
+    Args:
+        summary_path (str): batch_summary.jsonl of the batch to re-check.
+        marginal (float): Also re-run passing tests whose margin is below this.
+        resume (bool): Read the kept previous summary instead of summary_path.
+    """
+    def __init__(self, summary_path, marginal=None, resume=False, logger=None):
+        self.logger = logger if logger else logging.getLogger("FailureRerun")
+        self.marginal = marginal
+        root, ext = os.path.splitext(summary_path)
+        self.previous_path = f"{root}.prev{ext}"
+        if not (resume and os.path.exists(self.previous_path)):
+            shutil.copyfile(summary_path, self.previous_path)
+        self.previous = load_summary(self.previous_path)
+        self.selected = {}   # run name -> re-run test IDs (None: whole run)
+        self.order = []      # previous runs in config order
+        self.missing = []    # runs to re-run that the config no longer defines
+        self.logger.info(f"Re-checking {len(self.previous)} runs of {summary_path} "
+                         f"(kept as {self.previous_path})")
+
+    def needs_rerun(self, row):
+        if not row['Pass']:
+            return True
+        margin = _margin(row)
+        return self.marginal is not None and margin is not None and margin < self.marginal
+
+    def plan(self, runs):
+        """Returns the re-runs of the batch's run definitions, in config order."""
+        reruns = []
+        for run in runs:
+            rows = self.previous.get(run["name"])
+            if not rows:
+                continue
+            self.order.append(run["name"])
+            if any(row.get('Error') for row in rows):
+                self.selected[run["name"]] = None
+                reruns.append(run)
+                continue
+            test_ids = []
+            for row in rows:
+                if self.needs_rerun(row) and row['TestID'] not in test_ids:
+                    test_ids.append(row['TestID'])
+            if test_ids:
+                self.selected[run["name"]] = test_ids
+                reruns.append(dict(run, test_ids=test_ids))
+        defined = set(self.order)
+        self.order += [name for name in self.previous if name not in defined]
+        self.missing = [name for name, rows in self.previous.items() if name not in defined
+                        and any(row.get('Error') or self.needs_rerun(row) for row in rows)]
+        for name in self.missing:
+            self.logger.warning(f"[{name}] Not defined by the batch config (adaptive point?), keeping its results")
+        self.logger.info(f"Re-running {len(reruns)} runs, "
+                         f"{sum(len(ids) for ids in self.selected.values() if ids)} test IDs")
+        return reruns
+
+    def previous_runs(self):
+        """(run name, rows) of every previous run in config order; rows is None for a re-run."""
+        return [(name, None if name in self.selected else self.previous[name]) for name in self.order]
+
+    def merge(self, run_name, rows):
+        """The previous rows of a re-run with the re-checked test IDs replaced by rows."""
+        if self.selected.get(run_name) is None:
+            return rows
+        if any(row.get('Error') for row in rows):
+            self.logger.warning(f"[{run_name}] Re-run failed to execute, keeping the previous results")
+            return self.previous[run_name]
+        new = {row['TestID']: row for row in rows}
+        merged = [new.pop(row['TestID'], row) for row in self.previous[run_name]]
+        return merged + list(new.values())
+
+    def report(self):
+        """Summary lines of the re-run."""
+        partial = {name: ids for name, ids in self.selected.items() if ids is not None}
+        lines = [f"Failure re-run: {len(self.selected)} runs re-checked ({len(self.selected) - len(partial)} whole), "
+                 f"{sum(len(ids) for ids in partial.values())} of {sum(len(self.previous[n]) for n in partial)} "
+                 f"test IDs of the partially failed runs measured again"]
+        if self.missing:
+            lines.append(f"Not re-run (not in the batch config): {', '.join(self.missing)}")
+        return lines
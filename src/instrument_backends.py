@@ -0,0 +1,281 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+
+# Keysight remote interface classes every backend provides
+REMOTE_CLASSES = ("RemoteAteUtilities", "IRemoteAte", "OpenProjectOptions", "SaveProjectOptions", "ExportPdfOptions")
+
+KEYSIGHT_ASSEMBLY = "Keysight.DigitalTestApps.Framework.Remote"
+
+class InstrumentBackend:
+    """
+    Source of the Keysight remote interface classes used by
+    KeysightController. Nothing is imported until load() is called (on the
+    first connect), so tools that never drive the scope do not pay for
+    pythonnet/DLL loading.
+    """
+    name = None
+
+    def __init__(self, logger=None):
+        self.logger = logger if logger else logging.getLogger("InstrumentBackend")
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Loads the remote classes once. Raises if the backend is unavailable."""
+        with self._lock:
+            if not self.loaded:
+                classes = self._load()
+                for class_name in REMOTE_CLASSES:
+                    setattr(self, class_name, classes[class_name])
+                self.loaded = True
+        return self
+
+    def _load(self):
+        """Returns {class name: class} for REMOTE_CLASSES."""
+        raise NotImplementedError
+
+    def resolved_name(self):
+        """
+        Name of the backend that actually answers the scope calls ("auto"
+        becomes "dotnet" or "mock"), for tagging results. Loads the backend.
+        """
+        self.load()
+        return getattr(self, "resolved", self.name)
+
+    def attach_dut(self, dut_client):
+        """
+        Gives the backend the batch's DUT connection. Real scopes measure
+        the DUT themselves; simulated ones read its registers through it.
+        """
+
+
+class DotNetBackend(InstrumentBackend):
+    """Real scope through pythonnet and the Keysight remote interface DLL."""
+    name = "dotnet"
+
+    def _load(self):
+        import clr
+        clr.AddReference(KEYSIGHT_ASSEMBLY)
+        import Keysight.DigitalTestApps.Framework.Remote as remote
+        self.logger.info(f"Loaded {KEYSIGHT_ASSEMBLY}")
+        return {class_name: getattr(remote, class_name) for class_name in REMOTE_CLASSES}
+
+
+class AutoBackend(InstrumentBackend):
+    """
+    The .NET backend if the DLL loads, otherwise the mock backend (the
+    behaviour verify_instrument always had without the DLL).
+    """
+    name = "auto"
+
+    def _load(self):
+        try:
+            backend = DotNetBackend(logger=self.logger).load()
+        except Exception as e:
+            self.logger.warning(f"Could not load Keysight DLL ({e}). Using MOCK scope backend.")
+            backend = MockBackend(logger=self.logger).load()
+        self.resolved = backend.name
+        return {class_name: getattr(backend, class_name) for class_name in REMOTE_CLASSES}
+
+
+class MockOptions:
+    FullPath = ""
+    DiscardUnsaved = False
+    Name = ""
+    OverwriteExisting = False
+    FileName = ""
+    Path = ""
+    BaseDirectory = ""
+
+
+class MockBackend(InstrumentBackend):
+    """Instant fake scope that logs every call (for dry runs and verification)."""
+    name = "mock"
+
+    def _load(self):
+        logger = self.logger
+
+        class MockRemoteApp:
+            def __init__(self, remote_obj):
+                self.SelectedTests = []
+                self.SuppressMessages = False
+                self.IsRunning = False
+
+            def SetConfig(self, key, value):
+                logger.info(f"[MOCK] SetConfig: {key} = {value}")
+
+            def OpenProjectCustom(self, options):
+                logger.info(f"[MOCK] OpenProject: {options.FullPath}")
+
+            def NewProject(self, discard_unsaved):
+                logger.info(f"[MOCK] NewProject: DiscardUnsaved={discard_unsaved}")
+
+            def Run(self):
+                logger.info("[MOCK] Run() called. Tests starting...")
+                time.sleep(1) # Simulate test duration
+                logger.info("[MOCK] Run() finished.")
+
+            def Stop(self):
+                logger.info("[MOCK] Stop() called.")
+
+            def GetResults(self):
+                # Return a realistic looking result string
+                return "TestID=100,Passed=True,Margin=15.5;TestID=101,Passed=False,Margin=5.0"
+
+            def SaveProjectCustom(self, options):
+                logger.info(f"[MOCK] SaveProject: {options.Name}")
+                return "C:\\MockPath\\Project.dpj"
+
+            def ExportResultsPdfCustom(self, options):
+                logger.info(f"[MOCK] Export PDF: {options.FileName}")
+                return "C:\\MockPath\\Report.pdf"
+
+            def Wait(self, ms):
+                pass
+
+        class MockRemoteAteUtilities:
+            @staticmethod
+            def GetRemoteAte(ip):
+                logger.info(f"[MOCK] GetRemoteAte({ip}) called.")
+                return object()
+
+        return {"RemoteAteUtilities": MockRemoteAteUtilities, "IRemoteAte": MockRemoteApp,
+                "OpenProjectOptions": MockOptions, "SaveProjectOptions": MockOptions, "ExportPdfOptions": MockOptions}
+
+
+class ReplayBackend(InstrumentBackend):
+    """
+    Replays a recorded batch from the results store: the n-th GetResults()
+    returns the results of the n-th run of that batch (restricted to the
+    selected test IDs). Everything else returns immediately.
+    Args:
+        db_path (str): Results store. Defaults to results.db in the project root.
+        batch (str): Batch to replay. Defaults to the most recent one.
+    """
+    name = "replay"
+
+    def __init__(self, db_path=None, batch=None, logger=None):
+        super().__init__(logger=logger)
+        self.db_path = db_path if db_path else os.path.join(os.path.dirname(__file__), '..', 'results.db')
+        self.batch = batch
+        self.runs = []
+        self.position = 0
+
+    def _load(self):
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(f"Replay results store {self.db_path} not found")
+        conn = sqlite3.connect(self.db_path)
+        try:
+            if self.batch is None:
+                row = conn.execute("SELECT batch FROM runs ORDER BY started DESC LIMIT 1").fetchone()
+                self.batch = row[0] if row else None
+            run_ids = [r[0] for r in conn.execute("SELECT id FROM runs WHERE batch = ? ORDER BY id", (self.batch,))]
+            self.runs = [conn.execute("SELECT test_id, passed, margin FROM results WHERE run_id = ?", (run_id,)).fetchall()
+                         for run_id in run_ids]
+        finally:
+            conn.close()
+        self.logger.info(f"Replaying {len(self.runs)} runs of batch {self.batch} from {self.db_path}")
+        backend = self
+
+        class ReplayRemoteApp:
+            def __init__(self, remote_obj):
+                self.SelectedTests = []
+                self.SuppressMessages = False
+                self.IsRunning = False
+
+            def SetConfig(self, key, value):
+                pass
+
+            def OpenProjectCustom(self, options):
+                pass
+
+            def NewProject(self, discard_unsaved):
+                pass
+
+            def Run(self):
+                pass
+
+            def Stop(self):
+                pass
+
+            def GetResults(self):
+                return backend.next_results(self.SelectedTests)
+
+            def SaveProjectCustom(self, options):
+                return options.Name
+
+            def ExportResultsPdfCustom(self, options):
+                return options.FileName
+
+            def Wait(self, ms):
+                pass
+
+        class ReplayRemoteAteUtilities:
+            @staticmethod
+            def GetRemoteAte(ip):
+                return object()
+
+        return {"RemoteAteUtilities": ReplayRemoteAteUtilities, "IRemoteAte": ReplayRemoteApp,
+                "OpenProjectOptions": MockOptions, "SaveProjectOptions": MockOptions, "ExportPdfOptions": MockOptions}
+
+    def next_results(self, selected_tests):
+        """Results payload of the next recorded run, in GetResults() format."""
+        with self._lock:
+            if self.position >= len(self.runs):
+                self.logger.warning("Replay exhausted, returning no results")
+                return ""
+            results = self.runs[self.position]
+            self.position += 1
+        wanted = {int(t) for t in selected_tests or []}
+        return "\n".join(f"TestID={test_id},Passed={bool(passed)},Margin={margin}"
+                         for test_id, passed, margin in results if not wanted or test_id in wanted)
+
+
+def _sim_backend(**options):
+    # Imported on demand: sim_bench pulls in the register map
+    from sim_bench import SimBackend
+    return SimBackend(**options)
+
+# name -> factory(**options); register_backend() adds more
+BACKENDS = {
+    "auto": AutoBackend,
+    "dotnet": DotNetBackend,
+    "mock": MockBackend,
+    "sim": _sim_backend,
+    "replay": ReplayBackend,
+}
+
+_instances = {}
+_default = None
+
+def register_backend(name, factory):
+    BACKENDS[name] = factory
+
+def select_backend(backend):
+    """Sets the process default backend (a registered name or an InstrumentBackend)."""
+    global _default
+    _default = backend
+
+def get_backend(backend=None, **options):
+    """
+    Returns an (unloaded) backend instance.
+    Args:
+        backend: InstrumentBackend, registered name or None for the default
+                 (select_backend(), else $SCOPE_BACKEND, else "auto").
+        options: Constructor arguments; without them named backends are
+                 shared per process.
+    """
+    if backend is None:
+        backend = _default if _default is not None else os.environ.get("SCOPE_BACKEND", "auto")
+    if isinstance(backend, InstrumentBackend):
+        return backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown scope backend '{backend}' (available: {', '.join(sorted(BACKENDS))})")
+    if options:
+        return BACKENDS[backend](**options)
+    if backend not in _instances:
+        _instances[backend] = BACKENDS[backend]()
+    return _instances[backend]
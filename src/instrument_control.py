@@ -1,34 +1,74 @@
 import sys
-import clr
 import logging
 import time
 import os
+import asyncio
+import threading
 
-# Add reference to the Keysight Remote Interface DLL
-# Assuming the DLL is registered or in a known path. 
-# If it fails, we might need to sys.path.append the location.
-try:
-    clr.AddReference("Keysight.DigitalTestApps.Framework.Remote")
-    from Keysight.DigitalTestApps.Framework.Remote import *
-except Exception as e:
-    print(f"Warning: Could not load Keysight DLL: {e}")
-    # We might be running in an environment without the DLL, so we define mocks or handle gracefully
-    pass
+from tracing import span, traced
+from instrument_backends import get_backend
+
+def parse_config_file(file_path):
+    """
+    Reads a JSON-like config file (supports # and // comments) into a dict.
+    """
+    import json
+    import re
+    with open(file_path, 'r') as f:
+        content = f.read()
+        
+    # Remove comments (lines starting with // or #, or inline // or #)
+    # Simple regex to remove // and # comments while respecting quotes would be complex.
+    # Ideally use a library like `json5` or `commentjson`, but to keep it simple and dependency-free:
+    # We will use a regex that handles basic # comments as requested by user example.
+    
+    # This regex matches # or // outside of quotes is tricky, 
+    # let's assume valid values don't contain # or // for now based on spec.
+    # User example: "Key": "Value", # Comment
+    
+    # Remove text from # to end of line
+    content_no_comments = re.sub(r'#.*', '', content)
+    # Remove text from // to end of line (if they use that too)
+    content_no_comments = re.sub(r'//.*', '', content_no_comments)
+    
+    return json.loads(content_no_comments)
 
 class KeysightController:
-    def __init__(self, ip_address, logger=None):
+    """
+    Args:
+        ip_address (str): Scope address.
+        backend: InstrumentBackend or registered backend name ("dotnet",
+                 "sim", "replay", "mock"); None uses the process default.
+                 The backend (and with it the Keysight DLL) is loaded on
+                 the first connect().
+    """
+    def __init__(self, ip_address, logger=None, backend=None):
         self.ip_address = ip_address
         self.logger = logger if logger else logging.getLogger("KeysightController")
+        self.backend = backend
+        self.api = None
         self.remote_obj = None
         self.remote_app = None
         self.is_connected = False
+        # Configuration the scope last acknowledged {key: str(value)}; reset
+        # whenever a project is created or opened.
+        self.acked_config = {}
+        # Per-key SetConfig durations {key: [seconds, ...]}
+        self.config_timings = {}
+        # Run started by start_run()
+        self._run_thread = None
+        self._run_started = None
+        self._run_error = None
 
+    @traced("scope.connect")
     def connect(self):
         """Establishes connection to the remote scope."""
         try:
+            if self.api is None:
+                self.api = get_backend(self.backend).load()
             self.logger.info(f"Connecting to Keysight Scope at {self.ip_address}...")
-            self.remote_obj = RemoteAteUtilities.GetRemoteAte(self.ip_address)
-            self.remote_app = IRemoteAte(self.remote_obj)
+            self.remote_obj = self.api.RemoteAteUtilities.GetRemoteAte(self.ip_address)
+            self.remote_app = self.api.IRemoteAte(self.remote_obj)
             self.remote_app.SuppressMessages = True  # Suppress UI popups on the scope
             self.is_connected = True
             self.logger.info("Connection established.")
@@ -38,6 +78,29 @@ class KeysightController:
             self.is_connected = False
             return False
 
+    @traced("scope.probe")
+    def is_alive(self):
+        """
+        Health probe: a cheap remoting round trip on the existing handle.
+        Returns False if not connected or the remote object is unreachable.
+        """
+        if not self.is_connected or self.remote_app is None:
+            return False
+        try:
+            _ = self.remote_app.SuppressMessages
+            return True
+        except Exception as e:
+            self.logger.warning(f"Scope health probe failed: {e}")
+            self.is_connected = False
+            return False
+
+    def disconnect(self):
+        """Drops the remote handle."""
+        self.remote_obj = None
+        self.remote_app = None
+        self.is_connected = False
+
+    @traced("scope.NewProject")
     def create_new_project(self):
         """Creates a new project, discarding any unsaved changes."""
         if not self.is_connected: return False
@@ -45,11 +108,13 @@ class KeysightController:
             self.logger.info("Creating new project...")
             # Using NewProject(discard_unsaved=True) based on documentation
             self.remote_app.NewProject(True)
+            self.acked_config = {}
             return True
         except Exception as e:
             self.logger.error(f"Failed to create new project: {e}")
             return False
 
+    @traced("scope.OpenProject")
     def load_setup(self, project_path):
         """Loads a project file (.dpj)."""
         if not self.is_connected:
@@ -58,9 +123,10 @@ class KeysightController:
             
         try:
             self.logger.info(f"Loading project: {project_path}")
-            open_options = OpenProjectOptions()
+            open_options = self.api.OpenProjectOptions()
             open_options.FullPath = project_path
             open_options.DiscardUnsaved = True
+            self.acked_config = {}
             self.remote_app.OpenProjectCustom(open_options)
             self.remote_app.SuppressMessages = True
             return True
@@ -68,56 +134,69 @@ class KeysightController:
             self.logger.error(f"Failed to load project: {e}")
             return False
 
-    def configure(self, config_dict):
+    @traced("scope.configure")
+    def configure(self, config_dict, force_full=False):
         """
         Applies a dictionary of configuration settings.
+        Only keys whose value differs from what the scope last acknowledged
+        are sent, one SetConfig round trip each. NewProject and OpenProject
+        clear that state, so the diff only saves calls together with
+        project_templates (a template records the config it was built
+        with); without templates every run sends every key, as force_full.
         Args:
             config_dict (dict): and dict of {key: value} pairs. 
                                 e.g. {"ConnectorType": "Standard DP/mDP"}
+            force_full (bool): Send every key regardless of the tracked state.
         """
         if not self.is_connected: return False
+        desired = {str(k): str(v) for k, v in config_dict.items() if not str(k).startswith("_")}
+        changed = [k for k, v in desired.items() if force_full or self.acked_config.get(k) != v]
+        key = None
         try:
-            self.logger.info(f"Applying configuration: {config_dict}")
-            for key, value in config_dict.items():
-                if key.startswith("_"):
-                    continue
-                self.remote_app.SetConfig(str(key), str(value))
+            self.logger.info(f"Applying configuration: {len(changed)} of {len(desired)} keys changed"
+                             f"{' (forced full resync)' if force_full else ''}")
+            self.logger.debug(f"Changed keys: {changed}")
+            for key in changed:
+                start = time.perf_counter()
+                with span("scope.SetConfig", key=key):
+                    self.remote_app.SetConfig(key, desired[key])
+                self.config_timings.setdefault(key, []).append(time.perf_counter() - start)
+                self.acked_config[key] = desired[key]
             return True
         except Exception as e:
+            # The failed key's state on the scope is unknown now
+            self.acked_config.pop(key, None)
             self.logger.error(f"Failed to apply configuration: {e}")
             return False
 
-    def load_config_file(self, file_path):
+    def mark_config_applied(self, config_dict):
+        """Records config_dict as already in effect (e.g. loaded with a project)."""
+        self.acked_config = {str(k): str(v) for k, v in config_dict.items() if not str(k).startswith("_")}
+
+    def config_timing_report(self, top=10):
+        """
+        Returns [(key, calls, total_s, avg_s), ...] for the slowest SetConfig
+        keys by total time.
+        """
+        rows = [(k, len(v), sum(v), sum(v) / len(v)) for k, v in self.config_timings.items() if v]
+        rows.sort(key=lambda r: r[2], reverse=True)
+        return rows[:top]
+
+    def load_config_file(self, file_path, force_full=False):
         """
         Loads configuration from a JSON-like file (supports comments) and applies it.
+        Only changed keys are sent (see configure), which saves SetConfig
+        calls only when the project comes from project_templates.
         """
-        import json
-        import re
         try:
             self.logger.info(f"Loading configuration from file: {file_path}")
-            with open(file_path, 'r') as f:
-                content = f.read()
-                
-            # Remove comments (lines starting with // or #, or inline // or #)
-            # Simple regex to remove // and # comments while respecting quotes would be complex.
-            # Ideally use a library like `json5` or `commentjson`, but to keep it simple and dependency-free:
-            # We will use a regex that handles basic # comments as requested by user example.
-            
-            # This regex matches # or // outside of quotes is tricky, 
-            # let's assume valid values don't contain # or // for now based on spec.
-            # User example: "Key": "Value", # Comment
-            
-            # Remove text from # to end of line
-            content_no_comments = re.sub(r'#.*', '', content)
-            # Remove text from // to end of line (if they use that too)
-            content_no_comments = re.sub(r'//.*', '', content_no_comments)
-            
-            config_dict = json.loads(content_no_comments)
-            return self.configure(config_dict)
+            config_dict = parse_config_file(file_path)
+            return self.configure(config_dict, force_full=force_full)
         except Exception as e:
             self.logger.error(f"Failed to load config file: {e}")
             return False
 
+    @traced("scope.SelectTests")
     def select_tests(self, test_ids):
         """Selects specific tests by their ID list."""
         if not self.is_connected: return False
@@ -135,42 +214,119 @@ class KeysightController:
         if not self.is_connected: return False
         try:
             self.logger.info(f"Setting run repetition to {count} times")
-            if count > 1:
-                self.remote_app.SetConfig("RunRepetition", "'N Times'")
-            else:
-                self.remote_app.SetConfig("RunRepetition", "'Once'")
-            self.remote_app.SetConfig("NumRuns", str(count))
-            return True
+            return self.configure({
+                "RunRepetition": "'N Times'" if count > 1 else "'Once'",
+                "NumRuns": str(count),
+            })
         except Exception as e:
             self.logger.error(f"Failed to set run repetition: {e}")
             return False
 
-    def run_tests(self):
-        """Starts the execution of selected tests."""
+    @traced("scope.Run")
+    def run_tests(self, poll_interval=2, timeout=None, progress=None):
+        """Runs the selected tests and waits for them to finish. Returns True on completion."""
+        if not self.start_run():
+            return False
+        return self.wait_for_completion(poll_interval=poll_interval, timeout=timeout, progress=progress)
+
+    def start_run(self):
+        """
+        Starts the execution of selected tests without blocking.
+        Run() is issued from a background thread, so this returns at once
+        whether the remote Run() blocks until the tests finish or not; use
+        is_running()/wait_for_completion()/run_tests_async() to follow it.
+        """
         if not self.is_connected: return False
+        if self.is_running():
+            self.logger.error("Failed to start tests: a run is already in progress")
+            return False
+        self.logger.info("Starting test execution...")
+        self._run_error = None
+        self._run_started = time.time()
+        self._run_thread = threading.Thread(target=self._run_remote, daemon=True, name="scope-run")
+        self._run_thread.start()
+        return True
+
+    def _run_remote(self):
         try:
-            self.logger.info("Starting test execution...")
             self.remote_app.Run()
-            return True
         except Exception as e:
+            self._run_error = e
             self.logger.error(f"Failed to start tests: {e}")
+
+    def is_running(self):
+        """
+        True while a run started by start_run() is in progress: the Run() call
+        has not returned yet, or the scope still reports IsRunning.
+        """
+        if self._run_thread is not None and self._run_thread.is_alive():
+            return True
+        try:
+            return bool(getattr(self.remote_app, "IsRunning", False))
+        except Exception as e:
+            self.logger.warning(f"Could not read IsRunning: {e}")
+            return False
+
+    def _run_finished(self, timed_out):
+        if timed_out:
+            self.logger.error("Test run did not finish within the timeout, stopping it")
+            try:
+                self.remote_app.Stop()
+            except Exception as e:
+                self.logger.warning(f"Could not stop the run: {e}")
             return False
+        if self._run_error is not None:
+            return False
+        self.logger.info(f"Test run finished in {time.time() - self._run_started:.1f}s")
+        return True
+
+    def wait_for_completion(self, poll_interval=2, timeout=None, progress=None):
+        """
+        Polls the running status until the run started by start_run() ends.
+        Args:
+            poll_interval (float): Seconds between status polls.
+            timeout (float): Seconds after which the run is stopped and
+                             False returned. None waits indefinitely.
+            progress (callable): Called as progress(elapsed_seconds) after
+                                 every poll while the run is in progress.
+        Returns True if the run completed without error.
+        """
+        if self._run_thread is None:
+            self.logger.error("wait_for_completion() called without start_run()")
+            return False
+        self.logger.info("Waiting for tests to complete...")
+        while self.is_running():
+            elapsed = time.time() - self._run_started
+            if timeout is not None and elapsed > timeout:
+                return self._run_finished(timed_out=True)
+            if progress:
+                progress(elapsed)
+            if self._run_thread.is_alive():
+                # Wakes up early when a blocking Run() returns
+                self._run_thread.join(poll_interval)
+            else:
+                time.sleep(poll_interval)
+        return self._run_finished(timed_out=False)
 
-    def wait_for_completion(self, poll_interval=2):
+    async def run_tests_async(self, poll_interval=2, timeout=None, progress=None):
         """
-        Polls the status until the test is finished.
-        Note: The .NET Remote Interface usually blocks on Run() if using certain modes, 
-        but if it returns immediately, we need to poll 'IsRunning'.
-        However, based on TMDS.py, Run() seems blocking or we check results after.
-        I will assume Run() blocks for simplicity based on provided pseudo-code, 
-        but I'll add a check if possible.
+        asyncio variant of run_tests(): starts the run and awaits completion,
+        polling with asyncio.sleep so the event loop keeps serving other work.
+        Returns True if the run completed without error.
         """
-        # In many Keysight frameworks, Run() is blocking. 
-        # If it is non-blocking, we would check self.remote_app.IsRunning (if available)
-        # For now, we assume Run() handles the wait or we just proceed.
-        self.logger.info("Waiting for tests to complete... (Assuming synchronous run for now)")
-        pass
+        with span("scope.Run"):
+            if not self.start_run():
+                return False
+            while self.is_running():
+                elapsed = time.time() - self._run_started
+                if timeout is not None and elapsed > timeout:
+                    return self._run_finished(timed_out=True)
+                if progress:
+                    progress(elapsed)
+                await asyncio.sleep(poll_interval)
+            return self._run_finished(timed_out=False)
 
+    @traced("scope.GetResults")
     def get_results(self):
         """
         Retrieves results of the last run.
@@ -219,10 +375,11 @@ class KeysightController:
             self.logger.error(f"Failed to get results: {e}")
             return []
 
+    @traced("scope.SaveProjectCustom")
     def save_project(self, save_as_path=None, base_directory=None):
         if not self.is_connected: return False
         try:
-            opts = SaveProjectOptions()
+            opts = self.api.SaveProjectOptions()
             opts.OverwriteExisting = True
             
             # If base_directory is provided, set it on the options
@@ -249,10 +406,11 @@ class KeysightController:
             self.logger.error(f"Failed to save project: {e}")
             return False
 
+    @traced("scope.ExportResultsPdfCustom")
     def export_pdf(self, file_path, directory=None):
         if not self.is_connected: return False
         try:
-            opts = ExportPdfOptions()
+            opts = self.api.ExportPdfOptions()
             opts.OverwriteExisting = True
             
             # If directory is explicitly provided, use it.
@@ -272,3 +430,45 @@ class KeysightController:
         except Exception as e:
             self.logger.error(f"Failed to export PDF: {e}")
             return False
+
+
+class ScopeSession:
+    """
+    Keeps one connected KeysightController (one IRemoteAte handle) for a
+    whole batch. acquire() reuses the handle while the health probe passes
+    and reconnects only when it fails.
+    """
+    def __init__(self, ip_address, logger=None, backend=None):
+        self.logger = logger if logger else logging.getLogger("ScopeSession")
+        self.controller = KeysightController(ip_address, logger=self.logger, backend=backend)
+        self.connect_count = 0
+        self.reuse_count = 0
+        self.connect_time = 0.0
+        self.probe_time = 0.0
+
+    def acquire(self):
+        """Returns a connected controller, or None if connecting failed."""
+        start = time.time()
+        alive = self.controller.is_alive()
+        self.probe_time += time.time() - start
+        if alive:
+            self.reuse_count += 1
+            self.logger.info("Reusing scope session.")
+            return self.controller
+
+        if self.connect_count:
+            self.logger.warning("Scope session lost, reconnecting...")
+        start = time.time()
+        connected = self.controller.connect()
+        self.connect_time += time.time() - start
+        self.connect_count += 1
+        return self.controller if connected else None
+
+    def saved_setup_time(self):
+        """Estimated seconds saved: reuses x average connect time, minus probes."""
+        if not self.connect_count:
+            return 0.0
+        return self.reuse_count * (self.connect_time / self.connect_count) - self.probe_time
+
+    def close(self):
+        self.controller.disconnect()
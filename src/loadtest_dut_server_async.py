@@ -0,0 +1,129 @@
+import asyncio
+import argparse
+import logging
+import statistics
+import threading
+import time
+
+import dut_control_server
+from dut_control_server import MockI2CDriver
+from dut_control_server_async import AsyncDutControlServer
+
+# Load test: thousands of concurrent mock clients against the asyncio server.
+# The driver is wrapped to detect overlapping bus access; the single I2C
+# worker must keep the number of concurrent driver calls at exactly one.
+logger = logging.getLogger("LoadTestDutServer")
+
+class CheckingI2CDriver(MockI2CDriver):
+    def __init__(self, op_delay=0.0):
+        self.op_delay = op_delay
+        self._lock = threading.Lock()
+        self._active = 0
+        self.max_active = 0
+        self.ops = 0
+
+    def _enter(self):
+        with self._lock:
+            self._active += 1
+            self.max_active = max(self.max_active, self._active)
+            self.ops += 1
+
+    def _exit(self):
+        with self._lock:
+            self._active -= 1
+
+    def write(self, slave_addr, reg_offset, val):
+        self._enter()
+        try:
+            if self.op_delay:
+                time.sleep(self.op_delay)
+            return True
+        finally:
+            self._exit()
+
+    def read(self, slave_addr, reg_offset):
+        self._enter()
+        try:
+            if self.op_delay:
+                time.sleep(self.op_delay)
+            return 0x00
+        finally:
+            self._exit()
+
+async def mock_client(port, client_no, commands, framed):
+    """Returns (completion_time, errors)."""
+    t0 = time.perf_counter()
+    errors = 0
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        if framed:
+            frames = "".join(f"@{i} write 7c {client_no & 0xFF:02x} {i & 0xFF:02x}\n" for i in range(commands))
+            writer.write(frames.encode('utf-8'))
+            await writer.drain()
+            for i in range(commands):
+                line = (await reader.readline()).decode('utf-8').strip()
+                if line != f"@{i} OK":
+                    errors += 1
+        else:
+            for i in range(commands):
+                writer.write(f"write 7c {client_no & 0xFF:02x} {i & 0xFF:02x}".encode('utf-8'))
+                await writer.drain()
+                if (await reader.read(1024)) != b"OK":
+                    errors += 1
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return time.perf_counter() - t0, errors
+
+async def run_load_test(args):
+    checking_driver = CheckingI2CDriver(op_delay=args.op_delay)
+    dut_control_server.driver = checking_driver
+    server = AsyncDutControlServer('127.0.0.1', 0, max_clients=args.max_clients, queue_depth=args.queue_depth)
+    await server.start()
+
+    t0 = time.perf_counter()
+    tasks = [mock_client(server.port, n, args.commands, framed=(n % 2 == 0) or args.framed_only)
+             for n in range(args.clients)]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    elapsed = time.perf_counter() - t0
+    await server.close()
+
+    failures = [r for r in results if isinstance(r, Exception)]
+    completed = [r for r in results if not isinstance(r, Exception)]
+    latencies = sorted(t for t, _ in completed)
+    errors = sum(e for _, e in completed)
+    total_cmds = len(completed) * args.commands
+
+    print(f"Clients:              {args.clients} (max concurrent: {args.max_clients}, queue depth: {args.queue_depth})")
+    print(f"Commands:             {total_cmds} in {elapsed:.2f} s ({total_cmds / elapsed:.0f} cmd/s)")
+    print(f"Driver operations:    {checking_driver.ops}")
+    print(f"Max concurrent I2C:   {checking_driver.max_active}")
+    print(f"Bad replies:          {errors}")
+    print(f"Failed clients:       {len(failures)}")
+    if latencies:
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"Client completion:    p50 {statistics.median(latencies):.3f} s, p95 {p95:.3f} s, max {latencies[-1]:.3f} s")
+    for exc in failures[:5]:
+        print(f"  Client failure: {exc!r}")
+
+    ok = checking_driver.max_active == 1 and errors == 0 and not failures
+    print("PASS" if ok else "FAIL")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for dut_control_server_async")
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--commands", type=int, default=20, help="Commands per client")
+    parser.add_argument("--max-clients", type=int, default=256)
+    parser.add_argument("--queue-depth", type=int, default=16)
+    parser.add_argument("--op-delay", type=float, default=0.0, help="Simulated I2C transaction time (s)")
+    parser.add_argument("--framed-only", action="store_true", help="Use the framed protocol for every client")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    dut_control_server.logger.setLevel(logging.WARNING)
+    ok = asyncio.run(run_load_test(args))
+    raise SystemExit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+import os
+import re
+import logging
+from collections import OrderedDict
+
+from register_shadow import DP_LANE_STRIDE
+
+# Register definitions are read from the spec tables (markdown), so the
+# macros below only name fields; bit positions and defaults come from there.
+SPEC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'spec')
+DEFAULT_SPEC_FILES = [
+    os.path.join(SPEC_DIR, 'ANX7483_reg_def.md'),
+    os.path.join(SPEC_DIR, 'ANX7483.txt'),
+]
+
+DP_SLAVE_ADDR = 0x7c
+LANES = 4
+
+# Macro -> field it sweeps, lane 0 offset (lanes 1-3 follow at DP_LANE_STRIDE),
+# extra fields forced on every write, and prerequisite fields that must be set
+# before any of the macro's registers are written.
+# EQ/SW/FG only take effect in register mode: 0x7c:0x15 bit0 REG_EQ_EN = 1.
+MACROS = {
+    "eq": {"field": "UTX2_EQ_CAP", "offset": 0x16, "prerequisites": {"REG_EQ_EN": 1}},
+    "fg": {"field": "UTX2_VGA_GAIN", "offset": 0x18, "prerequisites": {"REG_EQ_EN": 1}},
+    "sw": {"field": "UTX2_DRV_SWING", "offset": 0x1A, "prerequisites": {"REG_EQ_EN": 1}},
+    "dp_rterm": {"field": "DTX1_RTERM", "offset": 0x23, "force": {"DTX1_RTERM_EN": 1}},
+    "dp_mfr": {"field": "UTX2_EQ_MFR", "offset": 0x17},
+    "dp_mfc": {"field": "UTX2_EQ_MFC", "offset": 0x17},
+}
+MACRO_ALIASES = {"dp_eq": "eq", "dp_fg": "fg", "dp_sw": "sw"}
+
+def parse_macro_value(text):
+    """Macro argument as written on the server command line: decimal or 0x hex (e.g. "14", "0x0E")."""
+    try:
+        return int(text, 0)
+    except ValueError:
+        pass
+    try:
+        # int(..., 0) rejects zero-padded decimals such as "05"
+        return int(text, 10)
+    except ValueError:
+        return None
+
+class RegisterField:
+    def __init__(self, name, slave_addr, offset, msb, lsb, default):
+        self.name = name
+        self.slave_addr = slave_addr
+        self.offset = offset
+        self.msb = msb
+        self.lsb = lsb
+        self.default = default
+
+    @property
+    def width(self):
+        return self.msb - self.lsb + 1
+
+    @property
+    def mask(self):
+        return ((1 << self.width) - 1) << self.lsb
+
+    def encode(self, value):
+        if not 0 <= value < (1 << self.width):
+            raise ValueError(f"{self.name} value {value} out of range 0..{(1 << self.width) - 1}")
+        return value << self.lsb
+
+
+class RegisterMap:
+    """Register fields parsed from the ANX7483 markdown register tables."""
+    def __init__(self):
+        self.fields = {}  # name -> RegisterField (first table defining it)
+        self.registers = {}  # (slave, offset) -> [RegisterField, ...]
+
+    @classmethod
+    def from_markdown(cls, paths=None):
+        reg_map = cls()
+        for path in paths if paths else DEFAULT_SPEC_FILES:
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    reg_map._parse(f.read())
+        return reg_map
+
+    def _parse(self, text):
+        slave_addr, offsets = None, []
+        for line in text.splitlines():
+            clean = line.replace('\\_', '_').replace('*', '')
+            if 'I2C Address' in clean:
+                match = re.search(r'0x([0-9A-Fa-f]+)', clean)
+                slave_addr = int(match.group(1), 16) if match else None
+            elif re.match(r'\s*Offset', clean):
+                offsets = [int(x, 16) for x in re.findall(r'0x([0-9A-Fa-f]+)', clean)]
+            elif clean.strip().startswith('|') and slave_addr is not None and offsets:
+                cells = [c.strip() for c in clean.strip().strip('|').split('|')]
+                if len(cells) < 4:
+                    continue
+                bits = re.fullmatch(r'(\d+)(?::(\d+))?', cells[0])
+                if not bits or cells[1].lower() == 'reserved':
+                    continue
+                msb = int(bits.group(1))
+                lsb = int(bits.group(2)) if bits.group(2) else msb
+                default = re.match(r'0x([0-9A-Fa-f]+)', cells[3])
+                for offset in offsets:
+                    self._add(RegisterField(cells[1], slave_addr, offset, msb, lsb,
+                                            int(default.group(1), 16) if default else 0))
+
+    def _add(self, field):
+        key = (field.slave_addr, field.offset)
+        existing = self.registers.setdefault(key, [])
+        if any(f.name == field.name for f in existing):
+            return
+        existing.append(field)
+        self.fields.setdefault(field.name, field)
+
+    def field_at(self, name, slave_addr, offset):
+        """Returns the field `name` relocated to another lane's offset."""
+        base = self.fields.get(name)
+        if base is None:
+            raise KeyError(f"Field {name} not found in register map")
+        return RegisterField(name, slave_addr, offset, base.msb, base.lsb, base.default)
+
+    def default_value(self, slave_addr, offset):
+        """Reset value of a register from its field defaults, or None if unknown."""
+        fields = self.registers.get((slave_addr, offset))
+        if not fields:
+            return None
+        return sum(f.default << f.lsb for f in fields)
+
+
+class WriteSegment:
+    """
+    Register updates between two raw commands, merged per register.
+    Each register keeps its first-touch position; a full write replaces the
+    value, a field update read-modify-writes only its bits.
+    """
+    def __init__(self):
+        self.registers = OrderedDict()  # key -> [full_value or None, mask, bits]
+        self.prerequisites = []  # keys written before any other register
+
+    def full_write(self, key, value):
+        # Re-assigning an existing key keeps its first-touch position
+        self.registers[key] = [value, 0, 0]
+
+    def field_write(self, key, mask, bits):
+        entry = self.registers.setdefault(key, [None, 0, 0])
+        if entry[0] is not None:
+            entry[0] = (entry[0] & ~mask) | bits
+        else:
+            entry[1] |= mask
+            entry[2] = (entry[2] & ~mask) | bits
+
+    def needs_read(self):
+        """Registers whose untouched bits are unknown (field updates only)."""
+        return [key for key, (full, _, _) in self.registers.items() if full is None]
+
+    def resolve(self, read_value):
+        """
+        Returns the ordered (slave, offset, value) writes. read_value(slave,
+        offset) supplies the current value of registers that only received
+        field updates.
+        """
+        order = [k for k in self.prerequisites if k in self.registers]
+        order += [k for k in self.registers if k not in order]
+        writes = []
+        for key in order:
+            full, mask, bits = self.registers[key]
+            value = full if full is not None else (read_value(*key) & ~mask) | bits
+            writes.append((key[0], key[1], value & 0xFF))
+        return writes
+
+
+class CompiledRun:
+    def __init__(self):
+        self.segments = []  # WriteSegment or raw command string
+        self.macros = {}  # macro name -> value, e.g. {"eq": 14}
+        self.errors = []  # (command, message)
+        self.source_commands = 0
+
+    def resolve(self, read_value):
+        """Flattens to [("write", slave, offset, value) | ("raw", command)]."""
+        transactions = []
+        for segment in self.segments:
+            if isinstance(segment, WriteSegment):
+                transactions += [("write",) + w for w in segment.resolve(read_value)]
+            else:
+                transactions.append(("raw", segment))
+        return transactions
+
+
+class MacroCompiler:
+    """
+    Turns a run's dut_commands (write_register lines and eq/sw/fg style
+    macros) into the minimal ordered set of register writes:
+    - several field updates to the same byte merge into one write,
+    - a full write followed by macros on that register becomes one write,
+    - prerequisite fields (REG_EQ_EN) are set ahead of the first register
+      that depends on them.
+    Commands it does not understand are kept as raw commands in order.
+    """
+    def __init__(self, register_map=None, logger=None, macros=None):
+        self.logger = logger if logger else logging.getLogger("MacroCompiler")
+        self.register_map = register_map if register_map else RegisterMap.from_markdown()
+        self.macros = MACROS if macros is None else macros
+
+    def with_defaults(self, read_value):
+        """
+        Wraps a read_value(slave, offset) callback (which may return None) so
+        unknown registers fall back to their reset value from the spec.
+        """
+        def read(slave_addr, reg_offset):
+            value = read_value(slave_addr, reg_offset) if read_value else None
+            if value is None:
+                value = self.register_map.default_value(slave_addr, reg_offset)
+                self.logger.warning(f"Register 0x{slave_addr:02x}:0x{reg_offset:02x} unknown, "
+                                    f"assuming spec default {value if value is None else hex(value)}")
+            return value if value is not None else 0
+        return read
+
+    def compile(self, dut_commands):
+        compiled = CompiledRun()
+        segment = None
+        for cmd in dut_commands:
+            cmd = cmd.strip()
+            if not cmd or cmd.startswith("//") or cmd.startswith("#"):
+                continue
+            compiled.source_commands += 1
+            try:
+                updates = self._translate(cmd, compiled)
+            except ValueError as e:
+                compiled.errors.append((cmd, str(e)))
+                continue
+
+            if updates is None:
+                # Raw command: flush merged writes, then keep it in order
+                if segment is not None:
+                    compiled.segments.append(segment)
+                    segment = None
+                compiled.segments.append(cmd)
+                continue
+
+            if segment is None:
+                segment = WriteSegment()
+            for kind, key, a, b in updates:
+                if kind == "full":
+                    segment.full_write(key, a)
+                elif kind == "prerequisite":
+                    if key not in segment.prerequisites:
+                        segment.prerequisites.append(key)
+                    segment.field_write(key, a, b)
+                else:
+                    segment.field_write(key, a, b)
+        if segment is not None:
+            compiled.segments.append(segment)
+        return compiled
+
+    def _translate(self, cmd, compiled):
+        """
+        Returns a list of (kind, key, value|mask, bits) updates, or None for a
+        raw command. Raises ValueError for malformed commands.
+        """
+        if "write_register" in cmd:
+            # Naive parsing for write_register(0x7c, 0x02, 0x01)
+            try:
+                args_str = cmd.split('(')[1].split(')')[0]
+                args = [int(x.strip(), 16) for x in args_str.split(',')]
+            except Exception as e:
+                raise ValueError(f"Error parsing {cmd}: {e}")
+            if len(args) != 3:
+                raise ValueError(f"Error: Invalid args count in {cmd}")
+            return [("full", (args[0], args[1]), args[2] & 0xFF, None)]
+
+        parts = cmd.split()
+        name = MACRO_ALIASES.get(parts[0].lower(), parts[0].lower())
+        # Bare macros ('eq') only display values; leave them to the server
+        if len(parts) != 2 or name not in MACROS:
+            return None
+        value = parse_macro_value(parts[1])
+        if value is None:
+            raise ValueError(f"Error: Invalid {name} value '{parts[1]}'")
+        # Recorded for the summary columns even when sent as a raw command
+        compiled.macros[name] = value
+
+        macro = self.macros.get(name)
+        if macro is None:
+            return None
+        if macro["field"] not in self.register_map.fields:
+            self.logger.warning(f"Field {macro['field']} not in register map, sending '{cmd}' as raw command")
+            return None
+
+        updates = []
+        for field_name, field_value in macro.get("prerequisites", {}).items():
+            field = self.register_map.fields[field_name]
+            updates.append(("prerequisite", (field.slave_addr, field.offset), field.mask, field.encode(field_value)))
+
+        for lane in range(LANES):
+            offset = macro["offset"] + lane * DP_LANE_STRIDE
+            field = self.register_map.field_at(macro["field"], DP_SLAVE_ADDR, offset)
+            updates.append(("field", (DP_SLAVE_ADDR, offset), field.mask, field.encode(value)))
+            for forced_name, forced_value in macro.get("force", {}).items():
+                forced = self.register_map.field_at(forced_name, DP_SLAVE_ADDR, offset)
+                updates.append(("field", (DP_SLAVE_ADDR, offset), forced.mask, forced.encode(forced_value)))
+        return updates
@@ -0,0 +1,313 @@
+import os
+import time
+import queue
+import logging
+import multiprocessing
+from collections import deque
+
+from run_executor import RunExecutor
+from macro_compiler import DP_SLAVE_ADDR
+from tracing import tracer
+
+# Per-bench settings that override common_settings in that bench's worker
+BENCH_KEYS = ("instrument_ip", "dut_server_ip", "dut_server_port", "scope_backend", "scope_backend_options",
+              "base_directory", "template_directory", "template_index", "result_cache_path", "dut_serial",
+              "bench_id")
+
+def bench_settings(common, bench, index):
+    """common_settings for one bench. Template index and result cache are per bench (per scope)."""
+    name = bench.get("name", f"bench{index + 1}")
+    settings = dict(common)
+    settings.pop("benches", None)
+    settings.update({key: bench[key] for key in BENCH_KEYS if key in bench})
+    root_dir = os.path.join(os.path.dirname(__file__), '..')
+    settings.setdefault("template_index", os.path.join(root_dir, f"project_templates_{name}.json"))
+    settings.setdefault("result_cache_path", os.path.join(root_dir, f"result_cache_{name}.json"))
+    # The pipeline overlaps stages within one bench; each worker still runs serially
+    settings["pipeline"] = False
+    return name, settings
+
+def dut_reachable(executor):
+    """One register read tells whether the bench's DUT server answers."""
+    response = executor.dut_client.read_register(DP_SLAVE_ADDR, 0x00)
+    return bool(response) and response.startswith("0x")
+
+def execute_run(executor, run, logger):
+    """
+    Executes one run on a bench and returns its result payload for the
+    coordinator: {"ok", "complete", "rows", "report_name", "macros", "registers",
+    "results", "duration", "test_ids", "backend", "stage_times"}, or {"ok": False, "error"} if it raised.
+    """
+    try:
+        state = executor.execute(run)
+    except Exception as e:
+        logger.error(f"[{run['name']}] Run failed: {e}")
+        return {"ok": False, "error": str(e)}
+    payload = {
+        "ok": bool(state["results"]),
+        "complete": not state["failed_stages"],
+        "rows": executor.summary_rows(state),
+        "report_name": state["report_name"],
+        "macros": state["macros"],
+        "registers": state["registers"],
+        "results": state["results"],
+        "duration": state["duration"],
+        "test_ids": state["test_ids"],
+        "backend": executor.backend_name(),
+        "stage_times": executor.measured_stage_times(state),
+    }
+    if executor.result_cache and payload["ok"] and state["cache_key"] and not state["cached_report"]:
+        executor.result_cache.store(state["cache_key"], state["results"], state["report_name"], state["project_name"])
+    return payload
+
+def bench_worker(name, settings, use_cache, task_queue, result_queue):
+    """
+    Worker process of one bench: executes the runs it receives on
+    task_queue until it gets None. Messages on result_queue:
+        ("ready", name)                  - waiting for a run
+        ("done", name, task_id, payload) - run finished (payload["ok"])
+        ("down", name, error)            - the bench could not be set up
+    Top level so it can be pickled for spawn-based platforms.
+    """
+    logger = logging.getLogger(f"Bench[{name}]")
+    # Spans of the worker are not exported
+    tracer.enabled = False
+    try:
+        executor = RunExecutor(settings, logger=logger, use_cache=use_cache)
+    except Exception as e:
+        logger.error(f"Bench setup failed: {e}")
+        result_queue.put(("down", name, str(e)))
+        return
+    try:
+        while True:
+            result_queue.put(("ready", name))
+            task = task_queue.get()
+            if task is None:
+                break
+            task_id, run = task
+            if not dut_reachable(executor):
+                logger.error(f"[{run['name']}] DUT server not reachable, returning run")
+                result_queue.put(("done", name, task_id, {"ok": False, "error": "DUT server not reachable"}))
+                continue
+            payload = execute_run(executor, run, logger)
+            result_queue.put(("done", name, task_id, payload))
+    finally:
+        executor.close()
+
+
+def failed_run_rows(run):
+    """results_summary rows of a run no bench could complete."""
+    return [{"Run": run["name"], "ReportName": run.get("report_name"), "EQ": "-", "SW": "-", "FG": "-",
+             "Duration": 0.0, "WritesSkipped": 0, "Cached": False,
+             "TestID": "Error", "Pass": False, "Margin": "N/A", "Error": True}]
+
+
+class BenchState:
+    def __init__(self, name, process, task_queue):
+        self.name = name
+        self.process = process
+        self.task_queue = task_queue
+        self.task = None  # task in flight
+        self.idle = False
+        self.alive = True
+        self.runs = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.busy_time = 0.0
+        self.started = None
+
+
+class MultiBenchScheduler:
+    """
+    Spreads the runs of a batch over several benches (scope + DUT server),
+    one worker process per bench. Idle workers pull the next run from a
+    central queue; a run that fails (no results) or whose worker dies is
+    re-queued for a bench that has not failed it yet. A bench that fails
+    max_bench_failures runs in a row is retired.
+    Args:
+        common (dict): common_settings; "benches" lists the benches, e.g.
+                       [{"name": "lab1", "instrument_ip": "...",
+                         "dut_server_ip": "...", "dut_server_port": 13000}].
+        max_attempts (int): Benches a run is tried on before it is recorded
+                            as an execution error.
+        on_result (callable): on_result(run, payload) for every finished run
+                              (payload as sent by bench_worker), in
+                              completion order.
+    """
+    def __init__(self, common, on_result, use_cache=True, max_attempts=2, max_bench_failures=3, logger=None):
+        self.common = common
+        self.on_result = on_result
+        self.use_cache = use_cache
+        self.max_attempts = max_attempts
+        self.max_bench_failures = max_bench_failures
+        self.logger = logger if logger else logging.getLogger("MultiBenchScheduler")
+        self.benches = {}
+        self.requeued = deque()
+        self.tasks = {}
+        self.retries = 0
+        self.exhausted = False
+
+    def _start_workers(self, result_queue):
+        for index, bench in enumerate(self.common.get("benches", [])):
+            name, settings = bench_settings(self.common, bench, index)
+            if name in self.benches:
+                self.logger.error(f"Duplicate bench name '{name}', skipping")
+                continue
+            task_queue = multiprocessing.Queue()
+            process = multiprocessing.Process(target=bench_worker, name=f"bench-{name}",
+                                              args=(name, settings, self.use_cache, task_queue, result_queue),
+                                              daemon=True)
+            process.start()
+            self.benches[name] = BenchState(name, process, task_queue)
+            self.logger.info(f"Started worker for bench {name} "
+                             f"(scope {settings.get('instrument_ip')}, DUT {settings.get('dut_server_ip')}:"
+                             f"{settings.get('dut_server_port', 13000)})")
+
+    def _alive_benches(self):
+        return [b for b in self.benches.values() if b.alive]
+
+    def _next_task(self, bench, runs):
+        """Next task this bench may take: re-queued runs first, then new runs."""
+        for task_id in list(self.requeued):
+            if bench.name not in self.tasks[task_id]["failed_on"]:
+                self.requeued.remove(task_id)
+                return task_id
+        run = next(runs, None) if not self.exhausted else None
+        if run is None:
+            self.exhausted = True
+            return None
+        task_id = len(self.tasks)
+        self.tasks[task_id] = {"run": run, "attempts": 0, "failed_on": set()}
+        return task_id
+
+    def _dispatch(self, bench, runs):
+        task_id = self._next_task(bench, runs)
+        if task_id is None:
+            bench.idle = True
+            return False
+        task = self.tasks[task_id]
+        task["attempts"] += 1
+        bench.task = task_id
+        bench.idle = False
+        bench.started = time.time()
+        self.logger.info(f"[{task['run']['name']}] Dispatched to bench {bench.name} (attempt {task['attempts']})")
+        bench.task_queue.put((task_id, task["run"]))
+        return True
+
+    def _retire(self, bench, reason):
+        if not bench.alive:
+            return
+        self.logger.error(f"Retiring bench {bench.name}: {reason}")
+        bench.alive = False
+        bench.idle = False
+        try:
+            bench.task_queue.put(None)
+        except Exception:
+            pass
+
+    def _fail(self, task_id, bench_name, payload):
+        """Re-queues a failed task, or reports it when no bench is left to try."""
+        task = self.tasks[task_id]
+        task["failed_on"].add(bench_name)
+        task["last_payload"] = payload
+        candidates = [b for b in self._alive_benches() if b.name not in task["failed_on"]]
+        if task["attempts"] < self.max_attempts and candidates:
+            self.retries += 1
+            self.logger.warning(f"[{task['run']['name']}] Failed on bench {bench_name}, re-queuing")
+            self.requeued.append(task_id)
+        else:
+            self.on_result(task["run"], payload)
+
+    def _task_done(self, bench):
+        if bench.started:
+            bench.busy_time += time.time() - bench.started
+        bench.task = None
+        bench.started = None
+
+    def run(self, runs):
+        """Executes every run of the iterable. Returns when all have a result."""
+        runs = iter(runs)
+        result_queue = multiprocessing.Queue()
+        self._start_workers(result_queue)
+        try:
+            while True:
+                busy = [b for b in self.benches.values() if b.task is not None]
+                if not busy and self.exhausted and not self.requeued:
+                    break
+                if not self._alive_benches():
+                    self.logger.error("No bench left, recording the remaining runs as failed")
+                    for task_id in self.requeued:
+                        self.on_result(self.tasks[task_id]["run"], self.tasks[task_id]["last_payload"])
+                    self.requeued.clear()
+                    for run in runs:
+                        self.on_result(run, {"ok": False, "error": "No bench available"})
+                    break
+                try:
+                    self._handle(result_queue.get(timeout=1.0), runs)
+                except queue.Empty:
+                    pass
+                self._check_workers()
+                # A re-queued run may now fit a bench that went idle earlier
+                if self.requeued:
+                    for idle in [b for b in self._alive_benches() if b.idle]:
+                        self._dispatch(idle, runs)
+                # Runs nobody may take any more (every live bench failed them)
+                for task_id in list(self.requeued):
+                    task = self.tasks[task_id]
+                    if all(b.name in task["failed_on"] for b in self._alive_benches()):
+                        self.requeued.remove(task_id)
+                        self.on_result(task["run"], task["last_payload"])
+        finally:
+            self._stop_workers()
+
+    def _handle(self, message, runs):
+        kind, name = message[0], message[1]
+        bench = self.benches[name]
+        if kind == "down":
+            self._retire(bench, message[2])
+        elif kind == "done":
+            task_id, payload = message[2], message[3]
+            self._task_done(bench)
+            bench.runs += 1
+            if payload.get("ok"):
+                bench.consecutive_failures = 0
+                self.on_result(self.tasks[task_id]["run"], payload)
+            else:
+                bench.failures += 1
+                bench.consecutive_failures += 1
+                if bench.consecutive_failures >= self.max_bench_failures:
+                    self._retire(bench, f"{bench.consecutive_failures} runs failed in a row")
+                self._fail(task_id, name, payload)
+        elif kind == "ready" and bench.alive:
+            self._dispatch(bench, runs)
+
+    def _check_workers(self):
+        for bench in self._alive_benches():
+            if not bench.process.is_alive():
+                task_id = bench.task
+                self._task_done(bench)
+                self._retire(bench, f"worker exited (code {bench.process.exitcode})")
+                if task_id is not None:
+                    self._fail(task_id, bench.name, {"ok": False, "error": "Bench worker died"})
+
+    def _stop_workers(self):
+        for bench in self.benches.values():
+            try:
+                bench.task_queue.put(None)
+            except Exception:
+                pass
+        for bench in self.benches.values():
+            bench.process.join(timeout=30)
+            if bench.process.is_alive():
+                self.logger.warning(f"Bench {bench.name} worker did not stop, terminating")
+                bench.process.terminate()
+
+    def report(self):
+        """Per-bench lines for the batch summary."""
+        lines = [f"{'Bench':<16} | {'Runs':>5} | {'Failed':>6} | {'Busy (s)':>9} | Status"]
+        for bench in self.benches.values():
+            lines.append(f"{bench.name:<16} | {bench.runs:>5} | {bench.failures:>6} | {bench.busy_time:>9.2f} | "
+                         f"{'ok' if bench.alive else 'retired'}")
+        if self.retries:
+            lines.append(f"Runs re-queued after a bench failure: {self.retries}")
+        return lines
@@ -0,0 +1,134 @@
+import time
+import queue
+import logging
+import threading
+
+class Stage:
+    """
+    One step of a run.
+    Args:
+        name (str): Stage name, unique within a pipeline.
+        resource (str): Stages sharing a resource run one at a time, in run
+                        order, on that resource's worker thread.
+        fn (callable): fn(state) executes the stage; raising marks it failed.
+        deps (list): Stages of the same run that must have succeeded first.
+        prev_deps (list): Stages of the previous run that must have finished
+                          (successfully or not) first.
+    """
+    def __init__(self, name, resource, fn, deps=(), prev_deps=()):
+        self.name = name
+        self.resource = resource
+        self.fn = fn
+        self.deps = list(deps)
+        self.prev_deps = list(prev_deps)
+
+
+class _RunSlot:
+    def __init__(self, index, state, stage_names):
+        self.index = index
+        self.state = state
+        self.done = {name: threading.Event() for name in stage_names}
+        self.ok = {}
+        self.durations = {}
+        self.started = None
+        self.finished = None
+
+
+class PipelineExecutor:
+    """
+    Executes runs as explicit stages with dependencies, overlapping
+    independent stages of consecutive runs. Each resource (e.g. "dut",
+    "scope") has one worker thread that executes its stages in run order, so
+    e.g. the next run's DUT configuration proceeds while the scope is still
+    saving and exporting the previous run.
+    Runs are pulled lazily from an iterable; at most `lookahead` runs are in
+    flight at once.
+    """
+    def __init__(self, stages, lookahead=2, logger=None):
+        self.stages = stages
+        self.lookahead = max(1, lookahead)
+        self.logger = logger if logger else logging.getLogger("PipelineExecutor")
+        self.stage_total = 0.0  # sum of all stage durations (serial cost)
+        self.wall_time = 0.0
+
+    def run(self, states, on_complete=None):
+        """
+        Executes every state in states (any iterable). on_complete(state,
+        slot) is called in run order as each run finishes.
+        Returns the number of runs executed.
+        """
+        names = [stage.name for stage in self.stages]
+        queues = {}
+        for stage in self.stages:
+            queues.setdefault(stage.resource, queue.Queue())
+        workers = [threading.Thread(target=self._worker, args=(q,), daemon=True, name=f"pipeline-{res}")
+                   for res, q in queues.items()]
+        for worker in workers:
+            worker.start()
+
+        start = time.time()
+        in_flight = []
+        previous = None
+        count = 0
+        try:
+            for state in states:
+                slot = _RunSlot(count, state, names)
+                count += 1
+                for stage in self.stages:
+                    queues[stage.resource].put((stage, slot, previous))
+                previous = slot
+                in_flight.append(slot)
+                while len(in_flight) >= self.lookahead:
+                    self._finish(in_flight.pop(0), on_complete)
+            while in_flight:
+                self._finish(in_flight.pop(0), on_complete)
+        finally:
+            for q in queues.values():
+                q.put(None)
+            for worker in workers:
+                worker.join()
+        self.wall_time += time.time() - start
+        return count
+
+    def _finish(self, slot, on_complete):
+        for event in slot.done.values():
+            event.wait()
+        self.stage_total += sum(slot.durations.values())
+        if on_complete:
+            on_complete(slot.state, slot)
+
+    def _worker(self, task_queue):
+        while True:
+            task = task_queue.get()
+            if task is None:
+                return
+            stage, slot, previous = task
+            if previous is not None:
+                for name in stage.prev_deps:
+                    previous.done[name].wait()
+            for name in stage.deps:
+                slot.done[name].wait()
+
+            failed_deps = [name for name in stage.deps if not slot.ok.get(name)]
+            if failed_deps:
+                self.logger.warning(f"Skipping stage '{stage.name}' of run {slot.index}: {failed_deps} failed")
+                slot.ok[stage.name] = False
+                slot.done[stage.name].set()
+                continue
+
+            t0 = time.time()
+            if slot.started is None:
+                slot.started = t0
+            try:
+                stage.fn(slot.state)
+                slot.ok[stage.name] = True
+            except Exception as e:
+                self.logger.error(f"Stage '{stage.name}' of run {slot.index} failed: {e}")
+                slot.ok[stage.name] = False
+            slot.durations[stage.name] = time.time() - t0
+            slot.finished = time.time()
+            slot.done[stage.name].set()
+
+    def saved_time(self):
+        """Wall-clock seconds saved versus running every stage serially."""
+        return self.stage_total - self.wall_time
@@ -0,0 +1,74 @@
+import os
+import json
+import hashlib
+import logging
+
+from instrument_control import parse_config_file
+
+class ProjectTemplateCache:
+    """
+    Pre-configured scope projects, keyed by a hash of the config file.
+    The first run with a given config builds the project once (NewProject +
+    full configure) and saves it as a template .dpj; later runs open the
+    template with load_setup() instead. Editing the config file changes the
+    hash, so a new template is built automatically.
+    The index {hash: template path on the scope} is kept in a local JSON file.
+    """
+    def __init__(self, index_path, template_dir=None, logger=None):
+        self.index_path = index_path
+        self.template_dir = template_dir
+        self.logger = logger if logger else logging.getLogger("ProjectTemplateCache")
+        self.index = {}
+        self.hits = 0
+        self.builds = 0
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, 'r') as f:
+                    self.index = json.load(f)
+            except Exception as e:
+                self.logger.warning(f"Ignoring unreadable template index {index_path}: {e}")
+
+    @staticmethod
+    def config_hash(config_path):
+        with open(config_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()[:16]
+
+    def _save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f, indent=4)
+        os.replace(tmp_path, self.index_path)
+
+    def prepare(self, scope, config_path, force_full=False):
+        """
+        Leaves scope with a project configured from config_path, opening the
+        cached template if there is one and building it otherwise.
+        Returns True on success.
+        """
+        config_key = self.config_hash(config_path)
+        template_path = self.index.get(config_key)
+
+        if template_path and not force_full:
+            self.logger.info(f"Opening project template {template_path} (config {config_key})")
+            if scope.load_setup(template_path):
+                # The template already carries this configuration
+                scope.mark_config_applied(parse_config_file(config_path))
+                self.hits += 1
+                return True
+            self.logger.warning(f"Template {template_path} could not be opened, rebuilding it")
+            del self.index[config_key]
+            self._save_index()
+
+        self.logger.info(f"Building project template for config {config_key}...")
+        if not scope.create_new_project():
+            return False
+        if not scope.load_config_file(config_path, force_full=force_full):
+            return False
+        saved_path = scope.save_project(save_as_path=f"Template_{config_key}", base_directory=self.template_dir)
+        if saved_path:
+            self.index[config_key] = str(saved_path)
+            self._save_index()
+            self.builds += 1
+        else:
+            self.logger.warning("Template could not be saved; the next run will rebuild it")
+        return True
@@ -0,0 +1,86 @@
+import logging
+
+# Registers touched by the server-side macros (dpaddr/eq/sw/fg on slave 0x7c,
+# see spec/ANX7483.txt). A macro read-modify-writes these on the DUT, so their
+# shadow entries become unknown when the macro is sent as a raw command.
+DP_LANE_STRIDE = 0x14
+MACRO_FOOTPRINTS = {
+    "dpaddr": [(0x7c, 0x15)],
+    "eq": [(0x7c, 0x16 + lane * DP_LANE_STRIDE) for lane in range(4)],
+    "fg": [(0x7c, 0x18 + lane * DP_LANE_STRIDE) for lane in range(4)],
+    "sw": [(0x7c, 0x1A + lane * DP_LANE_STRIDE) for lane in range(4)],
+}
+
+class RegisterShadow:
+    """
+    Client-side copy of the last value known to be in each (slave, offset)
+    register of the DUT. A write whose value is already in place can be
+    skipped. Entries are learned from acknowledged writes and from reads,
+    and dropped whenever the DUT may have changed behind our back.
+    """
+    def __init__(self, logger=None):
+        self.logger = logger if logger else logging.getLogger("RegisterShadow")
+        self._values = {}
+        self.skipped = 0
+        self.sent = 0
+
+    def get(self, slave_addr, reg_offset):
+        """Returns the cached value, or None if unknown."""
+        return self._values.get((slave_addr, reg_offset))
+
+    def update(self, slave_addr, reg_offset, value):
+        self._values[(slave_addr, reg_offset)] = value
+
+    def is_current(self, slave_addr, reg_offset, value):
+        """True if the DUT is known to hold value already (write can be skipped)."""
+        return self._values.get((slave_addr, reg_offset)) == value
+
+    def invalidate(self, slave_addr=None, reg_offset=None):
+        """
+        Forgets cached values. No arguments: everything; slave only: all
+        registers of that slave; both: a single register.
+        """
+        if slave_addr is None:
+            self._values.clear()
+        elif reg_offset is None:
+            for key in [k for k in self._values if k[0] == slave_addr]:
+                del self._values[key]
+        else:
+            self._values.pop((slave_addr, reg_offset), None)
+
+    def invalidate_for_command(self, command):
+        """
+        Drops the entries a raw server command may change. Known macros drop
+        their footprint; unknown commands drop the whole shadow.
+        """
+        parts = command.split()
+        if not parts:
+            return
+        op = parts[0].lower()
+        try:
+            if op == "read":
+                return
+            if op == "write" and len(parts) == 4:
+                self.invalidate(int(parts[1], 16), int(parts[2], 16))
+                return
+            if op == "wmulti":
+                for item in parts[1:]:
+                    slave_addr, reg_offset, _ = item.split(':')
+                    self.invalidate(int(slave_addr, 16), int(reg_offset, 16))
+                return
+        except ValueError:
+            pass
+        if op in MACRO_FOOTPRINTS:
+            for slave_addr, reg_offset in MACRO_FOOTPRINTS[op]:
+                self.invalidate(slave_addr, reg_offset)
+            return
+        self.logger.debug(f"Unknown command '{op}', invalidating register shadow")
+        self.invalidate()
+
+    def snapshot(self):
+        """Returns a copy of the known register values {(slave, offset): value}."""
+        return dict(self._values)
+
+    def reset_stats(self):
+        self.skipped = 0
+        self.sent = 0
@@ -0,0 +1,98 @@
+import os
+import json
+import time
+import hashlib
+import logging
+
+class ResultCache:
+    """
+    Content-addressed cache of parsed scope results. The key hashes
+    everything that determines a measurement: the DUT register state, the
+    scope config file contents, the selected test IDs and the bench (DUT
+    server and scope addresses, plus the DUT serial / bench ID the user
+    sets). Hardware changes none of these see (a power cycle, re-cabling)
+    are not detected, hence the cache is opt-in. A run whose key was measured before reuses
+    those results and points at the earlier report instead of using scope
+    time.
+    Entries expire after ttl seconds; beyond max_entries the least recently
+    used are evicted. The cache is kept in a local JSON file.
+    """
+    def __init__(self, path, ttl=7 * 24 * 3600, max_entries=5000, logger=None):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.logger = logger if logger else logging.getLogger("ResultCache")
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                self.logger.warning(f"Ignoring unreadable result cache {path}: {e}")
+        self._evict()
+
+    @staticmethod
+    def make_key(registers, config_path, test_ids, bench=None, raw_commands=None):
+        """
+        Args:
+            registers (dict): Register state {"0x7c:0x16": value}.
+            config_path (str): Scope config file; its contents are hashed.
+            test_ids (list): Selected tests (order does not matter).
+            bench (dict): Identifies the DUT/scope setup.
+            raw_commands (list): Commands whose effect the register state
+                                 does not capture (sent to the server as is).
+        """
+        with open(config_path, 'rb') as f:
+            config_digest = hashlib.sha256(f.read()).hexdigest()
+        material = json.dumps({
+            "registers": registers,
+            "config": config_digest,
+            "tests": sorted(test_ids),
+            "bench": bench or {},
+            "raw": raw_commands or [],
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+    def _evict(self):
+        now = time.time()
+        expired = [k for k, e in self.entries.items() if now - e.get("created", 0) > self.ttl]
+        for key in expired:
+            del self.entries[key]
+        overflow = len(self.entries) - self.max_entries
+        if overflow > 0:
+            for key in sorted(self.entries, key=lambda k: self.entries[k].get("last_used", 0))[:overflow]:
+                del self.entries[key]
+        if expired or overflow > 0:
+            self.logger.info(f"Result cache: evicted {len(expired)} expired and {max(0, overflow)} least recently used entries")
+        return bool(expired) or overflow > 0
+
+    def lookup(self, key):
+        """Returns the cache entry for key, or None if absent or expired."""
+        entry = self.entries.get(key)
+        if entry is None or time.time() - entry.get("created", 0) > self.ttl:
+            self.misses += 1
+            return None
+        entry["last_used"] = time.time()
+        self.hits += 1
+        self._save()
+        return entry
+
+    def store(self, key, results, report_name, project_name=None):
+        now = time.time()
+        self.entries[key] = {
+            "results": results,
+            "report_name": report_name,
+            "project_name": project_name,
+            "created": now,
+            "last_used": now,
+        }
+        self._evict()
+        self._save()
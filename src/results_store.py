@@ -0,0 +1,216 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import logging
+import argparse
+
+SWEEP_PARAMS = ("eq", "sw", "fg")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    batch TEXT,
+    run TEXT,
+    report_name TEXT,
+    eq INTEGER,
+    sw INTEGER,
+    fg INTEGER,
+    started REAL,
+    duration REAL,
+    registers TEXT,
+    test_ids TEXT,
+    backend TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER REFERENCES runs(id),
+    test_id INTEGER,
+    passed INTEGER,
+    margin REAL
+);
+CREATE TABLE IF NOT EXISTS stages (
+    run_id INTEGER REFERENCES runs(id),
+    stage TEXT,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS idx_results_test ON results(test_id, run_id, passed, margin);
+CREATE INDEX IF NOT EXISTS idx_results_run ON results(run_id);
+CREATE INDEX IF NOT EXISTS idx_runs_sweep ON runs(eq, sw, fg);
+CREATE INDEX IF NOT EXISTS idx_runs_batch ON runs(batch);
+CREATE INDEX IF NOT EXISTS idx_stages_run ON stages(run_id);
+"""
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+class ResultsStore:
+    """
+    SQLite store of every parsed test result, for comparing EQ/SW/FG sweeps
+    across batches. One row per run (sweep parameters, register snapshot)
+    and one row per test result, indexed on test ID and sweep parameters.
+    """
+    def __init__(self, db_path, logger=None):
+        self.db_path = db_path
+        self.logger = logger if logger else logging.getLogger("ResultsStore")
+        self.conn = sqlite3.connect(db_path)
+        self._migrate()
+        self.conn.executescript(SCHEMA)
+
+    def _migrate(self):
+        """Adds the columns newer versions store to a database created by an older one."""
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(runs)")]
+        if columns:
+            with self.conn:
+                for column in ("test_ids", "backend"):
+                    if column not in columns:
+                        self.conn.execute(f"ALTER TABLE runs ADD COLUMN {column} TEXT")
+
+    def record_run(self, batch, run_name, report_name, macros, registers, results, duration, started=None,
+                   test_ids=None, backend=None, stage_times=None):
+        """
+        Stores one run and its results. Returns the run id.
+        Args:
+            batch (str): Batch identifier (e.g. start timestamp).
+            macros (dict): Sweep parameters, e.g. {"eq": 14, "sw": 1, "fg": 0}.
+            registers (dict): Register snapshot {"0x7c:0x16": value}.
+            results (list): Parsed results [{'test_id', 'passed', 'margin'}].
+            test_ids (list): Test IDs the run selected.
+            backend (str): Scope backend name.
+            stage_times (dict): Seconds per executed stage {"dut": 1.2, ...}.
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (batch, run, report_name, eq, sw, fg, started, duration, registers, test_ids, "
+                "backend) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (batch, run_name, report_name,
+                 _to_int(macros.get("eq")), _to_int(macros.get("sw")), _to_int(macros.get("fg")),
+                 started if started is not None else time.time(), duration, json.dumps(registers or {}),
+                 json.dumps(test_ids) if test_ids is not None else None, backend))
+            run_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO stages (run_id, stage, duration) VALUES (?, ?, ?)",
+                [(run_id, stage, seconds) for stage, seconds in (stage_times or {}).items()])
+            self.conn.executemany(
+                "INSERT INTO results (run_id, test_id, passed, margin) VALUES (?, ?, ?, ?)",
+                [(run_id, _to_int(res.get('test_id')), 1 if res.get('passed') else 0, _to_float(res.get('margin')))
+                 for res in results or []])
+        return run_id
+
+    def margin_table(self, by=("eq",), test_id=None, where=None, batch=None):
+        """
+        Margin vs sweep parameters: one row per (parameters..., test_id) with
+        run count, pass count, min/avg/max margin.
+        Args:
+            by (tuple): Sweep parameters to group by (subset of eq/sw/fg).
+            test_id (int): Restrict to one test.
+            where (dict): Fixed parameter values, e.g. {"sw": 1}.
+            batch (str): Restrict to one batch.
+        """
+        by = [p for p in by if p in SWEEP_PARAMS]
+        columns = ", ".join(f"r.{p}" for p in by)
+        conditions, args = [], []
+        if test_id is not None:
+            conditions.append("t.test_id = ?")
+            args.append(test_id)
+        for param, value in (where or {}).items():
+            if param not in SWEEP_PARAMS:
+                raise ValueError(f"Unknown sweep parameter '{param}'")
+            conditions.append(f"r.{param} = ?")
+            args.append(value)
+        if batch is not None:
+            conditions.append("r.batch = ?")
+            args.append(batch)
+        sql = (f"SELECT {columns + ', ' if columns else ''}t.test_id, COUNT(*), SUM(t.passed), "
+               f"MIN(t.margin), AVG(t.margin), MAX(t.margin) "
+               f"FROM results t JOIN runs r ON r.id = t.run_id "
+               f"{'WHERE ' + ' AND '.join(conditions) if conditions else ''} "
+               f"GROUP BY {columns + ', ' if columns else ''}t.test_id "
+               f"ORDER BY t.test_id{', ' + columns if columns else ''}")
+        return [p.upper() for p in by] + ["TestID", "Runs", "Pass", "Min", "Avg", "Max"], \
+            self.conn.execute(sql, args).fetchall()
+
+    def timing_history(self, limit=5000):
+        """
+        Stage timings of the most recent runs that recorded them, newest
+        first: [{"test_ids", "backend", "duration", "stages": {stage: s}}].
+        """
+        rows = self.conn.execute(
+            "SELECT r.id, r.test_ids, r.backend, r.duration, s.stage, s.duration FROM runs r "
+            "JOIN stages s ON s.run_id = r.id "
+            "WHERE r.id IN (SELECT DISTINCT run_id FROM stages ORDER BY run_id DESC LIMIT ?) "
+            "ORDER BY r.id DESC", (limit,)).fetchall()
+        history = {}
+        for run_id, test_ids, backend, duration, stage, seconds in rows:
+            entry = history.setdefault(run_id, {"test_ids": json.loads(test_ids) if test_ids else None,
+                                                "backend": backend, "duration": duration, "stages": {}})
+            entry["stages"][stage] = seconds
+        return list(history.values())
+
+    def batches(self):
+        """Returns [(batch, run count, first start)] newest first."""
+        return self.conn.execute(
+            "SELECT batch, COUNT(*), MIN(started) FROM runs GROUP BY batch ORDER BY MIN(started) DESC").fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+def print_table(header, rows):
+    widths = [max([len(str(h))] + [len(_fmt(row[i])) for row in rows]) for i, h in enumerate(header)]
+    print(" | ".join(f"{h:>{w}}" for h, w in zip(header, widths)))
+    print("-+-".join("-" * w for w in widths))
+    for row in rows:
+        print(" | ".join(f"{_fmt(v):>{w}}" for v, w in zip(row, widths)))
+
+def _fmt(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return str(value)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the batch results store.")
+    parser.add_argument("--db", default=os.path.join(os.path.dirname(__file__), '..', 'results.db'),
+                        help="SQLite database (default: results.db in the project root)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    margins = sub.add_parser("margins", help="Margin vs sweep parameter table")
+    margins.add_argument("--by", default="eq", help="Comma separated parameters to group by (eq,sw,fg)")
+    margins.add_argument("--test-id", type=int, default=None)
+    margins.add_argument("--where", action="append", default=[], help="Fixed parameter, e.g. sw=1 (repeatable)")
+    margins.add_argument("--batch", default=None)
+    sub.add_parser("batches", help="List stored batches")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"Error: Results database not found: {args.db}")
+        sys.exit(1)
+    store = ResultsStore(args.db)
+    start = time.time()
+    if args.command == "batches":
+        header = ["Batch", "Runs", "Started"]
+        rows = [(b, n, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t))) for b, n, t in store.batches()]
+    else:
+        where = {}
+        for item in args.where:
+            param, _, value = item.partition("=")
+            where[param.strip().lower()] = int(value)
+        header, rows = store.margin_table(by=[p.strip().lower() for p in args.by.split(",") if p.strip()],
+                                          test_id=args.test_id, where=where, batch=args.batch)
+    elapsed = time.time() - start
+    print_table(header, rows)
+    print(f"\n{len(rows)} rows in {elapsed * 1000:.1f} ms")
+    store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+import os
+import time
+import logging
+import datetime
+
+from verify_instrument import measure_instrument_tests, save_instrument_project, export_instrument_report, DEFAULT_CONFIG_PATH
+from instrument_control import KeysightController, ScopeSession
+from instrument_backends import get_backend
+from project_templates import ProjectTemplateCache
+from result_cache import ResultCache
+from dut_control_client import DutControlClient
+from macro_compiler import MacroCompiler
+from pipeline import Stage
+from tracing import span
+
+def configure_dut(dut_client, dut_commands, compiler, logger, compiled=None):
+    """
+    Compiles a run's dut_commands (write_register lines and eq/sw/fg macros)
+    into the minimal ordered register writes and sends them: one batched
+    write_registers() request per write segment and one send_commands() call
+    per group of raw commands the compiler does not understand.
+    compiled is the already compiled run, if any.
+    Returns (compiled_run, failed_count).
+    """
+    if compiled is None:
+        compiled = compiler.compile(dut_commands)
+    failures = 0
+    for cmd, error in compiled.errors:
+        logger.info(f"  Sending: {cmd}")
+        logger.info(f"  Response: {error}")
+        logger.warning(f"  Command failed, continuing run anyway...")
+        failures += 1
+
+    # Read-modify-write base values: shadow, then DUT read, then spec default
+    read_value = compiler.with_defaults(dut_client.get_register_value)
+    write_count = 0
+    raw_group = []
+    segments = compiled.segments + [None]  # sentinel flushes the last raw group
+    for segment in segments:
+        if isinstance(segment, str):
+            raw_group.append(segment)
+            continue
+        if raw_group:
+            for cmd, resp in zip(raw_group, dut_client.send_commands(raw_group)):
+                logger.info(f"  Sending: {cmd}")
+                logger.info(f"  Response: {resp}")
+                if resp is None or "Error" in str(resp):
+                    logger.warning(f"  Command failed, continuing run anyway...")
+                    failures += 1
+            raw_group = []
+        if segment is None:
+            break
+        writes = segment.resolve(read_value)
+        write_count += len(writes)
+        for (slave, offset, value), status in zip(writes, dut_client.write_registers(writes)):
+            logger.info(f"  Write 0x{slave:02x}:0x{offset:02x} = 0x{value:02x} -> {status}")
+            if status != "OK":
+                logger.warning(f"  Command failed, continuing run anyway...")
+                failures += 1
+
+    logger.info(f"  Compiled {compiled.source_commands} commands into {write_count} register writes"
+                f" and {sum(isinstance(x, str) for x in compiled.segments)} raw commands")
+    return compiled, failures
+
+
+class RunExecutor:
+    """
+    Executes batch runs against one DUT server and one scope, as five stages:
+    "prepare" (compile the DUT commands), "dut" (configure registers),
+    "measure" (prepare project, run tests, get results), "save" (save
+    project) and "export" (export PDF).
+    execute() runs them back to back; pipeline_stages() describes them for a
+    PipelineExecutor. Stage methods take and update a run state dict.
+    With a BatchJournal, every stage completion and its outputs are journaled,
+    and stages a previous (crashed) batch already completed are skipped.
+    """
+    # Stages whose effect does not survive a crash (DUT registers may have been
+    # reset): redone on resume unless every stage depending on them is done.
+    VOLATILE_STAGES = ("dut",)
+    # State keys each stage produces, journaled so a resumed run can skip it
+    STAGE_OUTPUTS = {"dut": ("macros", "writes_skipped", "dut_failures", "registers", "raw_commands"),
+                     "measure": ("results", "cache_key", "cached_report")}
+
+    def __init__(self, common, logger=None, journal=None, store=None, batch_id=None, use_cache=True):
+        self.common = common
+        self.logger = logger if logger else logging.getLogger("RunExecutor")
+        self.journal = journal
+        self.store = store
+        self.batch_id = batch_id
+        self.instrument_ip = common.get("instrument_ip")
+        self.default_test_ids = common.get("default_test_ids", [])
+        self.base_dir = common.get("base_directory")
+        self.config_path = common.get("scope_config_path")
+
+        dut_ip = common.get("dut_server_ip")
+        dut_port = common.get("dut_server_port", 13000)
+        # Initialize DUT Configuration
+        self.logger.info(f"Connecting to DUT Server at {dut_ip}:{dut_port}...")
+        # Persistent mode: one pooled connection carries every command of the batch.
+        # "dut_framed": true pipelines a run's commands over the framed protocol.
+        # "dut_shadow" (default on) skips writes whose value the DUT already holds.
+        self.dut_client = DutControlClient(server_ip=dut_ip, server_port=dut_port, logger=self.logger,
+                                           persistent=True, framed=common.get("dut_framed", False),
+                                           shadow=common.get("dut_shadow", True))
+
+        # "compile_macros": false sends eq/sw/fg macros to the server unchanged
+        self.compiler = MacroCompiler(logger=self.logger, macros=None if common.get("compile_macros", True) else {})
+
+        # "scope_backend" selects the scope backend ("auto", "dotnet", "sim",
+        # "replay", "mock"), with constructor arguments in "scope_backend_options"
+        # (e.g. {"db_path": "results.db"} for replay). Loaded on first connect.
+        self.backend = get_backend(common.get("scope_backend"), **common.get("scope_backend_options", {}))
+        self.backend.attach_dut(self.dut_client)
+
+        # "scope_session" (default on) connects to the scope once for the batch
+        self.session = ScopeSession(self.instrument_ip, logger=self.logger, backend=self.backend) \
+            if common.get("scope_session", True) else None
+
+        # "project_templates" (default on) opens a cached pre-configured project
+        # per config file instead of NewProject + full configuration every run
+        self.templates = None
+        if common.get("project_templates", True):
+            index_path = common.get("template_index", os.path.join(os.path.dirname(__file__), '..', 'project_templates.json'))
+            template_dir = common.get("template_directory", os.path.join(self.base_dir, "Templates") if self.base_dir else None)
+            self.templates = ProjectTemplateCache(index_path, template_dir=template_dir, logger=self.logger)
+
+        # "result_cache" (default off, --cache) reuses the results of an earlier
+        # run with the same register state, scope config, tests and bench;
+        # use_cache=False (--no-cache) still measures every run but refreshes
+        # the cache. Needs the register shadow to know the register state.
+        # The key only sees registers this batch wrote: set "dut_serial" (and
+        # "bench_id" after re-cabling) so a swapped board is never answered
+        # from the cache.
+        self.result_cache = None
+        self.use_cache = use_cache
+        if common.get("result_cache", False) and self.dut_client.shadow:
+            if not common.get("dut_serial"):
+                self.logger.warning("Result cache on without \"dut_serial\": a swapped DUT board would reuse "
+                                    "the previous board's results")
+            cache_path = common.get("result_cache_path", os.path.join(os.path.dirname(__file__), '..', 'result_cache.json'))
+            self.result_cache = ResultCache(cache_path, ttl=common.get("result_cache_ttl_hours", 168) * 3600,
+                                            max_entries=common.get("result_cache_max_entries", 5000), logger=self.logger)
+
+    def new_state(self, run):
+        """Creates the state dict that the stages of one run share."""
+        report_name = run.get("report_name")
+        resumed = self.journal.completed_stages(run["name"]) if self.journal else {}
+        # Add timestamp to report name (a resumed run keeps its original name)
+        if self.journal and self.journal.report_name(run["name"]):
+            report_name = self.journal.report_name(run["name"])
+        elif report_name:
+            timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M")
+            name, ext = os.path.splitext(report_name)
+            report_name = f"{name}_{timestamp}{ext}"
+        state = {
+            "run": run,
+            "name": run["name"],
+            "project_name": run.get("project_name"),
+            "report_name": report_name,
+            "test_ids": run.get("test_ids", self.default_test_ids),
+            "config_path": run.get("config_path", self.config_path),
+            "macros": {},
+            "writes_skipped": 0,
+            "dut_failures": 0,
+            "registers": {},
+            "raw_commands": [],
+            "compiled": None,
+            "results": None,
+            "cache_key": None,
+            "cached_report": None,  # earlier report whose results were reused
+            "scope": None,
+            "stage_times": {},
+            "failed_stages": [],
+            "duration": 0.0,
+            "skip_stages": set(),
+            "resumed_time": 0.0,  # time spent on the skipped stages before the crash
+        }
+        if resumed:
+            stages = self.pipeline_stages()
+            for volatile in self.VOLATILE_STAGES:
+                dependents = [s.name for s in stages if volatile in s.deps]
+                if any(name not in resumed for name in dependents):
+                    resumed.pop(volatile, None)
+            for stage_name, event in resumed.items():
+                state.update(event.get("data", {}))
+                state["stage_times"][stage_name] = event.get("duration", 0.0)
+            state["skip_stages"] = set(resumed)
+            state["resumed_time"] = sum(state["stage_times"].values())
+            self.logger.info(f"[{state['name']}] Resuming, already completed: {sorted(resumed) or 'nothing, retrying'}")
+        if self.journal:
+            self.journal.start_run(state["name"], state["report_name"])
+        return state
+
+    # --- Stages ---
+
+    def prepare(self, state):
+        """Compiles the run's DUT commands; needs neither the DUT nor the scope."""
+        state["compiled"] = self.compiler.compile(state["run"].get("dut_commands", []))
+
+    def configure_dut(self, state):
+        run_name = state["name"]
+        self.logger.info(f"==================================================")
+        self.logger.info(f"STARTING RUN: {run_name}")
+        self.logger.info(f"==================================================")
+
+        # 1. Configure DUT
+        self.logger.info(f"[{run_name}] Configuring DUT...")
+        dut_client = self.dut_client
+        if dut_client.shadow:
+            dut_client.shadow.reset_stats()
+            # "resync_shadow": true re-reads the cached registers first, e.g.
+            # after the DUT was power cycled between runs
+            if state["run"].get("resync_shadow"):
+                stale = dut_client.resync_shadow()
+                self.logger.info(f"[{run_name}] Register shadow resynced ({stale} stale entries)")
+        compiled, state["dut_failures"] = configure_dut(dut_client, state["run"].get("dut_commands", []),
+                                                        self.compiler, self.logger, compiled=state["compiled"])
+        state["macros"] = dict(compiled.macros)
+        state["raw_commands"] = [seg for seg in compiled.segments if isinstance(seg, str)]
+        if dut_client.shadow:
+            state["registers"] = {f"0x{s:02x}:0x{o:02x}": v for (s, o), v in sorted(dut_client.shadow.snapshot().items())}
+            state["writes_skipped"] = dut_client.shadow.skipped
+            self.logger.info(f"[{run_name}] Register writes: {dut_client.shadow.sent} sent, {state['writes_skipped']} skipped (already in place)")
+
+    def measure(self, state):
+        # 2. Run Instrument Tests
+        self.logger.info(f"[{state['name']}] Running Instrument Tests...")
+        self.logger.info(f"--- Starting Instrument Tests: {state['project_name']} ---")
+        # A failed DUT command leaves the register state unknown: no cache
+        if self.result_cache and not state["dut_failures"]:
+            state["cache_key"] = ResultCache.make_key(
+                state["registers"], state["config_path"] or DEFAULT_CONFIG_PATH, state["test_ids"],
+                bench=self._bench_identity(), raw_commands=state["raw_commands"])
+            entry = self.result_cache.lookup(state["cache_key"]) if self.use_cache else None
+            if entry:
+                state["results"] = entry["results"]
+                state["cached_report"] = entry["report_name"]
+                self.logger.info(f"[{state['name']}] Identical run found in result cache, "
+                                 f"reusing results of {entry['report_name']}")
+                return
+        scope = self._acquire_scope(state)
+        # "run_poll_interval" / "run_timeout" (seconds) control completion polling
+        results = measure_instrument_tests(scope, state["test_ids"], config_path=state["config_path"],
+                                           force_full_config=self.common.get("force_full_config", False),
+                                           templates=self.templates,
+                                           poll_interval=self.common.get("run_poll_interval", 2),
+                                           run_timeout=self.common.get("run_timeout"),
+                                           progress=self._progress_logger(state))
+        if results is None:
+            raise RuntimeError("Scope project could not be prepared or the test run did not complete")
+        state["results"] = results
+
+    def _bench_identity(self):
+        bench = {"dut": f"{self.dut_client.server_ip}:{self.dut_client.server_port}", "scope": self.instrument_ip}
+        for key in ("dut_serial", "bench_id"):
+            if self.common.get(key):
+                bench[key] = self.common[key]
+        # Simulated/replayed/mock results must never answer for the real scope
+        backend = self.backend_name()
+        if backend != "dotnet":
+            bench["backend"] = backend
+        return bench
+
+    def backend_name(self):
+        """Backend measuring this bench's runs, with "auto" resolved to what it loaded."""
+        try:
+            return self.backend.resolved_name()
+        except Exception as e:
+            self.logger.warning(f"Scope backend {self.backend.name} could not be loaded: {e}")
+            return self.backend.name
+
+    def _progress_logger(self, state, every=30):
+        """progress(elapsed) callback logging a line every `every` seconds of a scope run."""
+        last = [0.0]
+        def progress(elapsed):
+            if elapsed - last[0] >= every:
+                last[0] = elapsed
+                self.logger.info(f"[{state['name']}] Scope run in progress, {elapsed:.0f}s elapsed")
+        return progress
+
+    def _acquire_scope(self, state):
+        if state["scope"] is None:
+            if self.session:
+                scope = self.session.acquire()
+            else:
+                scope = KeysightController(self.instrument_ip, logger=self.logger, backend=self.backend)
+                if not scope.connect():
+                    scope = None
+            if scope is None:
+                raise RuntimeError("Could not connect to scope")
+            state["scope"] = scope
+        return state["scope"]
+
+    def save(self, state):
+        if state["cached_report"]:
+            return
+        if not save_instrument_project(self._acquire_scope(state), state["project_name"], self.base_dir):
+            raise RuntimeError("Project save failed")
+
+    def export(self, state):
+        if state["cached_report"]:
+            return
+        if not export_instrument_report(self._acquire_scope(state), state["report_name"], self.base_dir):
+            raise RuntimeError("PDF export failed")
+
+    def pipeline_stages(self):
+        """
+        Stage graph for PipelineExecutor. The next run's DUT configuration
+        waits only for this run's measurement (registers must hold while the
+        scope measures) and overlaps with this run's save and export. Its
+        register-independent preparation runs on its own thread, while this
+        run's scope measurement is still polling for completion; the
+        previous run's results are stored and journaled (on_complete) in
+        the same window. Save and export need the scope, which runs one
+        project at a time, so they cannot overlap a measurement.
+        """
+        return [
+            Stage("prepare", "host", self.prepare),
+            Stage("dut", "dut", self._journaled("dut", self.configure_dut), deps=["prepare"], prev_deps=["measure"]),
+            Stage("measure", "scope", self._journaled("measure", self.measure), deps=["dut"]),
+            Stage("save", "scope", self._journaled("save", self.save), deps=["measure"]),
+            Stage("export", "scope", self._journaled("export", self.export), deps=["measure"]),
+        ]
+
+    def _journaled(self, stage_name, fn):
+        """Wraps a stage: skips it if resumed, journals its completion otherwise."""
+        def run_stage(state):
+            if stage_name in state["skip_stages"]:
+                self.logger.info(f"[{state['name']}] Stage '{stage_name}' already completed, skipping")
+                return
+            t0 = time.time()
+            try:
+                with span(f"stage.{stage_name}", run=state["name"]):
+                    fn(state)
+            except Exception:
+                state["failed_stages"].append(stage_name)
+                if self.journal:
+                    self.journal.record_stage(state["name"], stage_name, False, time.time() - t0)
+                raise
+            if self.journal:
+                data = {key: state[key] for key in self.STAGE_OUTPUTS.get(stage_name, ())}
+                self.journal.record_stage(state["name"], stage_name, True, time.time() - t0, data)
+        return run_stage
+
+    # --- Serial path ---
+
+    def execute(self, run):
+        """Runs every stage of one run back to back. Returns the run state."""
+        state = self.new_state(run)
+        run_start_time = time.time()
+        ok = {}
+        for stage in self.pipeline_stages():
+            failed_deps = [name for name in stage.deps if not ok.get(name)]
+            if failed_deps:
+                self.logger.warning(f"[{state['name']}] Skipping stage '{stage.name}': {failed_deps} failed")
+                ok[stage.name] = False
+                continue
+            t0 = time.time()
+            try:
+                stage.fn(state)
+                ok[stage.name] = True
+            except Exception as e:
+                self.logger.error(f"[{state['name']}] Stage '{stage.name}' failed: {e}")
+                ok[stage.name] = False
+            if stage.name not in state["skip_stages"]:
+                state["stage_times"][stage.name] = time.time() - t0
+        state["duration"] = time.time() - run_start_time + state["resumed_time"]
+        self.logger.info(f"[{state['name']}] Run Complete. Duration: {state['duration']:.2f}s\n")
+        return state
+
+    def finish_run(self, state):
+        """
+        Stores the run's results, journals it as complete and returns its
+        results_summary rows.
+        """
+        rows = self.summary_rows(state)
+        if self.result_cache and state["cache_key"] and state["results"] and not state["cached_report"]:
+            self.result_cache.store(state["cache_key"], state["results"], state["report_name"], state["project_name"])
+        if self.store:
+            try:
+                self.store.record_run(self.batch_id, state["name"], state["report_name"], state["macros"],
+                                      state["registers"], state["results"], state["duration"],
+                                      test_ids=state["test_ids"], backend=self.backend_name(),
+                                      stage_times=self.measured_stage_times(state))
+            except Exception as e:
+                self.logger.error(f"[{state['name']}] Could not store results: {e}")
+        if self.journal:
+            # A run with a failed stage is retried by --resume
+            self.journal.complete_run(state["name"], rows, ok=not state["failed_stages"])
+        return rows
+
+    def measured_stage_times(self, state):
+        """Stage times for the duration history; a cache hit did not measure, save or export."""
+        if state["cached_report"]:
+            return {name: t for name, t in state["stage_times"].items() if name == "dut"}
+        return dict(state["stage_times"])
+
+    def summary_rows(self, state):
+        """Flattens a finished run state into results_summary rows."""
+        macros = state["macros"]
+        common_row = {
+            "Run": state["name"],
+            "ReportName": state["cached_report"] or state["report_name"],
+            "EQ": str(macros.get("eq", "-")), "SW": str(macros.get("sw", "-")), "FG": str(macros.get("fg", "-")),
+            "Duration": state["duration"],
+            "WritesSkipped": state["writes_skipped"],
+            "Cached": bool(state["cached_report"]),
+        }
+        if not state["results"]:
+            return [dict(common_row, TestID="Error", Pass=False, Margin="N/A", Error=True)]
+        return [dict(common_row, TestID=res['test_id'], Pass=res['passed'], Margin=res['margin'])
+                for res in state["results"]]
+
+    def close(self):
+        if self.dut_client.pool:
+            self.logger.info(f"DUT connections opened: {self.dut_client.pool.connects} (reconnects: {self.dut_client.pool.reconnects})")
+        self.dut_client.close()
+        if self.session:
+            self.session.close()
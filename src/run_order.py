@@ -0,0 +1,177 @@
+import time
+import logging
+
+from macro_compiler import MacroCompiler
+from instrument_control import parse_config_file
+from verify_instrument import DEFAULT_CONFIG_PATH
+
+# 2-opt is O(n^2) per pass; larger batches keep the greedy order
+MAX_TWO_OPT_RUNS = 1500
+MAX_TWO_OPT_PASSES = 20
+
+class RunOrderPlanner:
+    """
+    Reorders a batch's runs so consecutive runs differ in as few DUT
+    registers and scope config keys as possible: a nearest-neighbour tour
+    over the pairwise transition costs, improved with 2-opt.
+    The transition cost from run A to run B is the number of registers B
+    writes with a value A did not leave behind (writes the register shadow
+    cannot skip), plus config_weight x the scope config keys whose values
+    differ (SetConfig calls the acknowledged-config diff cannot skip).
+    Both orders are then simulated to report the transactions saved.
+    Args:
+        common (dict): common_settings (scope_config_path, compile_macros).
+        config_weight (float): Cost of one SetConfig relative to one
+                               register write.
+    """
+    def __init__(self, common, config_weight=1.0, logger=None):
+        self.logger = logger if logger else logging.getLogger("RunOrderPlanner")
+        self.config_weight = config_weight
+        self.default_config_path = common.get("scope_config_path") or DEFAULT_CONFIG_PATH
+        self.compiler = MacroCompiler(logger=self.logger, macros=None if common.get("compile_macros", True) else {})
+        self._configs = {}
+        self.report = None
+
+    def _read_default(self, state):
+        register_map = self.compiler.register_map
+        def read(slave_addr, reg_offset):
+            value = state.get((slave_addr, reg_offset))
+            if value is None:
+                value = register_map.default_value(slave_addr, reg_offset)
+            return value if value is not None else 0
+        return read
+
+    def _config(self, run):
+        """{key: str(value)} the scope is configured with for run."""
+        path = run.get("config_path", self.default_config_path)
+        if path not in self._configs:
+            try:
+                config = parse_config_file(path) if path else {}
+            except Exception as e:
+                self.logger.warning(f"Could not read scope config {path} for planning: {e}")
+                config = {}
+            self._configs[path] = {str(k): str(v) for k, v in config.items() if not str(k).startswith("_")}
+        return self._configs[path]
+
+    def _apply(self, compiled, state):
+        """Applies a compiled run to a simulated register state. Returns (writes sent, raw commands)."""
+        writes = raw = 0
+        for transaction in compiled.resolve(self._read_default(state)):
+            if transaction[0] == "raw":
+                raw += 1
+                continue
+            _, slave_addr, reg_offset, value = transaction
+            if state.get((slave_addr, reg_offset)) != value:
+                writes += 1
+                state[(slave_addr, reg_offset)] = value
+        return writes, raw
+
+    def simulate(self, runs, compiled):
+        """(register writes + raw commands, SetConfig calls) of executing runs in this order."""
+        state, acked = {}, {}
+        dut, config_calls = 0, 0
+        for run in runs:
+            writes, raw = self._apply(compiled[run["name"]], state)
+            dut += writes + raw
+            desired = self._config(run)
+            config_calls += sum(1 for k, v in desired.items() if acked.get(k) != v)
+            acked.update(desired)
+        return dut, config_calls
+
+    def plan(self, runs):
+        """Returns the runs in planned order; self.report describes the savings."""
+        runs = list(runs)
+        if len(runs) < 3:
+            return runs
+        start = time.time()
+        compiled = {run["name"]: self.compiler.compile(run.get("dut_commands", [])) for run in runs}
+        # Each run's own register writes (from reset values) and config, as sets
+        targets = []
+        for run in runs:
+            state = {}
+            self._apply(compiled[run["name"]], state)
+            targets.append((frozenset(state.items()), frozenset(self._config(run).items())))
+
+        # Node 0 is the unknown state before the first run
+        nodes = [(frozenset(), frozenset())] + targets
+        weight = self.config_weight
+        cost = [[len(b_regs - a_regs) + weight * len(b_cfg - a_cfg) for b_regs, b_cfg in nodes]
+                for a_regs, a_cfg in nodes]
+
+        order = _nearest_neighbour(cost)
+        if len(order) <= MAX_TWO_OPT_RUNS + 1:
+            order = _two_opt(cost, order)
+        planned = [runs[i - 1] for i in order[1:]]
+
+        original = self.simulate(runs, compiled)
+        optimized = self.simulate(planned, compiled)
+        if sum(optimized) > sum(original):
+            # The pairwise costs are an approximation; never make things worse
+            planned, optimized = runs, original
+        self.report = {
+            "runs": len(runs),
+            "original_dut": original[0], "original_config": original[1],
+            "planned_dut": optimized[0], "planned_config": optimized[1],
+            "moved": sum(1 for a, b in zip(runs, planned) if a is not b),
+            "plan_time": time.time() - start,
+        }
+        self.logger.info(f"Run order planned in {self.report['plan_time']:.2f} s: {self.report['moved']} of "
+                         f"{len(runs)} runs moved, DUT transactions {original[0]} -> {optimized[0]}, "
+                         f"SetConfig calls {original[1]} -> {optimized[1]}")
+        return planned
+
+    def report_line(self):
+        if not self.report:
+            return None
+        r = self.report
+        saved = (r["original_dut"] - r["planned_dut"]) + (r["original_config"] - r["planned_config"])
+        return (f"Run order optimized: {r['moved']} of {r['runs']} runs moved, "
+                f"DUT transactions {r['original_dut']} -> {r['planned_dut']}, "
+                f"SetConfig calls {r['original_config']} -> {r['planned_config']} "
+                f"(~{saved} transactions saved)")
+
+
+def _nearest_neighbour(cost):
+    """Greedy path from node 0 through every node. Ties keep the original order."""
+    remaining = list(range(1, len(cost)))
+    order = [0]
+    while remaining:
+        row = cost[order[-1]]
+        best = min(remaining, key=lambda node: row[node])
+        remaining.remove(best)
+        order.append(best)
+    return order
+
+def _two_opt(cost, order):
+    """
+    Improves an open path (node order[0] fixed) by reversing segments while
+    that lowers the total cost. Costs may be asymmetric, so the reversed
+    segment's inner edges are re-costed via prefix sums.
+    """
+    n = len(order)
+
+    def prefix_sums():
+        forward, backward = [0.0] * n, [0.0] * n
+        for k in range(1, n):
+            forward[k] = forward[k - 1] + cost[order[k - 1]][order[k]]
+            backward[k] = backward[k - 1] + cost[order[k]][order[k - 1]]
+        return forward, backward
+
+    for _ in range(MAX_TWO_OPT_PASSES):
+        forward, backward = prefix_sums()
+        improved = False
+        for i in range(1, n - 1):
+            for j in range(i + 1, n):
+                before = order[i - 1]
+                old = cost[before][order[i]] + forward[j] - forward[i]
+                new = cost[before][order[j]] + backward[j] - backward[i]
+                if j + 1 < n:
+                    old += cost[order[j]][order[j + 1]]
+                    new += cost[order[i]][order[j + 1]]
+                if new < old - 1e-9:
+                    order[i:j + 1] = reversed(order[i:j + 1])
+                    forward, backward = prefix_sums()
+                    improved = True
+        if not improved:
+            break
+    return order
@@ -0,0 +1,225 @@
+import time
+import logging
+import threading
+
+from macro_compiler import RegisterMap, DP_SLAVE_ADDR
+from instrument_backends import InstrumentBackend
+
+# Seconds per operation on the real bench (rough figures for an ANX7483 DP
+# compliance setup); scaled by SimBench(scale=...) for fast benchmarks.
+DEFAULT_LATENCY = {
+    "connect": 2.0,        # GetRemoteAte
+    "probe": 0.05,         # SuppressMessages read (session health probe)
+    "set_config": 0.15,    # each SetConfig call
+    "new_project": 3.0,
+    "open_project": 2.0,
+    "run_base": 20.0,      # Run() overhead (signal acquisition setup)
+    "run_per_test": 30.0,  # per selected test ID
+    "get_results": 0.5,
+    "save_project": 4.0,
+    "export_pdf": 8.0,
+    "i2c": 0.002,          # each I2C register read or write
+}
+
+# Lane 0 registers of the swept fields (see macro_compiler.MACROS)
+EQ_REG, FG_REG, SW_REG = 0x16, 0x18, 0x1A
+
+class SimBench:
+    """
+    Simulated DUT + scope bench with realistic, configurable latencies, so
+    batch performance can be measured without hardware.
+    - i2c_driver() returns a driver for dut_control_server (module global
+      `driver`) that keeps register contents and sleeps per transaction.
+    - backend() returns a scope backend (instrument_backends) whose remote
+      classes share this bench.
+    Margins come from margin_model(fields, test_id), where fields holds the
+    DUT's current lane 0 EQ/SW/FG values, so sweeps produce a smooth,
+    reproducible margin surface. The register values come from the bench's
+    own I2C driver once one is handed out, else from attach_registers()
+    (the batch's DUT client, when the DUT server runs elsewhere).
+    Args:
+        latency (dict): Overrides for DEFAULT_LATENCY entries.
+        scale (float): Multiplier applied to every latency.
+    """
+    def __init__(self, latency=None, scale=1.0, margin_model=None, logger=None):
+        self.logger = logger if logger else logging.getLogger("SimBench")
+        self.latency = dict(DEFAULT_LATENCY, **(latency or {}))
+        self.scale = scale
+        self.margin_model = margin_model if margin_model else default_margin_model
+        self.register_map = RegisterMap.from_markdown()
+        self.registers = {}
+        self.driven = False        # an i2c_driver() of this bench serves the DUT server
+        self.register_reader = None
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def delay(self, op, count=1):
+        with self._lock:
+            self.counts[op] = self.counts.get(op, 0) + count
+        seconds = self.latency.get(op, 0.0) * count * self.scale
+        if seconds > 0:
+            time.sleep(seconds)
+        return seconds
+
+    def attach_registers(self, reader):
+        """reader(slave_addr, reg_offset) -> value or None; unused while the bench drives the DUT server."""
+        self.register_reader = reader
+
+    def register_value(self, slave_addr, reg_offset):
+        if self.register_reader and not self.driven:
+            value = self.register_reader(slave_addr, reg_offset)
+        else:
+            value = self.registers.get((slave_addr, reg_offset))
+        if value is None:
+            value = self.register_map.default_value(slave_addr, reg_offset) or 0
+        return value
+
+    def field_values(self):
+        """Current lane 0 EQ/SW/FG field values of the DUT."""
+        values = {}
+        for name, field_name, offset in (("eq", "UTX2_EQ_CAP", EQ_REG), ("fg", "UTX2_VGA_GAIN", FG_REG),
+                                         ("sw", "UTX2_DRV_SWING", SW_REG)):
+            field = self.register_map.fields.get(field_name)
+            if field is not None:
+                values[name] = (self.register_value(DP_SLAVE_ADDR, offset) & field.mask) >> field.lsb
+        return values
+
+    def i2c_driver(self):
+        self.driven = True
+        return SimI2CDriver(self)
+
+    def backend(self):
+        return SimBackend(bench=self)
+
+
+class SimBackend(InstrumentBackend):
+    """
+    Scope backend ("sim") driving a SimBench; a new bench is created from
+    latency/scale if none is given. attach_dut() reads the registers that
+    shape the margins through the batch's DUT client; drive_server() lets
+    the bench hold them itself instead.
+    """
+    name = "sim"
+
+    def __init__(self, bench=None, latency=None, scale=1.0, logger=None):
+        super().__init__(logger=logger)
+        self.bench = bench if bench else SimBench(latency=latency, scale=scale)
+
+    def attach_dut(self, dut_client):
+        self.bench.attach_registers(dut_client.get_register_value)
+
+    def drive_server(self, server_module):
+        """
+        Replaces the I2C driver of a dut_control_server module (running in
+        this process) with the bench's own, so register writes reach it
+        without a DUT client round trip.
+        """
+        server_module.driver = self.bench.i2c_driver()
+
+    def _load(self):
+        bench = self.bench
+
+        class SimRemoteAteUtilities:
+            @staticmethod
+            def GetRemoteAte(ip):
+                bench.delay("connect")
+                return SimRemoteObj(bench, ip)
+
+        return {"RemoteAteUtilities": SimRemoteAteUtilities, "IRemoteAte": SimRemoteApp,
+                "OpenProjectOptions": SimOptions, "SaveProjectOptions": SimOptions, "ExportPdfOptions": SimOptions}
+
+
+def default_margin_model(fields, test_id):
+    """Smooth margin surface peaking at EQ 10, SW 2, FG 1, offset per test."""
+    eq, sw, fg = fields.get("eq", 0), fields.get("sw", 0), fields.get("fg", 0)
+    return 12.0 - 0.25 * (eq - 10) ** 2 - 1.5 * (sw - 2) ** 2 - 1.0 * (fg - 1) ** 2 - (test_id % 7) * 0.3
+
+
+class SimI2CDriver:
+    def __init__(self, bench):
+        self.bench = bench
+
+    def write(self, slave_addr, reg_offset, val):
+        self.bench.delay("i2c")
+        self.bench.registers[(slave_addr, reg_offset)] = val
+        return True
+
+    def read(self, slave_addr, reg_offset):
+        self.bench.delay("i2c")
+        return self.bench.register_value(slave_addr, reg_offset)
+
+
+class SimRemoteObj:
+    def __init__(self, bench, ip):
+        self.bench = bench
+        self.ip = ip
+
+
+class SimOptions:
+    FullPath = ""
+    DiscardUnsaved = False
+    Name = ""
+    OverwriteExisting = False
+    FileName = ""
+    Path = ""
+    BaseDirectory = ""
+
+
+class SimRemoteApp:
+    def __init__(self, remote_obj):
+        self.bench = remote_obj.bench
+        self.SelectedTests = []
+        self._suppress = False
+        self.IsRunning = False
+        self._stop = threading.Event()
+
+    @property
+    def SuppressMessages(self):
+        self.bench.delay("probe")
+        return self._suppress
+
+    @SuppressMessages.setter
+    def SuppressMessages(self, value):
+        self._suppress = value
+
+    def SetConfig(self, key, value):
+        self.bench.delay("set_config")
+
+    def NewProject(self, discard_unsaved):
+        self.bench.delay("new_project")
+
+    def OpenProjectCustom(self, options):
+        self.bench.delay("open_project")
+
+    def Run(self):
+        self.IsRunning = True
+        self._stop.clear()
+        tests = len(list(self.SelectedTests or []))
+        seconds = (self.bench.latency["run_base"] + self.bench.latency["run_per_test"] * tests) * self.bench.scale
+        self.bench.counts["run"] = self.bench.counts.get("run", 0) + 1
+        # Interruptible by Stop()
+        self._stop.wait(seconds)
+        self.IsRunning = False
+
+    def Stop(self):
+        self._stop.set()
+
+    def GetResults(self):
+        self.bench.delay("get_results")
+        fields = self.bench.field_values()
+        lines = []
+        for test_id in self.SelectedTests or []:
+            margin = self.bench.margin_model(fields, int(test_id))
+            lines.append(f"TestID={test_id},Passed={margin > 0},Margin={margin:.3f}")
+        return "\n".join(lines)
+
+    def SaveProjectCustom(self, options):
+        self.bench.delay("save_project")
+        return f"C:\\SimBench\\{options.Name}.dpj"
+
+    def ExportResultsPdfCustom(self, options):
+        self.bench.delay("export_pdf")
+        return f"C:\\SimBench\\{options.FileName}"
+
+    def Wait(self, ms):
+        pass
@@ -0,0 +1,67 @@
+import itertools
+
+# Sweep section keys that describe the grid rather than being copied into runs
+SWEEP_KEYS = ("axes", "init_commands", "commands", "name", "project_name", "report_name")
+
+def expand_axis(spec):
+    """
+    Values of one sweep axis, as a list or a lazy range.
+    Args:
+        spec: A list of values, or {"start": 0, "stop": 15, "step": 1}
+              (stop inclusive).
+    """
+    if isinstance(spec, dict):
+        step = spec.get("step", 1)
+        stop = spec["stop"] + (1 if step > 0 else -1)
+        return range(spec.get("start", 0), stop, step)
+    return list(spec)
+
+def sweep_size(sweep):
+    """Number of runs a sweep section produces, without generating them."""
+    size = 1
+    for spec in sweep.get("axes", {}).values():
+        size *= len(expand_axis(spec))
+    return size
+
+def generate_sweep_runs(sweep):
+    """
+    Yields run definitions for every point of the sweep grid, lazily (the
+    last axis varies fastest). Sweep section keys:
+        axes (dict): {"eq": {"start": 0, "stop": 15}, "sw": [0, 1, 2, 3], ...}
+        init_commands (list): dut_commands sent before the sweep commands
+                              of every run (fixed register writes).
+        commands (list): Per-point commands, formatted with the axis values.
+                         Defaults to "<axis> {<axis>}" for every axis,
+                         i.e. the eq/sw/fg macros.
+        name, project_name, report_name (str): Templates formatted with the
+                         axis values and {index}, e.g. "Run_EQ{eq}_SW{sw}".
+        test_ids (list): Optional, otherwise default_test_ids.
+        Any other key is copied into every run unchanged.
+    """
+    axes = sweep.get("axes", {})
+    names = list(axes)
+    for index, values in enumerate(itertools.product(*(expand_axis(axes[name]) for name in names))):
+        yield make_sweep_run(sweep, dict(zip(names, values)), index)
+
+def make_sweep_run(sweep, point, index):
+    """Run definition for one sweep point {"eq": 14, ...} (see generate_sweep_runs)."""
+    names = list(sweep.get("axes", {}))
+    commands = sweep.get("commands", [f"{name} {{{name}}}" for name in names])
+    fields = dict(point, index=index)
+    run = {k: v for k, v in sweep.items() if k not in SWEEP_KEYS}
+    run["dut_commands"] = list(sweep.get("init_commands", [])) + [cmd.format(**fields) for cmd in commands]
+    run["name"] = sweep.get("name", "Sweep_" + "_".join(f"{n.upper()}{{{n}}}" for n in names)).format(**fields)
+    for key in ("project_name", "report_name"):
+        if key in sweep:
+            run[key] = sweep[key].format(**fields)
+    run["sweep_point"] = dict(point)
+    return run
+
+def iter_batch_runs(config):
+    """Yields the explicit runs[] of a batch config, then its sweep runs."""
+    yield from config.get("runs", [])
+    if config.get("sweep"):
+        yield from generate_sweep_runs(config["sweep"])
+
+def count_batch_runs(config):
+    return len(config.get("runs", [])) + (sweep_size(config["sweep"]) if config.get("sweep") else 0)
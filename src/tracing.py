@@ -0,0 +1,124 @@
+import os
+import json
+import time
+import threading
+import functools
+
+class Tracer:
+    """
+    Collects nested timing spans from any thread. Spans are recorded as
+    Chrome "complete" events, so the export opens in chrome://tracing or
+    ui.perfetto.dev with nesting shown per thread. Recording is a no-op
+    until enable() is called.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.thread_names = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def enable(self):
+        self.enabled = True
+
+    def reset(self):
+        with self._lock:
+            self.events = []
+            self.thread_names = {}
+        self._origin = time.perf_counter()
+
+    def record(self, name, start, duration, args=None):
+        event = {
+            "name": name,
+            "cat": name.split(".", 1)[0],
+            "ph": "X",
+            "ts": (start - self._origin) * 1e6,
+            "dur": duration * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        self.thread_names.setdefault(event["tid"], threading.current_thread().name)
+        if args:
+            event["args"] = {k: str(v) for k, v in args.items()}
+        with self._lock:
+            self.events.append(event)
+
+    def export_chrome(self, path):
+        """Writes the spans as Chrome/Perfetto trace JSON."""
+        with self._lock:
+            events = list(self.events)
+        metadata = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid,
+                     "args": {"name": self.thread_names.get(tid, str(tid))}}
+                    for tid in {e["tid"] for e in events}]
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
+
+    def durations(self):
+        """{span name: [seconds, ...]}"""
+        by_name = {}
+        with self._lock:
+            for event in self.events:
+                by_name.setdefault(event["name"], []).append(event["dur"] / 1e6)
+        return by_name
+
+    def percentile_table(self):
+        """Rows (name, count, total, p50, p95, max) sorted by total time."""
+        rows = []
+        for name, values in self.durations().items():
+            values.sort()
+            rows.append((name, len(values), sum(values), _percentile(values, 50), _percentile(values, 95), values[-1]))
+        return sorted(rows, key=lambda r: r[2], reverse=True)
+
+
+def _percentile(sorted_values, pct):
+    # Nearest-rank percentile
+    index = max(0, -(-len(sorted_values) * pct // 100) - 1)
+    return sorted_values[int(index)]
+
+
+# Process-wide tracer used by span()/traced()
+tracer = Tracer()
+
+class span:
+    """
+    Context manager timing one span, e.g.
+        with span("dut.write_registers", count=len(writes)):
+            ...
+    """
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, **args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if tracer.enabled:
+            if exc_type is not None:
+                self.args["error"] = exc_type.__name__
+            tracer.record(self.name, self.start, time.perf_counter() - self.start, self.args)
+        return False
+
+def traced(name):
+    """Decorator recording every call of the function as a span."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def print_percentile_table(title="Stage timings"):
+    rows = tracer.percentile_table()
+    if not rows:
+        return
+    print(f"\n{title}:")
+    print(f"{'Span':<32} | {'Count':>6} | {'Total (s)':>9} | {'p50 (s)':>8} | {'p95 (s)':>8} | {'Max (s)':>8}")
+    for name, count, total, p50, p95, longest in rows:
+        print(f"{name:<32} | {count:>6} | {total:>9.3f} | {p50:>8.3f} | {p95:>8.3f} | {longest:>8.3f}")
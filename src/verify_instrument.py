@@ -18,121 +18,73 @@ sys.path.append('src')
 try:
     import instrument_control as ic
     from instrument_control import KeysightController
+    from tracing import span
 except ImportError:
     # If that fails, try importing as a package from root
     try:
         import src.instrument_control as ic
         from src.instrument_control import KeysightController
+        from src.tracing import span
     except ImportError as e:
         logger.error(f"Could not import instrument_control: {e}")
         sys.exit(1)
 
-# --- MOCKING INFRASTRUCTURE ---
-# Check if the DLL loaded successfully by checking for one of the expected classes
-if not hasattr(ic, 'RemoteAteUtilities'):
-    logger.warning("Keysight DLL classes not found in instrument_control. Using MOCK objects for verification.")
-    
-    class MockRemoteApp:
-        def __init__(self, remote_obj):
-            self.SelectedTests = []
-            self.SuppressMessages = False
-            self.IsRunning = False
-        
-        def SetConfig(self, key, value):
-            logger.info(f"[MOCK] SetConfig: {key} = {value}")
-
-        def OpenProjectCustom(self, options):
-            logger.info(f"[MOCK] OpenProject: {options.FullPath}")
-
-        def NewProject(self, discard_unsaved):
-            logger.info(f"[MOCK] NewProject: DiscardUnsaved={discard_unsaved}")
-
-        def Run(self):
-            logger.info("[MOCK] Run() called. Tests starting...")
-            time.sleep(1) # Simulate test duration
-            logger.info("[MOCK] Run() finished.")
-
-        def GetResults(self):
-            # Return a realistic looking result string
-            return "TestID=100,Passed=True,Margin=15.5;TestID=101,Passed=False,Margin=5.0"
-
-        def SaveProjectCustom(self, options):
-            logger.info(f"[MOCK] SaveProject: {options.Name}")
-            return "C:\\MockPath\\Project.dpj"
-
-        def ExportResultsPdfCustom(self, options):
-            logger.info(f"[MOCK] Export PDF: {options.FileName}")
-            return "C:\\MockPath\\Report.pdf"
-
-        def Wait(self, ms):
-             pass
-
-    class MockRemoteObj:
-        pass
-
-    class MockRemoteAteUtilities:
-        @staticmethod
-        def GetRemoteAte(ip):
-            logger.info(f"[MOCK] GetRemoteAte({ip}) called.")
-            return MockRemoteObj()
-    
-    class MockOptions:
-        FullPath = ""
-        DiscardUnsaved = False
-        Name = ""
-        OverwriteExisting = False
-        FileName = ""
-        Path = ""
-
-    # Inject Mocks into the instrument_control module namespace
-    logger.info("Injecting Mocks into instrument_control module...")
-    ic.RemoteAteUtilities = MockRemoteAteUtilities
-    ic.IRemoteAte = MockRemoteApp
-    ic.OpenProjectOptions = MockOptions
-    ic.SaveProjectOptions = MockOptions
-    ic.ExportPdfOptions = MockOptions
-else:
-    logger.info("Keysight DLL loaded successfully.")
+# --- BACKEND ---
+# The scope backend is chosen at runtime (instrument_backends): "auto" loads
+# the Keysight DLL on the first connect and falls back to the mock backend
+# when it is unavailable. Set SCOPE_BACKEND=mock|sim|replay|dotnet to force one.
 
 # --- VERIFICATION TEST ---
 
-def run_instrument_tests(ip_address, project_name, report_path, test_ids, config_path=None, output_base_dir=None):
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'full_config.json')
+
+def measure_instrument_tests(scope, test_ids, config_path=None, force_full_config=False, templates=None,
+                             poll_interval=2, run_timeout=None, progress=None):
     """
-    Executes instrument tests based on provided parameters.
-    Returns the results list.
+    Prepares the project on a connected scope, runs the selected tests and
+    returns the parsed results. Returns None if the project could not be
+    prepared or the run did not complete (e.g. run_timeout seconds passed).
+    poll_interval and progress are passed to wait_for_completion().
     """
     if config_path is None:
         # Default to file in the same directory if not provided
-        config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'full_config.json')
+        config_path = DEFAULT_CONFIG_PATH
 
-    logger.info(f"--- Starting Instrument Tests: {project_name} ---")
-    logger.info("--- Initializing Controller ---")
-    scope = KeysightController(ip_address, logger=logger)
-    
-    logger.info("--- Testing Connect ---")
-    if not scope.connect():
-        logger.error("Failed to connect. Aborting test.")
-        return []
-
-    logger.info("--- Testing Create New Project ---")
-    # Create new project instead of loading one
-    scope.create_new_project()
-    
-    logger.info("--- Testing Load Config ---")
-    scope.load_config_file(config_path)
+    if templates is not None:
+        logger.info("--- Preparing Project From Template ---")
+        if not templates.prepare(scope, config_path, force_full=force_full_config):
+            logger.error("Failed to prepare project. Aborting test.")
+            return None
+    else:
+        logger.info("--- Testing Create New Project ---")
+        # Create new project instead of loading one
+        scope.create_new_project()
+        
+        logger.info("--- Testing Load Config ---")
+        scope.load_config_file(config_path, force_full=force_full_config)
     
     logger.info("--- Testing Select Tests ---")
     scope.select_tests(test_ids)
     
     logger.info("--- Testing Run Tests ---")
-    scope.run_tests()
+    # start_run() returns at once; the calling thread then only polls, while
+    # the other pipeline threads keep working
+    with span("scope.Run"):
+        completed = scope.start_run() and \
+            scope.wait_for_completion(poll_interval=poll_interval, timeout=run_timeout, progress=progress)
+    if not completed:
+        logger.error("Test run did not complete. Aborting test.")
+        return None
     
     logger.info("--- Testing Get Results ---")
     results = scope.get_results()
     print("Results Received:")
     for r in results:
         print(f"  ID: {r['test_id']}, Pass: {r['passed']}, Margin: {r['margin']}")
+    return results
 
+def save_instrument_project(scope, project_name, output_base_dir=None):
+    """Saves the current project. Returns the saved path or False."""
     logger.info("--- Testing Save Project ---")
     
     # Check if project_name is absolute or relative
@@ -143,9 +95,10 @@ def run_instrument_tests(ip_address, project_name, report_path, test_ids, config
          save_name = project_name
          save_base = output_base_dir if output_base_dir else os.path.join(os.getcwd(), "Projects")
 
-    scope.save_project(save_as_path=save_name, base_directory=save_base)
-    
-    
+    return scope.save_project(save_as_path=save_name, base_directory=save_base)
+
+def export_instrument_report(scope, report_path, output_base_dir=None):
+    """Exports the results PDF. Returns the exported path or False."""
     logger.info("--- Testing Export PDF ---")
     if os.path.isabs(report_path):
         final_report_name = report_path
@@ -156,7 +109,36 @@ def run_instrument_tests(ip_address, project_name, report_path, test_ids, config
         # Do NOT create directory locally if it is remote/restricted
         # os.makedirs(os.path.dirname(final_report_path), exist_ok=True) 
 
-    scope.export_pdf(final_report_name, directory=report_base)
+    return scope.export_pdf(final_report_name, directory=report_base)
+
+def run_instrument_tests(ip_address, project_name, report_path, test_ids, config_path=None, output_base_dir=None, scope=None,
+                         force_full_config=False, templates=None):
+    """
+    Executes instrument tests based on provided parameters.
+    If scope (an already connected KeysightController, e.g. from a
+    ScopeSession) is given, it is reused instead of connecting again.
+    force_full_config sends every SetConfig key even if the scope already
+    acknowledged the same value. templates (ProjectTemplateCache) opens a
+    pre-configured project instead of NewProject + full configuration.
+    Returns the results list.
+    """
+    logger.info(f"--- Starting Instrument Tests: {project_name} ---")
+    if scope is None:
+        logger.info("--- Initializing Controller ---")
+        scope = KeysightController(ip_address, logger=logger)
+        
+        logger.info("--- Testing Connect ---")
+        if not scope.connect():
+            logger.error("Failed to connect. Aborting test.")
+            return []
+
+    results = measure_instrument_tests(scope, test_ids, config_path=config_path,
+                                       force_full_config=force_full_config, templates=templates)
+    if results is None:
+        return []
+
+    save_instrument_project(scope, project_name, output_base_dir)
+    export_instrument_report(scope, report_path, output_base_dir)
 
     logger.info("--- Verification Complete ---")
     return results
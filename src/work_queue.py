@@ -0,0 +1,231 @@
+import json
+import time
+import logging
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class WorkQueue:
+    """
+    Central queue of batch runs for bench PCs that pull work. A worker
+    leases one run at a time and must heartbeat before the lease expires;
+    a run whose lease lapses (dead or hung worker) goes back to the queue.
+    Only the current lease holder may complete or fail a run.
+    Args:
+        runs (iterable): Run definitions, consumed lazily.
+        common (dict): common_settings handed to every worker.
+        on_result (callable): on_result(run, payload) once per run, in
+                              completion order (payload as sent by the
+                              worker, see multi_bench.execute_run).
+        lease_seconds (float): Lease length; heartbeats extend it.
+        max_attempts (int): Leases a run gets before its last failure is
+                            reported as its result.
+    """
+    def __init__(self, runs, common, on_result, lease_seconds=120, max_attempts=3, logger=None):
+        self.runs = iter(runs)
+        self.common = common
+        self.on_result = on_result
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.logger = logger if logger else logging.getLogger("WorkQueue")
+        self.tasks = {}          # run_id -> {"run", "attempts", "last_payload"}
+        self.pending = deque()   # run_ids to lease again
+        self.leases = {}         # run_id -> {"lease", "worker", "expires"}
+        self.workers = {}        # worker -> {"last_seen", "completed", "failed"}
+        self.exhausted = False
+        self.completed = 0
+        self.reclaimed = 0
+        self._lease_ids = 0
+        self._lock = threading.Lock()
+        self.done = threading.Event()
+
+    def _seen(self, worker):
+        info = self.workers.setdefault(worker, {"last_seen": 0.0, "completed": 0, "failed": 0})
+        info["last_seen"] = time.time()
+        return info
+
+    def _reclaim_expired(self):
+        now = time.time()
+        for run_id, lease in list(self.leases.items()):
+            if lease["expires"] < now:
+                del self.leases[run_id]
+                self.reclaimed += 1
+                self.logger.warning(f"[{self.tasks[run_id]['run']['name']}] Lease of {lease['worker']} expired, "
+                                    f"re-queuing")
+                self._retry(run_id, {"ok": False, "error": f"Lease expired on {lease['worker']}"})
+
+    def _retry(self, run_id, payload):
+        task = self.tasks[run_id]
+        task["last_payload"] = payload
+        if task["attempts"] < self.max_attempts:
+            self.pending.append(run_id)
+        else:
+            self._finish(run_id, payload)
+
+    def _finish(self, run_id, payload):
+        self.completed += 1
+        try:
+            self.on_result(self.tasks[run_id]["run"], payload)
+        except Exception as e:
+            self.logger.error(f"[{self.tasks[run_id]['run']['name']}] Could not record result: {e}")
+        self._check_done()
+
+    def _check_done(self):
+        if self.exhausted and not self.pending and not self.leases:
+            self.done.set()
+
+    def _next_run(self):
+        """
+        Next run of the batch, or None when there is none. A run definition
+        that cannot be built (e.g. a sweep name template with an unknown
+        field) ends the run source: it is reported as a failed run so the
+        batch does not end with runs silently missing.
+        """
+        if self.exhausted:
+            return None
+        try:
+            return next(self.runs, None)
+        except Exception as e:
+            run = {"name": f"Run#{len(self.tasks) + 1}"}
+            self.tasks[len(self.tasks)] = {"run": run, "attempts": 0, "last_payload": None}
+            self.logger.error(f"[{run['name']}] Could not build run definition, no further runs are generated: "
+                              f"{type(e).__name__}: {e}")
+            self.exhausted = True
+            self._finish(len(self.tasks) - 1, {"ok": False, "error": f"Run definition error: {e}"})
+            return None
+
+    def lease(self, worker):
+        """Returns {"run_id", "lease", "run", "common", "lease_seconds"}, {"done": True} or None (retry later)."""
+        with self._lock:
+            self._seen(worker)
+            self._reclaim_expired()
+            if self.pending:
+                run_id = self.pending.popleft()
+            else:
+                run = self._next_run()
+                if run is None:
+                    self.exhausted = True
+                    self._check_done()
+                    return {"done": True} if self.done.is_set() else None
+                run_id = len(self.tasks)
+                self.tasks[run_id] = {"run": run, "attempts": 0, "last_payload": None}
+            task = self.tasks[run_id]
+            task["attempts"] += 1
+            self._lease_ids += 1
+            self.leases[run_id] = {"lease": self._lease_ids, "worker": worker,
+                                   "expires": time.time() + self.lease_seconds}
+            self.logger.info(f"[{task['run']['name']}] Leased to {worker} (attempt {task['attempts']})")
+            return {"run_id": run_id, "lease": self._lease_ids, "run": task["run"], "common": self.common,
+                    "lease_seconds": self.lease_seconds}
+
+    def _holds(self, worker, run_id, lease_id):
+        lease = self.leases.get(run_id)
+        return lease is not None and lease["worker"] == worker and lease["lease"] == lease_id
+
+    def heartbeat(self, worker, run_id, lease_id):
+        """Extends the lease. False if the worker no longer holds it."""
+        with self._lock:
+            self._seen(worker)
+            self._reclaim_expired()
+            if not self._holds(worker, run_id, lease_id):
+                return False
+            self.leases[run_id]["expires"] = time.time() + self.lease_seconds
+            return True
+
+    def complete(self, worker, run_id, lease_id, payload):
+        """Records the result of a leased run. False if the lease was lost."""
+        with self._lock:
+            info = self._seen(worker)
+            if not self._holds(worker, run_id, lease_id):
+                self.logger.warning(f"Ignoring result for run {run_id} from {worker}: lease no longer held")
+                return False
+            del self.leases[run_id]
+            if payload.get("ok"):
+                info["completed"] += 1
+                self._finish(run_id, payload)
+            else:
+                info["failed"] += 1
+                self.logger.warning(f"[{self.tasks[run_id]['run']['name']}] Failed on {worker}: "
+                                    f"{payload.get('error', 'no results')}")
+                self._retry(run_id, payload)
+            return True
+
+    def status(self):
+        with self._lock:
+            self._reclaim_expired()
+            return {"pending": len(self.pending), "leased": len(self.leases), "completed": self.completed,
+                    "reclaimed": self.reclaimed, "exhausted": self.exhausted, "done": self.done.is_set(),
+                    "workers": self.workers}
+
+    def expire_loop(self, interval=5.0):
+        """Reclaims expired leases even while no worker calls in."""
+        while not self.done.wait(interval):
+            with self._lock:
+                self._reclaim_expired()
+                self._check_done()
+
+
+class WorkQueueHandler(BaseHTTPRequestHandler):
+    """
+    JSON over HTTP:
+        POST /lease     {"worker"}                              -> lease / {"done": true} / 204
+        POST /heartbeat {"worker", "run_id", "lease"}           -> 200 / 409 lease lost
+        POST /complete  {"worker", "run_id", "lease", "payload"} -> 200 / 409 lease lost
+        GET  /status
+    """
+    queue = None
+
+    def log_message(self, fmt, *args):
+        self.queue.logger.debug(f"{self.address_string()} {fmt % args}")
+
+    def _reply(self, status, body=None):
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/status":
+            self._reply(200, self.queue.status())
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            worker = request["worker"]
+            if self.path == "/lease":
+                lease = self.queue.lease(worker)
+                self._reply(200, lease) if lease else self._reply(204)
+            elif self.path == "/heartbeat":
+                ok = self.queue.heartbeat(worker, request["run_id"], request["lease"])
+                self._reply(200 if ok else 409, {"ok": ok})
+            elif self.path == "/complete":
+                ok = self.queue.complete(worker, request["run_id"], request["lease"], request["payload"])
+                self._reply(200 if ok else 409, {"ok": ok})
+            else:
+                self._reply(404, {"error": "not found"})
+        except (KeyError, ValueError) as e:
+            self._reply(400, {"error": f"bad request: {e}"})
+
+
+def serve_work_queue(work_queue, host='0.0.0.0', port=13100):
+    """
+    Serves work_queue over HTTP until every run has a result, then returns.
+    """
+    handler = type("BoundWorkQueueHandler", (WorkQueueHandler,), {"queue": work_queue})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    threading.Thread(target=work_queue.expire_loop, daemon=True).start()
+    work_queue.logger.info(f"Work queue listening on {host}:{port}")
+    try:
+        work_queue.done.wait()
+        # Let workers polling for work see {"done": true}
+        time.sleep(1.0)
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,179 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import logging
+import threading
+import urllib.request
+import urllib.error
+
+# Ensure src is in path
+sys.path.append(os.path.dirname(__file__))
+
+from run_executor import RunExecutor
+from multi_bench import bench_settings, execute_run, dut_reachable
+
+# Coordinator-side files that must not be shared with the bench PCs
+COORDINATOR_PATHS = ("template_index", "result_cache_path", "journal_path", "results_db",
+                     "summary_csv", "summary_jsonl", "trace_path")
+
+class WorkQueueClient:
+    """JSON/HTTP client of a work_queue coordinator."""
+    def __init__(self, url, worker, timeout=30):
+        self.url = url.rstrip("/")
+        self.worker = worker
+        self.timeout = timeout
+
+    def post(self, path, body):
+        """Returns (status, response dict)."""
+        data = json.dumps(dict(body, worker=self.worker)).encode()
+        request = urllib.request.Request(self.url + path, data=data, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                content = response.read()
+                return response.status, json.loads(content) if content else {}
+        except urllib.error.HTTPError as e:
+            return e.code, {}
+
+    def lease(self):
+        return self.post("/lease", {})
+
+    def heartbeat(self, lease):
+        status, _ = self.post("/heartbeat", {"run_id": lease["run_id"], "lease": lease["lease"]})
+        return status == 200
+
+    def complete(self, lease, payload):
+        status, _ = self.post("/complete", {"run_id": lease["run_id"], "lease": lease["lease"], "payload": payload})
+        return status == 200
+
+
+class Heartbeat:
+    """Keeps a lease alive from a background thread while the run executes."""
+    def __init__(self, client, lease, logger):
+        self.client = client
+        self.lease = lease
+        self.logger = logger
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="heartbeat")
+
+    def _loop(self):
+        interval = max(1.0, self.lease["lease_seconds"] / 3)
+        while not self._stop.wait(interval):
+            try:
+                if not self.client.heartbeat(self.lease):
+                    self.lost = True
+                    self.logger.warning(f"[{self.lease['run']['name']}] Lease lost, the result will be discarded")
+                    return
+            except (OSError, urllib.error.URLError) as e:
+                # Keep trying: the lease only lapses after lease_seconds
+                self.logger.warning(f"Heartbeat failed: {e}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def run_worker(coordinator_url, bench, poll_interval=5, exit_when_done=True, use_cache=True, logger=None):
+    """
+    Pulls runs from the coordinator and executes them on this bench
+    (KeysightController + DutControlClient through RunExecutor) until the
+    coordinator reports the batch done.
+    Args:
+        coordinator_url (str): e.g. "http://lab-server:13100".
+        bench (dict): Local bench settings (name, instrument_ip,
+                      dut_server_ip, dut_server_port, scope_backend, ...)
+                      overriding the coordinator's common_settings.
+        exit_when_done (bool): Return when the batch is done instead of
+                               waiting for the next batch.
+    """
+    name = bench.get("name", socket.gethostname())
+    logger = logger if logger else logging.getLogger(f"Worker[{name}]")
+    client = WorkQueueClient(coordinator_url, name)
+    executor = None
+    executor_common = None
+    completed = 0
+    try:
+        while True:
+            try:
+                status, lease = client.lease()
+            except (OSError, urllib.error.URLError) as e:
+                logger.warning(f"Coordinator {coordinator_url} not reachable: {e}")
+                time.sleep(poll_interval)
+                continue
+            if status == 204 or not lease:
+                time.sleep(poll_interval)
+                continue
+            if lease.get("done"):
+                logger.info(f"Batch done, {completed} runs executed here")
+                if exit_when_done:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            # A new batch may bring new common_settings
+            if executor is None or lease["common"] != executor_common:
+                if executor:
+                    executor.close()
+                common = {k: v for k, v in lease["common"].items() if k not in COORDINATOR_PATHS}
+                _, settings = bench_settings(common, bench, 0)
+                executor = RunExecutor(settings, logger=logger, use_cache=use_cache)
+                executor_common = lease["common"]
+
+            run = lease["run"]
+            with Heartbeat(client, lease, logger) as heartbeat:
+                if dut_reachable(executor):
+                    payload = execute_run(executor, run, logger)
+                else:
+                    logger.error(f"[{run['name']}] DUT server not reachable, returning run")
+                    payload = {"ok": False, "error": "DUT server not reachable"}
+            if heartbeat.lost:
+                continue
+            try:
+                if client.complete(lease, payload):
+                    completed += 1
+                else:
+                    logger.warning(f"[{run['name']}] Coordinator rejected the result (lease lost)")
+            except (OSError, urllib.error.URLError) as e:
+                logger.error(f"[{run['name']}] Could not report result: {e}")
+    finally:
+        if executor:
+            executor.close()
+    return completed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bench PC worker: pulls runs from a work queue coordinator")
+    parser.add_argument("coordinator", help="Coordinator URL, e.g. http://lab-server:13100")
+    parser.add_argument("--name", default=socket.gethostname(), help="Worker/bench name")
+    parser.add_argument("--instrument-ip", default=None, help="This bench's scope (default: from the batch)")
+    parser.add_argument("--dut-server-ip", default=None, help="This bench's DUT server (default: from the batch)")
+    parser.add_argument("--dut-server-port", type=int, default=None)
+    parser.add_argument("--dut-serial", default=None, help="Serial of the DUT board on this bench (result cache key)")
+    parser.add_argument("--backend", default=None, help="Scope backend: auto, dotnet, sim, replay or mock")
+    parser.add_argument("--poll", type=float, default=5.0, help="Seconds between polls while the queue is empty")
+    parser.add_argument("--keep-running", action="store_true", help="Wait for the next batch instead of exiting")
+    parser.add_argument("--no-cache", action="store_true", help="Measure every run even if cached")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    bench = {"name": args.name}
+    for key, value in (("instrument_ip", args.instrument_ip), ("dut_server_ip", args.dut_server_ip),
+                       ("dut_server_port", args.dut_server_port), ("dut_serial", args.dut_serial),
+                       ("scope_backend", args.backend)):
+        if value is not None:
+            bench[key] = value
+    if args.backend:
+        # Backend options of the batch belong to the batch's backend
+        bench["scope_backend_options"] = {}
+    run_worker(args.coordinator, bench, poll_interval=args.poll, exit_when_done=not args.keep_running,
+               use_cache=not args.no_cache)
+
+if __name__ == "__main__":
+    main()
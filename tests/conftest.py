@@ -0,0 +1,54 @@
+import os
+import sys
+import socket
+import threading
+import time
+
+import pytest
+
+# The modules live flat in src/ and import each other by name
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+@pytest.fixture(scope="session")
+def dut_server_port():
+    """Port of a dut_control_server (mock I2C driver) running in this process."""
+    import dut_control_server
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    threading.Thread(target=dut_control_server.start_server, args=("127.0.0.1", port), daemon=True).start()
+    time.sleep(0.2)
+    return port
+
+
+class RegisterDriver:
+    """I2C driver keeping register contents; writes to fail_registers return False."""
+    def __init__(self):
+        self.registers = {}
+        self.writes = []
+        self.fail_registers = set()
+
+    def write(self, slave_addr, reg_offset, val):
+        self.writes.append((slave_addr, reg_offset, val))
+        if (slave_addr, reg_offset) in self.fail_registers:
+            return False
+        self.registers[(slave_addr, reg_offset)] = val
+        return True
+
+    def read(self, slave_addr, reg_offset):
+        return self.registers.get((slave_addr, reg_offset), 0)
+
+@pytest.fixture
+def dut_driver(monkeypatch):
+    """Installs a RegisterDriver in the in-process dut_control_server."""
+    import dut_control_server
+    driver = RegisterDriver()
+    monkeypatch.setattr(dut_control_server, "driver", driver)
+    return driver
+
+
+@pytest.fixture
+def scope_backend():
+    """Scope backend recording every remote call (see RecordingBackend)."""
+    from recording_backend import RecordingBackend
+    return RecordingBackend()
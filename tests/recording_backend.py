@@ -0,0 +1,83 @@
+import threading
+
+from instrument_backends import InstrumentBackend, MockOptions
+
+class RecordingBackend(InstrumentBackend):
+    """
+    Scope backend for tests. calls lists every remote call; run_seconds is
+    how long Run() blocks (until Stop()), alive=False makes the health probe
+    fail and fail_keys makes SetConfig raise for those keys.
+    """
+    name = "recording"
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+        self.run_seconds = 0.0
+        self.run_error = None
+        self.alive = True
+        self.fail_keys = set()
+        self.results = "TestID=1,Passed=True,Margin=2.5\nTestID=2,Passed=False,Margin=-1.0"
+
+    def _load(self):
+        backend = self
+
+        class RemoteApp:
+            def __init__(self, remote_obj):
+                self.SelectedTests = []
+                self.IsRunning = False
+                self._stop = threading.Event()
+
+            @property
+            def SuppressMessages(self):
+                if not backend.alive:
+                    raise ConnectionError("Remote object disconnected")
+                return True
+
+            @SuppressMessages.setter
+            def SuppressMessages(self, value):
+                pass
+
+            def SetConfig(self, key, value):
+                if key in backend.fail_keys:
+                    raise RuntimeError(f"SetConfig {key} rejected")
+                backend.calls.append(("SetConfig", key, value))
+
+            def NewProject(self, discard_unsaved):
+                backend.calls.append(("NewProject",))
+
+            def OpenProjectCustom(self, options):
+                backend.calls.append(("OpenProject", options.FullPath))
+
+            def Run(self):
+                backend.calls.append(("Run",))
+                if backend.run_error:
+                    raise backend.run_error
+                self._stop.clear()
+                self._stop.wait(backend.run_seconds)
+
+            def Stop(self):
+                backend.calls.append(("Stop",))
+                self._stop.set()
+
+            def GetResults(self):
+                return backend.results
+
+            def SaveProjectCustom(self, options):
+                return options.Name
+
+            def ExportResultsPdfCustom(self, options):
+                return options.FileName
+
+        class RemoteAteUtilities:
+            @staticmethod
+            def GetRemoteAte(ip):
+                backend.calls.append(("GetRemoteAte", ip))
+                backend.alive = True
+                return object()
+
+        return {"RemoteAteUtilities": RemoteAteUtilities, "IRemoteAte": RemoteApp,
+                "OpenProjectOptions": MockOptions, "SaveProjectOptions": MockOptions, "ExportPdfOptions": MockOptions}
+
+    def count(self, call):
+        return sum(1 for c in self.calls if c[0] == call)
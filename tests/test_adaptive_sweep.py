@@ -0,0 +1,47 @@
+from adaptive_sweep import AdaptiveSweep
+
+def drive(search, margin, test_ids=(1, 2)):
+    """Runs the search against margin(point); returns the visited points."""
+    visited = []
+    for run in search.runs():
+        visited.append(run["sweep_point"])
+        value = margin(run["sweep_point"])
+        search.record(run, [{"TestID": t, "Pass": value >= 0, "Margin": value} for t in test_ids])
+    return visited
+
+
+def test_optimize_finds_best_point_with_fewer_runs_than_grid():
+    search = AdaptiveSweep({"axes": {"eq": {"start": 0, "stop": 15}, "sw": [0, 1, 2, 3]}, "budget": 40})
+    visited = drive(search, lambda p: 10 - abs(p["eq"] - 11) - abs(p["sw"] - 2))
+    assert search.result[1] == {"eq": 11, "sw": 2}
+    assert len(visited) < search.grid_size()
+    assert len({tuple(p.values()) for p in visited}) == len(visited)
+    assert not search.exhausted
+
+def test_boundary_bisects_to_the_transition():
+    search = AdaptiveSweep({"axes": {"eq": {"start": 0, "stop": 15}, "sw": [0, 1, 2]}, "mode": "boundary",
+                            "boundary_axis": "eq", "fixed": {"sw": 1}})
+    visited = drive(search, lambda p: 9.5 - p["eq"])
+    assert search.result == ("eq boundary: pass up to 9, changes at 10", {"eq": 10, "sw": 1})
+    assert all(p["sw"] == 1 for p in visited)
+    assert len(visited) <= 6
+
+def test_boundary_without_transition():
+    search = AdaptiveSweep({"axes": {"eq": [0, 5, 10]}, "mode": "boundary"})
+    assert len(drive(search, lambda p: 1.0)) == 2
+    assert search.result == ("no pass/fail transition on the axis", None)
+
+def test_budget_stops_the_search():
+    search = AdaptiveSweep({"axes": {"eq": {"start": 0, "stop": 15}}, "budget": 2})
+    assert len(drive(search, lambda p: p["eq"])) == 2
+    assert search.exhausted
+    assert "(budget exhausted)" in search.report()[0]
+
+def test_objective_ignores_other_tests_and_errors():
+    search = AdaptiveSweep({"axes": {"eq": [0, 1]}, "objective_test_ids": [2]})
+    run = next(search.runs())
+    search.record(run, [{"TestID": 1, "Pass": False, "Margin": -5},
+                        {"TestID": 2, "Pass": True, "Margin": 3},
+                        {"TestID": 2, "Pass": False, "Margin": None, "Error": "timeout"}])
+    index = tuple(run["adaptive_index"])
+    assert search.scores[index] == 3 and search.passed[index]
@@ -0,0 +1,66 @@
+import json
+
+from batch_journal import BatchJournal
+
+ROWS = [{"TestID": 1, "Pass": True}]
+
+def write_batch(path):
+    journal = BatchJournal(str(path))
+    journal.start_batch("batch.json", "b1")
+    journal.start_run("A", "A_report")
+    journal.record_stage("A", "dut", True, 1.0)
+    journal.complete_run("A", ROWS)
+    journal.start_run("B", "B_report")
+    journal.record_stage("B", "dut", True, 1.0)
+    journal.record_stage("B", "measure", False, 2.0)
+    journal.complete_run("B", [], ok=False)
+    journal.start_run("C", "C_report")
+    journal.record_stage("C", "dut", True, 1.0, {"macros": {"eq": 5}})
+    journal.close()
+
+
+def test_resume_reads_back_completed_and_incomplete_runs(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    write_batch(path)
+    journal = BatchJournal(str(path), resume=True)
+    assert journal.batch_id == "b1"
+    assert journal.completed_rows("A") == ROWS
+    assert journal.report_name("C") == "C_report"
+    assert journal.completed_rows("C") is None
+    assert list(journal.completed_stages("C")) == ["dut"]
+    assert journal.completed_stages("C")["dut"]["data"] == {"macros": {"eq": 5}}
+    assert journal.completed_rows("unknown") is None and journal.completed_stages("unknown") == {}
+    journal.close()
+
+def test_run_with_failed_stage_is_retried(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    write_batch(path)
+    journal = BatchJournal(str(path), resume=True)
+    assert journal.completed_rows("B") is None
+    assert list(journal.completed_stages("B")) == ["dut"]
+    journal.record_stage("B", "measure", True, 2.0)
+    journal.complete_run("B", ROWS)
+    assert journal.completed_rows("B") == ROWS
+    journal.close()
+
+def test_torn_last_line_is_ignored_and_terminated(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    write_batch(path)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"event": "run_complete", "run": "C", "ro')
+    journal = BatchJournal(str(path), resume=True)
+    assert journal.completed_rows("C") is None
+    journal.complete_run("C", ROWS)
+    journal.close()
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert json.loads(lines[-1])["run"] == "C"
+    journal = BatchJournal(str(path), resume=True)
+    assert journal.completed_rows("C") == ROWS
+    journal.close()
+
+def test_new_journal_truncates(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    write_batch(path)
+    BatchJournal(str(path)).close()
+    assert path.read_text(encoding="utf-8") == ""
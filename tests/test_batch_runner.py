@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from batch_runner import run_batch
+from tracing import tracer
+
+@pytest.fixture
+def batch(tmp_path, dut_server_port):
+    """Writes a sim-bench batch config; returns run(runs, **common overrides) -> summary {run: rows}."""
+    def run(runs, resume=False, **common):
+        settings = {
+            "instrument_ip": "sim-scope",
+            "dut_server_ip": "127.0.0.1",
+            "dut_server_port": dut_server_port,
+            "base_directory": str(tmp_path / "out"),
+            "default_test_ids": [119041, 119042],
+            "scope_backend": "sim",
+            "scope_backend_options": {"scale": 0.001},
+            "project_templates": False,
+            "run_poll_interval": 0.01,
+            "summary_csv": str(tmp_path / "summary.csv"),
+            "summary_jsonl": str(tmp_path / "summary.jsonl"),
+            "results_db": str(tmp_path / "results.db"),
+            "trace_path": str(tmp_path / "trace.json"),
+        }
+        settings.update(common)
+        config_path = tmp_path / "batch.json"
+        config_path.write_text(json.dumps({"common_settings": settings, "runs": runs}), encoding="utf-8")
+        run_batch(str(config_path), resume=resume, journal_path=str(tmp_path / "journal.jsonl"))
+        summary = {}
+        with open(tmp_path / "summary.jsonl", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                summary[entry["run"]] = entry["rows"]
+        return summary
+    return run
+
+def make_run(name, eq=10):
+    return {"name": name, "report_name": f"{name}.pdf", "project_name": name, "dut_commands": [f"eq {eq}"]}
+
+
+def test_batch_runs_every_run_and_streams_the_summary(batch):
+    summary = batch([make_run("A", 4), make_run("B", 10)])
+    assert list(summary) == ["A", "B"]
+    assert [row["TestID"] for row in summary["A"]] == [119041, 119042]
+    assert all(not row.get("Error") for rows in summary.values() for row in rows)
+    # Margins follow the EQ the run wrote
+    assert summary["A"][0]["Margin"] != summary["B"][0]["Margin"]
+
+def test_repeated_run_name_is_skipped_while_streaming(batch, capsys):
+    summary = batch([make_run("A"), make_run("B"), make_run("A", 3)])
+    assert list(summary) == ["A", "B"]
+    assert "name used more than once" in capsys.readouterr().out
+
+def test_tracing_is_opt_in_and_does_not_outlive_the_batch(batch, tmp_path):
+    batch([make_run("A")])
+    assert not (tmp_path / "trace.json").exists()
+    batch([make_run("A")], trace=True)
+    names = {event["name"] for event in json.loads((tmp_path / "trace.json").read_text())["traceEvents"]}
+    assert {"batch", "scope.Run"} <= names
+    assert not tracer.enabled
+
+def test_result_cache_reuses_identical_runs_only(batch, tmp_path):
+    cache = {"result_cache": True, "result_cache_path": str(tmp_path / "cache.json"), "dut_serial": "SN-1"}
+    first = batch([make_run("A", 4)], **cache)
+    assert not first["A"][0]["Cached"]
+    again = batch([make_run("A2", 4), make_run("B", 5)], **cache)
+    assert again["A2"][0]["Cached"] and again["A2"][0]["ReportName"] == first["A"][0]["ReportName"]
+    assert not again["B"][0]["Cached"]
+    # Another board never answers from this one's entries
+    other_board = batch([make_run("A3", 4)], **dict(cache, dut_serial="SN-2"))
+    assert not other_board["A3"][0]["Cached"]
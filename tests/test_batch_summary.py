@@ -0,0 +1,48 @@
+import csv
+import json
+
+from batch_summary import BatchSummary, format_run_line
+
+def row(test_id, passed, duration=10.0, **extra):
+    return dict({"Run": "R", "ReportName": "R.pdf", "EQ": 4, "SW": 1, "FG": 0, "TestID": test_id, "Pass": passed,
+                 "Margin": 1.0, "Duration": duration, "WritesSkipped": 2}, **extra)
+
+
+def test_rows_stream_to_csv_and_jsonl_as_runs_finish(tmp_path):
+    csv_path, jsonl_path = tmp_path / "summary.csv", tmp_path / "summary.jsonl"
+    summary = BatchSummary(3, csv_path=str(csv_path), jsonl_path=str(jsonl_path))
+    summary.add_run("A", [row(1, True), row(2, False)])
+    # Readable before the batch ends
+    assert [json.loads(line)["run"] for line in jsonl_path.read_text().splitlines()] == ["A"]
+    with open(csv_path, newline="") as f:
+        assert [r["TestID"] for r in csv.DictReader(f)] == ["1", "2"]
+    summary.add_run("B", [row(1, True, duration=20.0)])
+    summary.close()
+    assert len(jsonl_path.read_text().splitlines()) == 2
+
+def test_running_totals_and_eta():
+    summary = BatchSummary(4)
+    summary.add_run("A", [row(1, True), row(2, False)])
+    summary.add_run("B", [row(1, False, duration=0.0, Error="Scope lost")])
+    assert (summary.runs_done, summary.tests_passed, summary.tests_total, summary.exec_errors) == (2, 1, 2, 1)
+    assert summary.writes_skipped == 4
+    assert summary.progress_line() == ("[Summary] 2/4 runs | tests passed 1/2 | exec errors 1 | avg run 5.00 s"
+                                       " | ETA ~10 s")
+
+def test_table_keeps_config_order(capsys):
+    summary = BatchSummary(3)
+    for name in ("A", "B", "C"):
+        summary.expect(name)
+    summary.add_run("C", [row(1, True)])
+    summary.add_run("A", [row(1, True, Cached=True)])
+    summary.print_table()
+    lines = capsys.readouterr().out.splitlines()
+    assert "All Pass" in lines[2] and "REUSED" in lines[2]
+    assert "Run skipped or output missing" in lines[3]
+    assert lines[5] == "Reused from the result cache, not measured in this batch (1 runs): A"
+
+def test_run_line_status():
+    assert "Partial Fail" in format_run_line("R", [row(1, True), row(7, False)])
+    assert "Single failure (TestID 7)" in format_run_line("R", [row(1, True), row(7, False)])
+    assert "All Fail" in format_run_line("R", [row(1, False)])
+    assert "Exec Error" in format_run_line("R", [row(1, False, Error="x")])
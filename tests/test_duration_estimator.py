@@ -0,0 +1,54 @@
+import pytest
+
+from duration_estimator import DurationEstimator, DEFAULT_MEASURE_BASE, DEFAULT_TEST_SECONDS
+
+HISTORY = [
+    {"test_ids": [1, 2, 3], "backend": None, "stages": {"dut": 2, "measure": 100, "save": 5, "export": 5}},
+    {"test_ids": [1], "backend": "auto", "stages": {"dut": 2, "measure": 40, "save": 5, "export": 5}},
+    # Simulated bench: never mixed with the scope's timings
+    {"test_ids": [1], "backend": "sim", "stages": {"dut": 50, "measure": 999, "save": 1, "export": 1}},
+]
+
+@pytest.fixture
+def estimator():
+    estimator = DurationEstimator([1, 2, 3])
+    estimator.learn(HISTORY)
+    return estimator
+
+
+def test_learn_separates_fixed_part_and_test_cost(estimator):
+    assert estimator.samples == 2
+    assert estimator.measure_base == pytest.approx(10.0)
+    assert estimator.test_seconds == pytest.approx({1: 30.0, 2: 30.0, 3: 30.0})
+    assert estimator.stage_seconds == {"dut": 2, "save": 5, "export": 5}
+
+def test_known_test_set_uses_its_own_median(estimator):
+    assert estimator.measure_seconds([3, 2, 1]) == 100
+    assert estimator.estimate_run({"name": "x", "test_ids": [2]})["total"] == pytest.approx(52.0)
+
+def test_no_history_uses_defaults():
+    estimator = DurationEstimator([1, 2])
+    estimator.learn([])
+    assert estimator.measure_seconds([1, 2]) == DEFAULT_MEASURE_BASE + 2 * DEFAULT_TEST_SECONDS
+
+def test_pipeline_and_benches_shorten_the_batch(estimator):
+    runs = [{"name": "a"}, {"name": "b"}, {"name": "c", "test_ids": [3]}]
+    serial = estimator.estimate(runs)
+    assert serial["total"] == pytest.approx(112 + 112 + 52)
+    piped = estimator.estimate(runs, pipeline=True, parallelism=2)
+    # Each later run's DUT configuration hides behind the previous save/export
+    assert piped["serial"] == pytest.approx(serial["serial"] - 2 * 2)
+    assert piped["total"] == pytest.approx(piped["serial"] / 2)
+
+def test_fit_budget_by_priority_and_trimming(estimator):
+    runs = [{"name": "a"}, {"name": "b", "priority": 1}, {"name": "c", "test_ids": [3]}]
+    selected, skipped, trimmed = estimator.fit_budget(runs, 200, test_priority=[3])
+    # b goes first whole (112 s); a keeps its most important tests (82 s); c no longer fits
+    assert selected == [{"name": "a", "test_ids": [3, 1]}, {"name": "b", "priority": 1}]
+    assert skipped == [{"name": "c", "test_ids": [3]}]
+    assert trimmed == ["a"]
+
+def test_fit_budget_scales_with_benches(estimator):
+    runs = [{"name": "a"}, {"name": "b"}]
+    selected, skipped, trimmed = estimator.fit_budget(runs, 112, parallelism=2)
+    assert [r["name"] for r in selected] == ["a", "b"] and not skipped and not trimmed
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import dut_control_server
+from dut_control_client import DutControlClient
+from dut_control_server_async import AsyncDutControlServer, I2CScheduler
+
+class OverlapDriver:
+    """Slow I2C driver recording how many calls ran at the same time."""
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+
+    def write(self, slave_addr, reg_offset, val):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.002)
+        with self._lock:
+            self.active -= 1
+            self.writes += 1
+        return True
+
+    def read(self, slave_addr, reg_offset):
+        return 0
+
+def hammer(port, framed, clients=6, writes=10):
+    """Concurrent clients each writing `writes` registers; returns every reply."""
+    def client_writes(n):
+        with DutControlClient("127.0.0.1", port, persistent=True, framed=framed) as client:
+            return [client.write_register(0x7c, n, value) for value in range(writes)]
+    with ThreadPoolExecutor(clients) as pool:
+        return [reply for replies in pool.map(client_writes, range(clients)) for reply in replies]
+
+
+def test_threaded_server_serializes_the_bus(dut_server_port, monkeypatch):
+    driver = OverlapDriver()
+    monkeypatch.setattr(dut_control_server, "driver", driver)
+    assert hammer(dut_server_port, framed=False) == ["OK"] * 60
+    assert hammer(dut_server_port, framed=True) == ["OK"] * 60
+    assert driver.writes == 120 and driver.max_active == 1
+
+def test_async_server_serves_both_protocols_on_one_bus_worker(monkeypatch):
+    driver = OverlapDriver()
+    monkeypatch.setattr(dut_control_server, "driver", driver)
+    loop = asyncio.new_event_loop()
+    server = AsyncDutControlServer("127.0.0.1", 0, max_clients=4)
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    asyncio.run_coroutine_threadsafe(server.start(), loop).result(timeout=5)
+    try:
+        assert hammer(server.port, framed=False) == ["OK"] * 60
+        assert hammer(server.port, framed=True) == ["OK"] * 60
+    finally:
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+    assert driver.writes == 120 and driver.max_active == 1
+    assert server.scheduler.processed == 120
+
+def test_scheduler_interleaves_clients_round_robin():
+    order = []
+
+    async def scenario():
+        scheduler = I2CScheduler(handler=lambda command: order.append(command) or "OK")
+        scheduler.register("a")
+        scheduler.register("b")
+        futures = [await scheduler.submit(client, f"{client}{i}") for client in "ab" for i in range(3)]
+        scheduler.start()
+        replies = await asyncio.gather(*futures)
+        await scheduler.stop()
+        return replies
+
+    assert asyncio.run(scenario()) == ["OK"] * 6
+    assert order == ["a0", "b0", "a1", "b1", "a2", "b2"]
@@ -0,0 +1,69 @@
+import socket
+import threading
+
+from dut_control_client import DutConnectionPool, DutControlClient
+
+def one_command_server():
+    """Server answering "OK" to one command per connection, then closing it."""
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+
+    def serve():
+        while True:
+            conn, _ = listener.accept()
+            with conn:
+                if conn.recv(1024):
+                    conn.sendall(b"OK")
+
+    threading.Thread(target=serve, daemon=True).start()
+    return listener.getsockname()[1]
+
+
+def test_persistent_client_reuses_one_connection(dut_server_port, dut_driver):
+    with DutControlClient("127.0.0.1", dut_server_port, persistent=True) as client:
+        for value in range(5):
+            assert client.write_register(0x7c, 0x16, value) == "OK"
+        assert client.read_register(0x7c, 0x16) == "0x04"
+        assert client.pool.connects == 1 and client.pool.reconnects == 0
+
+def test_one_shot_client_keeps_no_pool(dut_server_port):
+    client = DutControlClient("127.0.0.1", dut_server_port)
+    assert client.pool is None
+    assert client.read_register(0x7c, 0x00).startswith("0x")
+
+def test_connection_closed_by_server_is_replaced():
+    port = one_command_server()
+    client = DutControlClient("127.0.0.1", port, persistent=True)
+    assert client.send_command("read 7c 00") == "OK"
+    # The idle socket now reads EOF: the health check drops it before reuse
+    assert client.send_command("read 7c 00") == "OK"
+    assert client.pool.connects == 2
+    client.close()
+
+def test_health_check_rejects_readable_sockets():
+    a, b = socket.socketpair()
+    with a, b:
+        assert DutConnectionPool.is_healthy(a)
+        b.sendall(b"stale reply")
+        assert not DutConnectionPool.is_healthy(a)
+
+def test_pool_keeps_at_most_size_idle_sockets(dut_server_port):
+    pool = DutConnectionPool("127.0.0.1", dut_server_port, size=1)
+    first, _ = pool.acquire()
+    second, _ = pool.acquire()
+    pool.release(first)
+    pool.release(second)
+    assert second.fileno() == -1
+    sock, reused = pool.acquire()
+    assert reused and sock is first
+    pool.release(sock)
+    pool.close()
+    assert first.fileno() == -1
+
+def test_unreachable_server_returns_none():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    client = DutControlClient("127.0.0.1", port, persistent=True, timeout=1)
+    assert client.send_command("read 7c 00") is None
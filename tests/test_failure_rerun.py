@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from failure_rerun import FailureRerun
+
+def row(test_id, passed, margin, error=None):
+    return {"TestID": test_id, "Pass": passed, "Margin": margin, "Error": error}
+
+PREVIOUS = {
+    "A": [row(1, True, 5.0), row(2, False, -1.0), row(3, True, 0.5)],
+    "B": [row(1, True, 4.0), row(2, True, 3.0)],
+    "C": [row(1, False, None, "Scope run timed out")],
+    "Adaptive_3": [row(1, False, -2.0)],
+}
+RUNS = [{"name": "A", "test_ids": [1, 2, 3]}, {"name": "B"}, {"name": "C", "priority": 2}]
+
+@pytest.fixture
+def summary(tmp_path):
+    path = tmp_path / "batch_summary.jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        for name, rows in PREVIOUS.items():
+            f.write(json.dumps({"run": name, "rows": rows}) + "\n")
+    return path
+
+
+def test_plan_reruns_failed_tests_and_failed_runs(summary):
+    rerun = FailureRerun(str(summary))
+    assert rerun.plan(RUNS) == [{"name": "A", "test_ids": [2]}, {"name": "C", "priority": 2}]
+    assert rerun.selected == {"A": [2], "C": None}
+    assert rerun.missing == ["Adaptive_3"]
+    assert [name for name, rows in rerun.previous_runs() if rows is None] == ["A", "C"]
+    assert rerun.previous_runs()[-1] == ("Adaptive_3", PREVIOUS["Adaptive_3"])
+
+def test_marginal_passes_are_rerun(summary):
+    rerun = FailureRerun(str(summary), marginal=1.0)
+    assert rerun.plan(RUNS)[0]["test_ids"] == [2, 3]
+
+def test_merge_replaces_only_the_rerun_test_ids(summary):
+    rerun = FailureRerun(str(summary))
+    rerun.plan(RUNS)
+    assert rerun.merge("A", [row(2, True, 2.0)]) == [row(1, True, 5.0), row(2, True, 2.0), row(3, True, 0.5)]
+    whole = [row(1, True, 1.0)]
+    assert rerun.merge("C", whole) == whole
+
+def test_merge_keeps_previous_rows_when_rerun_fails(summary):
+    rerun = FailureRerun(str(summary))
+    rerun.plan(RUNS)
+    assert rerun.merge("A", [row(2, False, None, "DUT configuration failed")]) == PREVIOUS["A"]
+
+def test_resume_reads_the_kept_previous_summary(summary):
+    FailureRerun(str(summary))
+    summary.write_text(json.dumps({"run": "A", "rows": [row(1, True, 9.0)]}) + "\n", encoding="utf-8")
+    assert FailureRerun(str(summary), resume=True).previous == PREVIOUS
+    assert FailureRerun(str(summary)).previous == {"A": [row(1, True, 9.0)]}
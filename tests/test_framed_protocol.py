@@ -0,0 +1,61 @@
+import socket
+import threading
+
+import pytest
+
+from dut_control_server import format_frame, parse_frame, process_frames
+from dut_control_client import DutControlClient, FramedConnection
+
+def test_parse_and_format_frames():
+    assert parse_frame("@12 read 7c 02") == ("12", "read 7c 02")
+    assert parse_frame("read 7c 02") == (None, None)
+    assert parse_frame("@ read") == (None, None)
+    assert format_frame("3", "line one\nline two") == "@3 line one line two\n"
+
+def test_split_frames_wait_for_their_newline(dut_driver):
+    reply, rest = process_frames(b"@1 write 7c 16 5")
+    assert reply == b"" and rest == b"@1 write 7c 16 5"
+    reply, rest = process_frames(rest + b"0\n@2 read 7c")
+    assert reply == b"@1 OK\n" and rest == b"@2 read 7c"
+    reply, rest = process_frames(rest + b" 16\n")
+    assert reply == b"@2 0x50\n" and rest == b""
+
+def test_merged_frames_are_answered_in_order(dut_driver):
+    reply, rest = process_frames(b"@1 write 7c 16 01\n\n@2 write 7c 17 02\n@3 read 7c 17\n")
+    assert reply == b"@1 OK\n@2 OK\n@3 0x02\n" and rest == b""
+
+def test_malformed_frame_gets_an_error_reply():
+    reply, _ = process_frames(b"@1 read 7c 00\nnot a frame\n")
+    assert reply.splitlines()[1] == b"@0 Error: Malformed frame 'not a frame'"
+
+def test_framed_client_pipelines_over_one_connection(dut_server_port, dut_driver):
+    with DutControlClient("127.0.0.1", dut_server_port, framed=True) as client:
+        commands = [f"write 7c {offset:02x} {offset:02x}" for offset in range(0x10, 0x30)] + ["read 7c 2f"]
+        assert client.send_commands(commands) == ["OK"] * 32 + ["0x2f"]
+        futures = [client.submit_command(f"read 7c {offset:02x}") for offset in (0x10, 0x11)]
+        assert [f.result(timeout=5) for f in futures] == ["0x10", "0x11"]
+        assert client.send_command("bogus") == "Error: Unknown command 'bogus'"
+
+def test_submit_command_needs_framed_mode(dut_server_port):
+    with pytest.raises(RuntimeError):
+        DutControlClient("127.0.0.1", dut_server_port).submit_command("read 7c 00")
+
+def test_pending_requests_fail_when_the_server_disconnects():
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+
+    def close_after_first_read():
+        conn, _ = listener.accept()
+        conn.recv(1024)
+        conn.close()
+
+    threading.Thread(target=close_after_first_read, daemon=True).start()
+    connection = FramedConnection("127.0.0.1", listener.getsockname()[1])
+    future = connection.submit("read 7c 00")
+    with pytest.raises(ConnectionError):
+        future.result(timeout=5)
+    assert connection.closed
+    with pytest.raises(ConnectionError):
+        connection.submit("read 7c 00").result(timeout=1)
+    listener.close()
@@ -0,0 +1,53 @@
+import sys
+
+import pytest
+
+import instrument_backends
+from instrument_backends import AutoBackend, MockBackend, get_backend, register_backend, select_backend
+from run_executor import RunExecutor
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setattr(instrument_backends, "_instances", {})
+    monkeypatch.setattr(instrument_backends, "_default", None)
+    monkeypatch.setattr(instrument_backends, "BACKENDS", dict(instrument_backends.BACKENDS))
+    monkeypatch.delenv("SCOPE_BACKEND", raising=False)
+
+@pytest.fixture
+def no_dll(monkeypatch):
+    # import clr raises ImportError, as on a bench without pythonnet
+    monkeypatch.setitem(sys.modules, "clr", None)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="Unknown scope backend 'scopey'"):
+        get_backend("scopey")
+
+def test_default_resolution(monkeypatch):
+    assert get_backend().name == "auto"
+    monkeypatch.setenv("SCOPE_BACKEND", "mock")
+    assert get_backend().name == "mock"
+    select_backend("replay")
+    assert get_backend().name == "replay"
+
+def test_named_backends_are_shared_unless_configured():
+    assert get_backend("mock") is get_backend("mock")
+    assert get_backend("replay", db_path="other.db") is not get_backend("replay")
+    backend = MockBackend()
+    assert get_backend(backend) is backend
+
+def test_registered_backend():
+    register_backend("custom", MockBackend)
+    assert isinstance(get_backend("custom"), MockBackend)
+
+def test_auto_resolves_to_mock_without_dll(no_dll):
+    backend = AutoBackend()
+    assert backend.resolved_name() == "mock"
+    assert backend.loaded and backend.IRemoteAte is not None
+    assert MockBackend().resolved_name() == "mock"
+
+def test_mock_fallback_is_kept_apart_from_the_real_scope(no_dll):
+    executor = RunExecutor({"scope_backend": AutoBackend(), "dut_server_ip": "127.0.0.1", "dut_server_port": 9,
+                            "project_templates": False, "scope_session": False})
+    assert executor.backend_name() == "mock"
+    assert executor._bench_identity()["backend"] == "mock"
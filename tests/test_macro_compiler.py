@@ -0,0 +1,59 @@
+import pytest
+
+from macro_compiler import MacroCompiler, RegisterMap, WriteSegment
+
+@pytest.fixture(scope="module")
+def compiler():
+    return MacroCompiler(RegisterMap.from_markdown())
+
+def writes(compiled, current=0xFF):
+    return [t[1:] for t in compiled.resolve(lambda slave_addr, reg_offset: current) if t[0] == "write"]
+
+
+def test_spec_fields_are_parsed():
+    reg_map = RegisterMap.from_markdown()
+    field = reg_map.fields["UTX2_EQ_CAP"]
+    assert (field.slave_addr, field.offset, field.msb, field.lsb) == (0x7c, 0x16, 7, 4)
+    assert reg_map.fields["REG_EQ_EN"].offset == 0x15
+
+def test_macro_sets_prerequisite_first_and_every_lane(compiler):
+    compiled = compiler.compile(["eq 5"])
+    assert compiled.macros == {"eq": 5}
+    assert writes(compiled, current=0x00) == [(0x7c, 0x15, 0x01), (0x7c, 0x16, 0x50), (0x7c, 0x2a, 0x50),
+                                              (0x7c, 0x3e, 0x50), (0x7c, 0x52, 0x50)]
+
+def test_macro_values_accept_hex_and_decimal(compiler):
+    for value in ("0x0E", "0X0e", "14", "014"):
+        compiled = compiler.compile([f"eq {value}"])
+        assert not compiled.errors and compiled.macros == {"eq": 14}
+        assert writes(compiled, current=0x00)[1] == (0x7c, 0x16, 0xE0)
+
+def test_field_update_keeps_untouched_bits(compiler):
+    compiled = compiler.compile(["eq 5"])
+    assert writes(compiled, current=0xFF)[1] == (0x7c, 0x16, 0x5F)
+
+def test_full_write_then_macro_merges_into_one_write(compiler):
+    compiled = compiler.compile(["write_register(0x7c, 0x16, 0x03)", "eq 5"])
+    lane0 = [w for w in writes(compiled) if w[1] == 0x16]
+    assert lane0 == [(0x7c, 0x16, 0x53)]
+    segment = compiled.segments[0]
+    assert (0x7c, 0x16) not in segment.needs_read()
+
+def test_raw_commands_split_segments_in_order(compiler):
+    compiled = compiler.compile(["write_register(0x7c, 0x02, 0x01)", "dpaddr", "// comment",
+                                 "write_register(0x7c, 0x03, 0x02)"])
+    assert compiled.source_commands == 3
+    first, raw, last = compiled.segments
+    assert isinstance(first, WriteSegment) and raw == "dpaddr" and isinstance(last, WriteSegment)
+    assert compiled.resolve(lambda *key: 0) == [("write", 0x7c, 0x02, 0x01), ("raw", "dpaddr"),
+                                                ("write", 0x7c, 0x03, 0x02)]
+
+def test_malformed_commands_are_reported(compiler):
+    compiled = compiler.compile(["write_register(0x7c, 0x02)", "eq x", "eq 99"])
+    assert [cmd for cmd, _ in compiled.errors] == ["write_register(0x7c, 0x02)", "eq x", "eq 99"]
+    assert compiled.segments == []
+
+def test_unknown_register_falls_back_to_spec_default(compiler):
+    read = compiler.with_defaults(lambda slave_addr, reg_offset: None)
+    assert read(0x7c, 0x16) == compiler.register_map.default_value(0x7c, 0x16)
+    assert read(0x01, 0x01) == 0
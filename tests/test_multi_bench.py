@@ -0,0 +1,79 @@
+import os
+import signal
+import socket
+import threading
+import time
+
+import pytest
+
+import dut_control_server
+from multi_bench import MultiBenchScheduler
+
+def start_dut_server():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    threading.Thread(target=dut_control_server.start_server, args=("127.0.0.1", port), daemon=True).start()
+    time.sleep(0.2)
+    return port
+
+@pytest.fixture(scope="module")
+def common(tmp_path_factory):
+    base = tmp_path_factory.mktemp("benches")
+    return {
+        "base_directory": str(base),
+        "default_test_ids": [119041],
+        "scope_backend": "sim",
+        "scope_backend_options": {"scale": 0.005},
+        "project_templates": False,
+        "benches": [{"name": name, "instrument_ip": f"sim-{name}", "dut_server_ip": "127.0.0.1",
+                     "dut_server_port": start_dut_server()} for name in ("lab1", "lab2")],
+    }
+
+def make_runs(count):
+    return [{"name": f"Run_{i}", "report_name": f"Run_{i}.pdf", "project_name": f"Run_{i}",
+             "dut_commands": [f"eq {i % 16}"]} for i in range(count)]
+
+
+def test_every_run_executes_once_one_worker_process_per_bench(common):
+    results = []
+    scheduler = MultiBenchScheduler(common, lambda run, payload: results.append((run["name"], payload)))
+    scheduler.run(make_runs(6))
+
+    assert sorted(name for name, _ in results) == [f"Run_{i}" for i in range(6)]
+    assert all(payload["ok"] for _, payload in results)
+    assert all(task["attempts"] == 1 for task in scheduler.tasks.values())
+    benches = scheduler.benches.values()
+    assert sorted(bench.name for bench in benches) == ["lab1", "lab2"]
+    assert len({bench.process.pid for bench in benches}) == 2
+    assert all(bench.process.name == f"bench-{bench.name}" for bench in benches)
+    assert sum(bench.runs for bench in benches) == 6
+
+
+def test_run_of_dead_bench_is_reassigned(common):
+    results = []
+    scheduler = MultiBenchScheduler(common, lambda run, payload: results.append((run["name"], payload)))
+    killed = {}
+
+    def kill_lab2_mid_run():
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            bench = scheduler.benches.get("lab2")
+            if bench is not None and bench.task is not None:
+                killed["task"] = bench.task
+                os.kill(bench.process.pid, signal.SIGKILL)
+                return
+            time.sleep(0.01)
+
+    killer = threading.Thread(target=kill_lab2_mid_run, daemon=True)
+    killer.start()
+    scheduler.run(make_runs(4))
+    killer.join()
+
+    assert "task" in killed
+    assert sorted(name for name, _ in results) == [f"Run_{i}" for i in range(4)]
+    assert all(payload["ok"] for _, payload in results)
+    task = scheduler.tasks[killed["task"]]
+    assert task["attempts"] == 2 and task["failed_on"] == {"lab2"}
+    assert not scheduler.benches["lab2"].alive
+    assert scheduler.retries == 1
@@ -0,0 +1,68 @@
+import threading
+import time
+
+from pipeline import PipelineExecutor, Stage
+
+class Timeline:
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+
+    def stage(self, name, seconds=0.0, fail_runs=()):
+        def fn(state):
+            with self._lock:
+                self.events.append(("start", name, state["run"]))
+            time.sleep(seconds)
+            with self._lock:
+                self.events.append(("end", name, state["run"]))
+            if state["run"] in fail_runs:
+                raise RuntimeError(f"{name} failed")
+        return fn
+
+    def index(self, kind, name, run):
+        return self.events.index((kind, name, run))
+
+def make_stages(timeline, fail_runs=()):
+    return [
+        Stage("dut", "dut", timeline.stage("dut", 0.01, fail_runs), prev_deps=["measure"]),
+        Stage("measure", "scope", timeline.stage("measure", 0.02), deps=["dut"]),
+        Stage("save", "scope", timeline.stage("save", 0.1), deps=["measure"]),
+    ]
+
+
+def test_next_dut_setup_overlaps_previous_save():
+    timeline = Timeline()
+    completed = []
+    pipeline = PipelineExecutor(make_stages(timeline))
+    count = pipeline.run(({"run": i} for i in range(3)), on_complete=lambda state, slot: completed.append(state["run"]))
+    assert count == 3 and completed == [0, 1, 2]
+    for run in (1, 2):
+        # Waits for the previous measurement, not for its save
+        assert timeline.index("end", "measure", run - 1) < timeline.index("start", "dut", run)
+        assert timeline.index("start", "dut", run) < timeline.index("end", "save", run - 1)
+    assert pipeline.saved_time() > 0
+
+def test_failed_stage_skips_its_dependents_only():
+    timeline = Timeline()
+    slots = []
+    pipeline = PipelineExecutor(make_stages(timeline, fail_runs=(1,)))
+    pipeline.run(({"run": i} for i in range(3)), on_complete=lambda state, slot: slots.append(slot))
+    assert [slot.ok for slot in slots] == [
+        {"dut": True, "measure": True, "save": True},
+        {"dut": False, "measure": False, "save": False},
+        {"dut": True, "measure": True, "save": True},
+    ]
+    assert ("start", "measure", 1) not in timeline.events
+
+def test_runs_are_pulled_lazily():
+    pulled = []
+
+    def states():
+        for i in range(5):
+            pulled.append(i)
+            yield {"run": i}
+
+    seen = []
+    pipeline = PipelineExecutor(make_stages(Timeline()), lookahead=2)
+    pipeline.run(states(), on_complete=lambda state, slot: seen.append(len(pulled)))
+    assert seen[0] == 2 and len(pulled) == 5
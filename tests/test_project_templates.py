@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from instrument_control import KeysightController
+from project_templates import ProjectTemplateCache
+
+@pytest.fixture
+def scope(scope_backend):
+    scope = KeysightController("10.0.0.5", backend=scope_backend)
+    assert scope.connect()
+    scope_backend.calls.clear()
+    return scope
+
+@pytest.fixture
+def config(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"Lanes": 4, "Rate": "HBR3"}))
+    return path
+
+def kinds(backend):
+    calls = [c[0] for c in backend.calls]
+    backend.calls.clear()
+    return calls
+
+
+def test_template_is_built_once_then_opened(scope, scope_backend, config, tmp_path):
+    templates = ProjectTemplateCache(str(tmp_path / "index.json"), template_dir="C:\\Templates")
+    assert templates.prepare(scope, str(config))
+    assert kinds(scope_backend) == ["NewProject", "SetConfig", "SetConfig"]
+    assert templates.prepare(scope, str(config))
+    assert kinds(scope_backend) == ["OpenProject"]
+    assert (templates.builds, templates.hits) == (1, 1)
+    # The opened template counts as configured: nothing is sent again
+    scope.load_config_file(str(config))
+    assert kinds(scope_backend) == []
+
+def test_index_survives_and_edited_config_builds_a_new_template(scope, scope_backend, config, tmp_path):
+    index_path = str(tmp_path / "index.json")
+    ProjectTemplateCache(index_path).prepare(scope, str(config))
+    templates = ProjectTemplateCache(index_path)
+    assert list(templates.index.values()) == [f"Template_{ProjectTemplateCache.config_hash(str(config))}"]
+    config.write_text(json.dumps({"Lanes": 2, "Rate": "HBR3"}))
+    scope_backend.calls.clear()
+    templates.prepare(scope, str(config))
+    assert kinds(scope_backend)[0] == "NewProject"
+    assert len(templates.index) == 2
+
+def test_unopenable_template_is_rebuilt(scope, scope_backend, config, tmp_path, monkeypatch):
+    templates = ProjectTemplateCache(str(tmp_path / "index.json"))
+    templates.prepare(scope, str(config))
+    monkeypatch.setattr(scope, "load_setup", lambda path: False)
+    scope_backend.calls.clear()
+    assert templates.prepare(scope, str(config))
+    assert kinds(scope_backend) == ["NewProject", "SetConfig", "SetConfig"]
+    assert templates.builds == 2 and templates.hits == 0
+
+def test_force_full_configures_from_scratch(scope, scope_backend, config, tmp_path):
+    templates = ProjectTemplateCache(str(tmp_path / "index.json"))
+    templates.prepare(scope, str(config))
+    scope_backend.calls.clear()
+    templates.prepare(scope, str(config), force_full=True)
+    assert kinds(scope_backend) == ["NewProject", "SetConfig", "SetConfig"]
+
+def test_unreadable_index_is_ignored(tmp_path):
+    index_path = tmp_path / "index.json"
+    index_path.write_text("{not json")
+    assert ProjectTemplateCache(str(index_path)).index == {}
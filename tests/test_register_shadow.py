@@ -0,0 +1,39 @@
+from register_shadow import RegisterShadow, MACRO_FOOTPRINTS
+
+def shadow_with(*keys):
+    shadow = RegisterShadow()
+    for slave_addr, reg_offset in keys:
+        shadow.update(slave_addr, reg_offset, 0x5A)
+    return shadow
+
+
+def test_read_keeps_everything():
+    shadow = shadow_with((0x7c, 0x16), (0x20, 0x01))
+    shadow.invalidate_for_command("read 7c 16")
+    assert shadow.snapshot() == {(0x7c, 0x16): 0x5A, (0x20, 0x01): 0x5A}
+
+def test_write_and_wmulti_drop_only_their_registers():
+    shadow = shadow_with((0x7c, 0x16), (0x7c, 0x2a), (0x20, 0x01))
+    shadow.invalidate_for_command("write 7c 16 ff")
+    assert shadow.get(0x7c, 0x16) is None
+    shadow.invalidate_for_command("wmulti 7c:2a:01 20:01:02")
+    assert shadow.snapshot() == {}
+
+def test_macro_drops_its_footprint():
+    others = [(0x7c, 0x02), (0x20, 0x01)]
+    shadow = shadow_with(*(MACRO_FOOTPRINTS["eq"] + MACRO_FOOTPRINTS["sw"] + others))
+    shadow.invalidate_for_command("EQ 5")
+    assert sorted(shadow.snapshot()) == sorted(MACRO_FOOTPRINTS["sw"] + others)
+
+def test_unknown_or_malformed_command_drops_everything():
+    shadow = shadow_with((0x7c, 0x16))
+    shadow.invalidate_for_command("reset")
+    assert shadow.snapshot() == {}
+    shadow = shadow_with((0x7c, 0x16))
+    shadow.invalidate_for_command("write 7c zz 01")
+    assert shadow.snapshot() == {}
+
+def test_empty_command_is_ignored():
+    shadow = shadow_with((0x7c, 0x16))
+    shadow.invalidate_for_command("   ")
+    assert shadow.get(0x7c, 0x16) == 0x5A
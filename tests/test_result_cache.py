@@ -0,0 +1,87 @@
+import json
+import time
+
+import pytest
+
+from result_cache import ResultCache
+
+REGISTERS = {"0x7c:0x16": 0x0A, "0x7c:0x1a": 0x02}
+BENCH = {"dut": "127.0.0.1:13000", "scope": "192.168.1.50"}
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "scope.cfg"
+    path.write_text("Lane=0\nRate=HBR3\n")
+    return str(path)
+
+def key_for(config_file, registers=REGISTERS, tests=(119041, 119042), bench=BENCH, raw=None):
+    return ResultCache.make_key(registers, config_file, list(tests), bench=bench, raw_commands=raw)
+
+
+def test_key_is_stable_and_ignores_test_order(config_file):
+    assert key_for(config_file) == key_for(config_file)
+    assert key_for(config_file, tests=(119042, 119041)) == key_for(config_file)
+
+def test_key_changes_with_everything_that_shapes_a_measurement(config_file, tmp_path):
+    base = key_for(config_file)
+    other_config = tmp_path / "other.cfg"
+    other_config.write_text("Lane=1\nRate=HBR3\n")
+    variants = [
+        key_for(config_file, registers=dict(REGISTERS, **{"0x7c:0x16": 0x0B})),
+        key_for(str(other_config)),
+        key_for(config_file, tests=(119041,)),
+        key_for(config_file, bench=dict(BENCH, backend="sim")),
+        key_for(config_file, bench=dict(BENCH, dut_serial="SN-2")),
+        key_for(config_file, raw=["write 7c 02 01"]),
+    ]
+    assert base not in variants
+    assert len(set(variants)) == len(variants)
+
+def test_key_follows_config_file_contents(config_file):
+    before = key_for(config_file)
+    with open(config_file, 'a') as f:
+        f.write("Pattern=PRBS7\n")
+    assert key_for(config_file) != before
+
+
+def test_store_then_lookup_persists(config_file, tmp_path):
+    path = str(tmp_path / "cache.json")
+    key = key_for(config_file)
+    cache = ResultCache(path)
+    assert cache.lookup(key) is None
+    cache.store(key, {"119041": {"passed": True}}, "Run_1.pdf", project_name="Run_1")
+
+    reopened = ResultCache(path)
+    entry = reopened.lookup(key)
+    assert entry["results"] == {"119041": {"passed": True}}
+    assert entry["report_name"] == "Run_1.pdf" and entry["project_name"] == "Run_1"
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert (reopened.hits, reopened.misses) == (1, 0)
+
+def test_expired_entries_miss_and_are_dropped_on_load(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = ResultCache(path, ttl=60)
+    cache.store("fresh", {}, "fresh.pdf")
+    cache.store("stale", {}, "stale.pdf")
+    cache.entries["stale"]["created"] -= 120
+    assert cache.lookup("stale") is None
+    cache._save()
+
+    reopened = ResultCache(path, ttl=60)
+    assert sorted(reopened.entries) == ["fresh"]
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.json"), max_entries=2)
+    cache.store("a", {}, "a.pdf")
+    cache.store("b", {}, "b.pdf")
+    cache.entries["a"]["last_used"] = time.time() + 1  # "a" used more recently than "b"
+    cache.store("c", {}, "c.pdf")
+    assert sorted(cache.entries) == ["a", "c"]
+
+def test_unreadable_cache_file_starts_empty(tmp_path):
+    path = tmp_path / "cache.json"
+    path.write_text("{not json")
+    cache = ResultCache(str(path))
+    assert cache.entries == {}
+    cache.store("a", {}, "a.pdf")
+    assert list(json.loads(path.read_text())) == ["a"]
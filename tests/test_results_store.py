@@ -0,0 +1,58 @@
+import sqlite3
+
+import pytest
+
+from results_store import ResultsStore, main
+
+def results(*margins):
+    return [{"test_id": 100 + i, "passed": m > 0, "margin": m} for i, m in enumerate(margins)]
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(str(tmp_path / "results.db"))
+    store.record_run("b1", "Run_0", "R0.pdf", {"eq": 4, "sw": 1}, {"0x7c:0x16": 64}, results(1.0, -2.0), 10.0,
+                     started=1.0)
+    store.record_run("b1", "Run_1", "R1.pdf", {"eq": 8, "sw": 1}, {}, results(3.0, 1.0), 11.0, started=2.0,
+                     test_ids=[100, 101], backend="sim", stage_times={"dut": 1.0, "measure": 8.0})
+    store.record_run("b2", "Run_0", "R0.pdf", {"eq": "8", "sw": 2}, {}, [{"test_id": 100, "passed": True, "margin": 5.0},
+                                                              {"test_id": "101", "passed": False, "margin": "n/a"}],
+                     12.0, started=3.0)
+    yield store
+    store.close()
+
+
+def test_margin_table_groups_by_sweep_parameters(store):
+    header, rows = store.margin_table(by=("eq",), test_id=100)
+    assert header == ["EQ", "TestID", "Runs", "Pass", "Min", "Avg", "Max"]
+    assert rows == [(4, 100, 1, 1, 1.0, 1.0, 1.0), (8, 100, 2, 2, 3.0, 4.0, 5.0)]
+
+def test_margin_table_filters(store):
+    _, rows = store.margin_table(by=("eq", "sw"), where={"sw": 1}, batch="b1")
+    assert rows == [(4, 1, 100, 1, 1, 1.0, 1.0, 1.0), (8, 1, 100, 1, 1, 3.0, 3.0, 3.0),
+                    (4, 1, 101, 1, 0, -2.0, -2.0, -2.0), (8, 1, 101, 1, 1, 1.0, 1.0, 1.0)]
+    with pytest.raises(ValueError):
+        store.margin_table(where={"gain": 1})
+
+def test_timing_history_only_lists_runs_with_stage_times(store):
+    assert store.timing_history() == [{"test_ids": [100, 101], "backend": "sim", "duration": 11.0,
+                                       "stages": {"dut": 1.0, "measure": 8.0}}]
+
+def test_batches_newest_first(store):
+    assert store.batches() == [("b2", 1, 3.0), ("b1", 2, 1.0)]
+
+def test_old_database_is_migrated(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE runs (id INTEGER PRIMARY KEY, batch TEXT, run TEXT, report_name TEXT, eq INTEGER, "
+                 "sw INTEGER, fg INTEGER, started REAL, duration REAL, registers TEXT)")
+    conn.commit()
+    conn.close()
+    store = ResultsStore(path)
+    store.record_run("b", "Run", None, {}, {}, [], 1.0, backend="mock", stage_times={"dut": 0.1})
+    assert store.timing_history()[0]["backend"] == "mock"
+    store.close()
+
+def test_query_cli(store, capsys):
+    main(["--db", store.db_path, "margins", "--by", "eq", "--where", "sw=2"])
+    out = capsys.readouterr().out
+    assert "EQ | TestID" in out and "2 rows" in out
@@ -0,0 +1,52 @@
+import random
+
+from run_order import RunOrderPlanner, _nearest_neighbour, _two_opt
+
+def path_cost(cost, order):
+    return sum(cost[a][b] for a, b in zip(order, order[1:]))
+
+def make_run(name, eq, sw):
+    return {"name": name, "dut_commands": [f"write_register(0x7c, 0x16, 0x{eq:02x})",
+                                           f"write_register(0x7c, 0x1a, 0x{sw:02x})"]}
+
+def planner(tmp_path):
+    # No scope config on disk: only the DUT transitions count
+    return RunOrderPlanner({"scope_config_path": str(tmp_path / "missing.json")})
+
+
+def test_nearest_neighbour_visits_every_node_once():
+    cost = [[0, 5, 1, 9], [5, 0, 2, 1], [1, 2, 0, 8], [9, 1, 8, 0]]
+    assert _nearest_neighbour(cost) == [0, 2, 1, 3]
+
+def test_two_opt_never_increases_the_path_cost():
+    rng = random.Random(7)
+    for _ in range(20):
+        n = 8
+        cost = [[0 if a == b else rng.randint(1, 20) for b in range(n)] for a in range(n)]
+        start = list(range(n))
+        improved = _two_opt(cost, list(start))
+        assert improved[0] == 0 and sorted(improved) == start
+        assert path_cost(cost, improved) <= path_cost(cost, start)
+
+def test_plan_groups_runs_with_the_same_registers(tmp_path):
+    runs = [make_run(f"R{i}", eq, 1) for i, eq in enumerate([0, 15, 0, 15, 0, 15])]
+    plan = planner(tmp_path)
+    planned = plan.plan(runs)
+    assert sorted(r["name"] for r in planned) == sorted(r["name"] for r in runs)
+    eqs = [r["dut_commands"][0] for r in planned]
+    assert sum(a != b for a, b in zip(eqs, eqs[1:])) == 1
+    assert plan.report["planned_dut"] < plan.report["original_dut"]
+    assert "Run order optimized" in plan.report_line()
+
+def test_plan_never_makes_the_order_worse(tmp_path):
+    rng = random.Random(3)
+    runs = [make_run(f"R{i}", rng.randint(0, 3), rng.randint(0, 3)) for i in range(12)]
+    plan = planner(tmp_path)
+    plan.plan(runs)
+    r = plan.report
+    assert r["planned_dut"] + r["planned_config"] <= r["original_dut"] + r["original_config"]
+
+def test_short_batches_keep_their_order(tmp_path):
+    runs = [make_run("A", 0, 0), make_run("B", 1, 1)]
+    plan = planner(tmp_path)
+    assert plan.plan(runs) == runs and plan.report_line() is None
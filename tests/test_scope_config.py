@@ -0,0 +1,59 @@
+import pytest
+
+from instrument_control import KeysightController, parse_config_file
+
+@pytest.fixture
+def scope(scope_backend):
+    scope = KeysightController("10.0.0.5", backend=scope_backend)
+    assert scope.connect()
+    return scope
+
+def set_configs(backend):
+    calls = [c[1:] for c in backend.calls if c[0] == "SetConfig"]
+    backend.calls.clear()
+    return calls
+
+
+def test_only_changed_keys_are_sent(scope, scope_backend):
+    assert scope.configure({"Lanes": 4, "Rate": "HBR3", "_comment": "x"})
+    assert set_configs(scope_backend) == [("Lanes", "4"), ("Rate", "HBR3")]
+    assert scope.configure({"Lanes": "4", "Rate": "HBR2"})
+    assert set_configs(scope_backend) == [("Rate", "HBR2")]
+    assert scope.configure({"Lanes": 4, "Rate": "HBR2"}, force_full=True)
+    assert set_configs(scope_backend) == [("Lanes", "4"), ("Rate", "HBR2")]
+    assert sorted(k for k, *_ in scope.config_timing_report()) == ["Lanes", "Rate"]
+
+def test_new_or_opened_project_forgets_the_acknowledged_config(scope, scope_backend):
+    scope.configure({"Lanes": 4})
+    scope.create_new_project()
+    scope_backend.calls.clear()
+    scope.configure({"Lanes": 4})
+    assert set_configs(scope_backend) == [("Lanes", "4")]
+    scope.load_setup("C:\\Templates\\a.dpj")
+    scope_backend.calls.clear()
+    scope.configure({"Lanes": 4})
+    assert set_configs(scope_backend) == [("Lanes", "4")]
+
+def test_template_config_is_not_sent_again(scope, scope_backend):
+    scope.load_setup("C:\\Templates\\a.dpj")
+    scope.mark_config_applied({"Lanes": 4, "Rate": "HBR3"})
+    scope_backend.calls.clear()
+    scope.configure({"Lanes": 4, "Rate": "HBR2"})
+    assert set_configs(scope_backend) == [("Rate", "HBR2")]
+
+def test_failed_key_is_resent_next_time(scope, scope_backend):
+    scope.configure({"Lanes": 4})
+    set_configs(scope_backend)
+    scope_backend.fail_keys.add("Lanes")
+    assert not scope.configure({"Lanes": 2})
+    scope_backend.fail_keys.clear()
+    scope.configure({"Lanes": 4})
+    assert set_configs(scope_backend) == [("Lanes", "4")]
+
+def test_config_file_with_comments(scope, scope_backend, tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text('{\n  "Lanes": 4,  # lane count\n  // rate below\n  "Rate": "HBR3"\n}\n')
+    assert parse_config_file(str(path)) == {"Lanes": 4, "Rate": "HBR3"}
+    assert scope.load_config_file(str(path))
+    assert set_configs(scope_backend) == [("Lanes", "4"), ("Rate", "HBR3")]
+    assert not scope.load_config_file(str(tmp_path / "missing.json"))
@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import pytest
+
+from instrument_control import KeysightController
+
+@pytest.fixture
+def scope(scope_backend):
+    controller = KeysightController("10.0.0.5", backend=scope_backend)
+    assert controller.connect()
+    return controller
+
+
+def test_start_run_returns_while_run_blocks(scope, scope_backend):
+    scope_backend.run_seconds = 5
+    started = time.time()
+    assert scope.start_run()
+    assert time.time() - started < 1
+    assert scope.is_running()
+    scope.remote_app.Stop()
+    scope._run_thread.join(1)
+    assert not scope.is_running()
+
+def test_wait_for_completion_reports_progress(scope, scope_backend):
+    scope_backend.run_seconds = 0.2
+    elapsed = []
+    assert scope.start_run()
+    assert scope.wait_for_completion(poll_interval=0.02, progress=elapsed.append)
+    assert elapsed and elapsed == sorted(elapsed)
+    assert scope_backend.count("Stop") == 0
+
+def test_timeout_stops_the_run(scope, scope_backend):
+    scope_backend.run_seconds = 30
+    started = time.time()
+    assert scope.run_tests(poll_interval=0.02, timeout=0.1) is False
+    assert time.time() - started < 5
+    assert scope_backend.count("Stop") == 1
+    scope._run_thread.join(1)
+    assert not scope.is_running()
+
+def test_second_start_while_running_is_refused(scope, scope_backend):
+    scope_backend.run_seconds = 5
+    assert scope.start_run()
+    assert scope.start_run() is False
+    assert scope_backend.count("Run") == 1
+    scope.remote_app.Stop()
+
+def test_wait_without_start_fails(scope):
+    assert scope.wait_for_completion(poll_interval=0.01) is False
+
+def test_run_error_fails_the_run(scope, scope_backend):
+    scope_backend.run_error = RuntimeError("Run rejected")
+    assert scope.run_tests(poll_interval=0.01) is False
+
+def test_run_tests_async_keeps_the_loop_free(scope, scope_backend):
+    scope_backend.run_seconds = 0.2
+    ticks = []
+
+    async def ticker():
+        while len(ticks) < 5:
+            ticks.append(time.time())
+            await asyncio.sleep(0.01)
+
+    async def main():
+        return await asyncio.gather(scope.run_tests_async(poll_interval=0.02), ticker())
+
+    completed, _ = asyncio.run(main())
+    assert completed is True
+    assert len(ticks) == 5
+    assert ticks[-1] - ticks[0] < 0.2
@@ -0,0 +1,29 @@
+from instrument_control import ScopeSession
+
+def test_session_connects_once_and_reuses_the_handle(scope_backend):
+    session = ScopeSession("10.0.0.5", backend=scope_backend)
+    first = session.acquire()
+    assert first is not None and first.is_connected
+    assert session.acquire() is first and session.acquire() is first
+    assert scope_backend.count("GetRemoteAte") == 1
+    assert (session.connect_count, session.reuse_count) == (1, 2)
+
+def test_lost_session_reconnects(scope_backend):
+    session = ScopeSession("10.0.0.5", backend=scope_backend)
+    session.acquire()
+    scope_backend.alive = False
+    assert session.acquire() is not None
+    assert scope_backend.count("GetRemoteAte") == 2
+    assert (session.connect_count, session.reuse_count) == (2, 0)
+
+def test_failed_connect_returns_none(scope_backend):
+    scope_backend.load()
+    scope_backend.RemoteAteUtilities.GetRemoteAte = staticmethod(lambda ip: 1 / 0)
+    session = ScopeSession("10.0.0.5", backend=scope_backend)
+    assert session.acquire() is None
+
+def test_close_drops_the_handle(scope_backend):
+    session = ScopeSession("10.0.0.5", backend=scope_backend)
+    session.acquire()
+    session.close()
+    assert not session.controller.is_alive()
@@ -0,0 +1,52 @@
+import types
+
+import dut_control_server
+from macro_compiler import DP_SLAVE_ADDR
+from sim_bench import SimBench, SimBackend, EQ_REG
+
+def eq_register(eq):
+    # UTX2_EQ_CAP is bits 7:4 of lane 0 register 0x16
+    return eq << 4
+
+def margins(backend, test_ids=(1, 2)):
+    backend.load()
+    app = backend.IRemoteAte(backend.RemoteAteUtilities.GetRemoteAte("sim-scope"))
+    app.SelectedTests = list(test_ids)
+    app.Run()
+    return app.GetResults()
+
+
+def test_creating_a_backend_leaves_the_server_driver_alone():
+    driver = dut_control_server.driver
+    SimBackend(scale=0)
+    assert dut_control_server.driver is driver
+
+def test_drive_server_routes_register_writes_to_the_bench():
+    server = types.SimpleNamespace(driver=None)
+    backend = SimBackend(scale=0)
+    backend.drive_server(server)
+    before = margins(backend)
+    assert server.driver.write(DP_SLAVE_ADDR, EQ_REG, eq_register(10))
+    assert server.driver.read(DP_SLAVE_ADDR, EQ_REG) == eq_register(10)
+    assert backend.bench.field_values()["eq"] == 10
+    assert margins(backend) != before
+
+def test_attached_dut_client_supplies_the_registers():
+    registers = {(DP_SLAVE_ADDR, EQ_REG): eq_register(3)}
+    dut_client = types.SimpleNamespace(get_register_value=lambda slave, offset: registers.get((slave, offset)))
+    backend = SimBackend(scale=0)
+    backend.attach_dut(dut_client)
+    assert backend.bench.field_values()["eq"] == 3
+    low = margins(backend)
+    registers[(DP_SLAVE_ADDR, EQ_REG)] = eq_register(10)
+    assert margins(backend) != low
+
+def test_unknown_registers_use_spec_defaults():
+    bench = SimBench(scale=0)
+    default = bench.register_map.default_value(DP_SLAVE_ADDR, EQ_REG)
+    assert bench.register_value(DP_SLAVE_ADDR, EQ_REG) == default
+
+def test_latencies_are_scaled_and_counted():
+    bench = SimBench(latency={"i2c": 1.0}, scale=0.001)
+    assert bench.delay("i2c", count=3) == 0.003
+    assert bench.counts["i2c"] == 3
@@ -0,0 +1,32 @@
+import itertools
+
+from sweep import count_batch_runs, expand_axis, generate_sweep_runs, iter_batch_runs, sweep_size
+
+def test_axis_specs():
+    assert list(expand_axis({"start": 0, "stop": 15, "step": 5})) == [0, 5, 10, 15]
+    assert list(expand_axis({"start": 3, "stop": 0, "step": -1})) == [3, 2, 1, 0]
+    assert expand_axis([2, 1]) == [2, 1]
+
+def test_runs_are_generated_lazily_last_axis_fastest():
+    sweep = {"axes": {"eq": {"start": 0, "stop": 10 ** 6}, "sw": [0, 1]}, "name": "Run_EQ{eq}_SW{sw}"}
+    assert sweep_size(sweep) == 2 * (10 ** 6 + 1)
+    first = list(itertools.islice(generate_sweep_runs(sweep), 3))
+    assert [run["name"] for run in first] == ["Run_EQ0_SW0", "Run_EQ0_SW1", "Run_EQ1_SW0"]
+    assert first[2]["sweep_point"] == {"eq": 1, "sw": 0}
+
+def test_run_definition_from_templates():
+    sweep = {"axes": {"eq": [14]}, "init_commands": ["dpaddr"], "report_name": "R_{index}_EQ{eq}.pdf",
+             "project_name": "P_EQ{eq}", "test_ids": [1, 2]}
+    run, = generate_sweep_runs(sweep)
+    assert run == {"name": "Sweep_EQ14", "dut_commands": ["dpaddr", "eq 14"], "report_name": "R_0_EQ14.pdf",
+                   "project_name": "P_EQ14", "test_ids": [1, 2], "sweep_point": {"eq": 14}}
+
+def test_custom_commands():
+    sweep = {"axes": {"eq": [1]}, "commands": ["write_register(0x7c, 0x16, 0x{eq:02x})"]}
+    assert next(generate_sweep_runs(sweep))["dut_commands"] == ["write_register(0x7c, 0x16, 0x01)"]
+
+def test_batch_runs_are_explicit_runs_then_the_sweep():
+    config = {"runs": [{"name": "Baseline"}], "sweep": {"axes": {"eq": [0, 1]}}}
+    assert [run["name"] for run in iter_batch_runs(config)] == ["Baseline", "Sweep_EQ0", "Sweep_EQ1"]
+    assert count_batch_runs(config) == 3
+    assert count_batch_runs({"runs": []}) == 0
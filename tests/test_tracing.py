@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from tracing import Tracer, span, traced, tracer
+
+@pytest.fixture
+def enabled_tracer():
+    was_enabled = tracer.enabled
+    tracer.reset()
+    tracer.enable()
+    yield tracer
+    tracer.enabled = was_enabled
+    tracer.reset()
+
+
+def test_spans_are_not_recorded_until_enabled():
+    idle = Tracer()
+    idle.reset()
+    assert not idle.enabled and idle.durations() == {}
+
+def test_span_and_decorator_record_errors_too(enabled_tracer):
+    @traced("dut.write")
+    def write():
+        pass
+
+    write()
+    with pytest.raises(RuntimeError):
+        with span("scope.Run", tests=2):
+            raise RuntimeError("lost scope")
+    events = {event["name"]: event for event in enabled_tracer.events}
+    assert set(events) == {"dut.write", "scope.Run"}
+    assert events["scope.Run"]["args"] == {"tests": "2", "error": "RuntimeError"}
+    assert events["scope.Run"]["cat"] == "scope"
+
+def test_percentile_table_is_sorted_by_total_time():
+    t = Tracer()
+    for seconds in (1.0, 2.0, 3.0, 4.0):
+        t.record("measure", 0.0, seconds)
+    t.record("dut", 0.0, 0.5)
+    assert t.percentile_table() == [("measure", 4, 10.0, 2.0, 4.0, 4.0), ("dut", 1, 0.5, 0.5, 0.5, 0.5)]
+
+def test_chrome_export_names_threads(tmp_path):
+    t = Tracer()
+    t.record("dut", t._origin + 0.001, 0.002)
+    path = tmp_path / "trace.json"
+    t.export_chrome(str(path))
+    events = json.loads(path.read_text())["traceEvents"]
+    assert [e["ph"] for e in events] == ["M", "X"]
+    assert events[1]["ts"] == pytest.approx(1000.0) and events[1]["dur"] == pytest.approx(2000.0)
@@ -0,0 +1,43 @@
+import dut_control_server
+from dut_control_server import process_command
+from dut_control_client import DutControlClient, WMULTI_MAX_ITEMS, parse_wmulti_response
+
+def test_wmulti_reports_each_item(dut_driver):
+    dut_driver.fail_registers.add((0x7c, 0x17))
+    reply = process_command("wmulti 7c:16:01 7c:17:02 7c:zz:03 7c:18:04")
+    assert reply == "Fail 2/4 OK Fail Err OK"
+    assert dut_driver.registers == {(0x7c, 0x16): 0x01, (0x7c, 0x18): 0x04}
+    assert process_command("wmulti 7c:16:05") == "OK 1/1 OK"
+    assert process_command("wmulti").startswith("Error: Usage")
+
+def test_parse_wmulti_response():
+    assert parse_wmulti_response("Fail 1/2 OK Fail", 2) == ["OK", "Fail"]
+    assert parse_wmulti_response("OK 1/1 OK", 2) == [None, None]
+    assert parse_wmulti_response("Error: Unknown command 'wmulti'", 1) == [None]
+    assert parse_wmulti_response(None, 2) == [None, None]
+
+def test_write_registers_batches_and_chunks(dut_server_port, dut_driver):
+    writes = [(0x7c, offset, offset & 0xFF) for offset in range(WMULTI_MAX_ITEMS + 4)]
+    dut_driver.fail_registers.add((0x7c, 0x03))
+    commands = []
+    with DutControlClient("127.0.0.1", dut_server_port, persistent=True) as client:
+        send_commands = client.send_commands
+
+        def recording_send_commands(cmds):
+            commands.extend(cmds)
+            return send_commands(cmds)
+
+        client.send_commands = recording_send_commands
+        statuses = client.write_registers(writes)
+    assert len(commands) == 2 and all(cmd.startswith("wmulti ") for cmd in commands)
+    assert statuses == ["OK"] * 3 + ["Fail"] + ["OK"] * (len(writes) - 4)
+    assert len(dut_driver.writes) == len(writes)
+
+def test_write_registers_falls_back_to_single_writes(dut_server_port, dut_driver, monkeypatch):
+    handler = dut_control_server.process_command
+    monkeypatch.setattr(dut_control_server, "process_command",
+                        lambda cmd: "Error: Unknown command 'wmulti'" if cmd.startswith("wmulti") else handler(cmd))
+    dut_driver.fail_registers.add((0x7c, 0x17))
+    with DutControlClient("127.0.0.1", dut_server_port, persistent=True) as client:
+        assert client.write_registers([(0x7c, 0x16, 1), ("7c", "17", "02")]) == ["OK", "Fail"]
+    assert dut_driver.writes == [(0x7c, 0x16, 1), (0x7c, 0x17, 2)]
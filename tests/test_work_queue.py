@@ -0,0 +1,117 @@
+import socket
+import threading
+import time
+
+from work_queue import WorkQueue, serve_work_queue
+from work_queue_worker import WorkQueueClient
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def serve(queue):
+    port = free_port()
+    thread = threading.Thread(target=serve_work_queue, args=(queue,), kwargs={"host": "127.0.0.1", "port": port},
+                              daemon=True)
+    thread.start()
+    time.sleep(0.2)
+    return f"http://127.0.0.1:{port}", thread
+
+
+def test_expired_lease_is_reclaimed_and_counts_one_attempt():
+    results = []
+    queue = WorkQueue([{"name": "A"}], {}, lambda run, payload: results.append((run["name"], payload)),
+                      lease_seconds=0.3, max_attempts=3)
+    url, thread = serve(queue)
+    first, second = WorkQueueClient(url, "w1"), WorkQueueClient(url, "w2")
+
+    status, lease = first.lease()
+    assert status == 200 and lease["run"]["name"] == "A"
+    # w1 stops heartbeating; its lease lapses
+    time.sleep(0.5)
+    status, relet = second.lease()
+    assert status == 200
+    assert relet["run_id"] == lease["run_id"]
+    assert queue.tasks[lease["run_id"]]["attempts"] == 2
+    assert queue.reclaimed == 1
+
+    assert not first.heartbeat(lease)
+    assert not first.complete(lease, {"ok": True, "rows": [{"Run": "A"}]})
+    assert second.complete(relet, {"ok": True, "rows": [{"Run": "A"}]})
+    # The next poll finds the run source empty and ends the batch
+    assert second.lease() == (200, {"done": True})
+    thread.join(timeout=5)
+    assert queue.done.is_set()
+    assert results == [("A", {"ok": True, "rows": [{"Run": "A"}]})]
+
+
+def test_run_definition_error_is_reported_as_failed_run():
+    def runs():
+        yield {"name": "A"}
+        raise KeyError("eqq")
+
+    results = []
+    queue = WorkQueue(runs(), {}, lambda run, payload: results.append((run["name"], payload)))
+    lease = queue.lease("w1")
+    assert lease["run"]["name"] == "A"
+    assert queue.lease("w1") is None
+    assert len(results) == 1 and not results[0][1]["ok"]
+    assert "eqq" in results[0][1]["error"]
+    assert queue.complete("w1", lease["run_id"], lease["lease"], {"ok": True})
+    assert queue.done.is_set()
+    assert [name for name, _ in results] == ["Run#2", "A"]
+
+
+def test_leased_runs_complete_in_order_and_end_the_batch():
+    results = []
+    queue = WorkQueue([{"name": "A"}, {"name": "B"}], {"scope_backend": "sim"},
+                      lambda run, payload: results.append((run["name"], payload["ok"])), max_attempts=2)
+    a, b = queue.lease("w1"), queue.lease("w2")
+    assert (a["run"]["name"], b["run"]["name"]) == ("A", "B")
+    assert a["common"] == {"scope_backend": "sim"}
+    assert queue.lease("w3") is None  # nothing left to lease, but runs still out
+    assert queue.heartbeat("w1", a["run_id"], a["lease"])
+    assert not queue.heartbeat("w2", a["run_id"], a["lease"])
+
+    # B fails on w2 and is retried on w1
+    assert queue.complete("w2", b["run_id"], b["lease"], {"ok": False, "error": "scope busy"})
+    assert queue.complete("w1", a["run_id"], a["lease"], {"ok": True})
+    retry = queue.lease("w1")
+    assert retry["run_id"] == b["run_id"] and queue.tasks[b["run_id"]]["attempts"] == 2
+    assert not queue.done.is_set()
+    assert queue.complete("w1", retry["run_id"], retry["lease"], {"ok": True})
+
+    assert queue.done.is_set()
+    assert queue.lease("w2") == {"done": True}
+    assert results == [("A", True), ("B", True)]
+    status = queue.status()
+    assert (status["pending"], status["leased"], status["completed"], status["reclaimed"]) == (0, 0, 2, 0)
+    assert {w: (s["completed"], s["failed"]) for w, s in status["workers"].items()} == \
+        {"w1": (2, 0), "w2": (0, 1), "w3": (0, 0)}
+
+def test_sim_workers_drain_the_queue(dut_server_port, tmp_path):
+    from work_queue_worker import run_worker
+
+    results = []
+    runs = [{"name": f"Run_{i}", "report_name": f"Run_{i}.pdf", "project_name": f"Run_{i}",
+             "dut_commands": [f"eq {i}"]} for i in range(4)]
+    common = {"default_test_ids": [119041], "scope_backend": "sim", "scope_backend_options": {"scale": 0.001},
+              "project_templates": False, "run_poll_interval": 0.01, "base_directory": str(tmp_path)}
+    queue = WorkQueue(runs, common, lambda run, payload: results.append((run["name"], payload)))
+    url, thread = serve(queue)
+    bench = {"instrument_ip": "sim-scope", "dut_server_ip": "127.0.0.1", "dut_server_port": dut_server_port}
+    counts = []
+    workers = [threading.Thread(target=lambda name=name: counts.append(
+        run_worker(url, dict(bench, name=name), poll_interval=0.05))) for name in ("w1", "w2")]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+    thread.join(timeout=5)
+
+    assert queue.done.is_set()
+    assert sorted(name for name, _ in results) == [f"Run_{i}" for i in range(4)]
+    assert all(payload["ok"] for _, payload in results)
+    assert sum(counts) == 4
+    assert sum(info["completed"] for info in queue.workers.values()) == 4